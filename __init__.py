@@ -48,7 +48,7 @@ if "bpy" in locals():
 import bpy
 
 from .register_util import register_all, unregister_all
-from . import model, operators, panels
+from . import live_update, model, operators, panels
 
 bl_info = {
     "name": 'Scene Complexity',
@@ -67,6 +67,31 @@ properties = [
     ('sa_apply_modifiers', bpy.props.BoolProperty(name='Apply modifiers',
                                                   description='Will apply modifiers for mesh statistics',
                                                   default=True)),
+    ('sa_live_update', bpy.props.BoolProperty(name='Live Update',
+                                              description='Update caches of edited objects, materials and node trees '
+                                                          'as the scene changes',
+                                              default=False,
+                                              options={'SKIP_SAVE'},
+                                              update=live_update.toggle_live_update)),
+    ('sa_live_update_delay', bpy.props.FloatProperty(name='Delay',
+                                                     description='Seconds without changes to wait before updating '
+                                                                 'caches',
+                                                     default=0.5, min=0.0, soft_max=5.0, subtype='TIME_ABSOLUTE',
+                                                     unit='TIME_ABSOLUTE')),
+    ('sa_disk_cache_location', bpy.props.EnumProperty(name='Analysis Cache',
+                                                      description='Where to keep mesh and node stats between sessions, '
+                                                                  'so only changed data is analyzed again',
+                                                      items=(('NONE', 'Off', 'Analyze everything on every refresh'),
+                                                             ('SIDECAR', 'Next to File',
+                                                              'Store the cache next to the .blend file'),
+                                                             ('USER', 'User Cache',
+                                                              "Store a cache shared by all files in Blender's "
+                                                              'user directory')),
+                                                      default='NONE')),
+    ('sa_disk_cache_max_entries', bpy.props.IntProperty(name='Max Entries',
+                                                        description='Maximum number of stats kept in the analysis '
+                                                                    'cache, the least recently used are removed first',
+                                                        default=100000, min=100, soft_max=1000000)),
 ]
 
 
@@ -82,6 +107,7 @@ def register():
 
 
 def unregister():
+    live_update.unregister()
     panels.unregister()
     operators.unregister()
     model.unregister()
@@ -0,0 +1,222 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Analyzes many .blend files with a pool of background Blender processes.
+
+Each file is opened by its own worker process, so a crash or hang only affects that file's record.
+One JSON record is written per file, as soon as its worker finishes::
+
+    blender --background --factory-startup --python cli/batch_analyze.py -- ./assets --jobs 8 --output stats.jsonl
+
+The controller can also be run by any Python 3 interpreter, given ``--blender``.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from cli_util import get_script_args, import_addon  # noqa: E402
+
+RECORD_PREFIX = 'SCENE_COMPLEXITY_RECORD '
+"""Marks the worker's output line containing its JSON record, among Blender's own console output."""
+
+
+def analyze_current_file(apply_modifiers: bool = True, eval_samples: int = 0, cache_location: str = 'NONE',
+                         time_stages: bool = False) -> dict:
+    """Runs all refresh operators on the open file and collects their caches.
+
+    :param apply_modifiers: whether mesh stats are based on evaluated meshes.
+    :param eval_samples: number of re-evaluations per object to profile evaluation times, ``0`` to skip profiling.
+    :param cache_location: where to keep stats between runs, as in ``sa_disk_cache_location``.
+    :param time_stages: whether to time each stage of the refresh passes.
+    :return: JSON-serializable record of all caches, scene totals and the refresh report.
+    """
+    import bpy
+    from scene_complexity.model import instrumentation
+    from scene_complexity.model.rows import get_scene_totals, iter_tables
+
+    window_manager = bpy.context.window_manager
+    window_manager.sa_apply_modifiers = apply_modifiers
+    window_manager.sa_disk_cache_location = cache_location
+    window_manager.sa_instrumentation = time_stages
+    bpy.ops.scene_analyzer.refresh_all()
+    if eval_samples > 0:
+        bpy.ops.scene_analyzer.profile_evaluation(samples=eval_samples)
+
+    record = {}
+    for table_name, fields, rows in iter_tables(window_manager):
+        record[table_name] = [dict(zip(fields, row)) for row in rows]
+
+    record['totals'] = get_scene_totals(window_manager)
+    record['refresh_report'] = instrumentation.get_report()
+    return record
+
+
+def run_worker(args: argparse.Namespace):
+    """Analyzes the file Blender was started with, printing its record to stdout."""
+    import bpy
+
+    import_addon()
+    record = {'file': bpy.data.filepath, 'ok': True}
+    try:
+        record.update(analyze_current_file(not args.no_modifiers, args.eval_samples, args.cache.upper(),
+                                           args.time_stages))
+    except Exception as e:
+        record.update(ok=False, error='{}: {}'.format(type(e).__name__, e))
+    print(RECORD_PREFIX + json.dumps(record), flush=True)
+
+
+def find_blend_files(paths: list[str]) -> list[str]:
+    """Expands directories into the .blend files they contain, recursively.
+
+    :param paths: .blend files and directories
+    """
+    blend_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dir_path, _dir_names, file_names in os.walk(path):
+                blend_files.extend(os.path.join(dir_path, f) for f in sorted(file_names) if f.endswith('.blend'))
+        else:
+            blend_files.append(path)
+    return blend_files
+
+
+def analyze_file(blender: str, blend_file: str, timeout: float, no_modifiers: bool, eval_samples: int,
+                 cache: str = 'none', time_stages: bool = False) -> dict:
+    """Analyzes a .blend file in a new background Blender process.
+
+    :param blender: path to the Blender executable
+    :param blend_file: path to the .blend file
+    :param timeout: seconds before the worker process is killed
+    :param no_modifiers: whether to skip modifiers for mesh stats
+    :param eval_samples: number of re-evaluations per object to profile evaluation times, ``0`` to skip profiling.
+    :param cache: analysis cache location, one of the ``--cache`` choices.
+    :param time_stages: whether to time each stage of the refresh passes.
+    :return: the worker's record, or a failed record if the worker crashed or timed out.
+    """
+    command = [blender, '--background', '--factory-startup', blend_file,
+               '--python', os.path.abspath(__file__), '--', '--worker']
+    if no_modifiers:
+        command.append('--no-modifiers')
+    if eval_samples > 0:
+        command.extend(['--eval-samples', str(eval_samples)])
+    command.extend(['--cache', cache])
+    if time_stages:
+        command.append('--time-stages')
+
+    start = time.perf_counter()
+    try:
+        # a crashing worker may cut off its output in the middle of a multibyte character
+        result = subprocess.run(command, capture_output=True, text=True, errors='replace', timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'file': blend_file, 'ok': False, 'error': 'timed out after {}s'.format(timeout),
+                'duration': time.perf_counter() - start}
+    except OSError as e:  # e.g. a missing or non-executable Blender binary
+        return {'file': blend_file, 'ok': False, 'error': 'could not start worker: {}'.format(e),
+                'duration': time.perf_counter() - start}
+
+    duration = time.perf_counter() - start
+    for line in result.stdout.splitlines():
+        if line.startswith(RECORD_PREFIX):
+            raw_record = line[len(RECORD_PREFIX):]
+            try:
+                record = json.loads(raw_record)
+            except ValueError as e:  # truncated or garbled by a crashing worker
+                error = 'worker exited with code {} and an unreadable record: {}'.format(result.returncode, e)
+                return {'file': blend_file, 'ok': False, 'duration': duration, 'error': error, 'output': raw_record}
+            record['file'] = blend_file
+            record['duration'] = duration
+            return record
+
+    stderr_tail = result.stderr.strip().splitlines()[-5:]
+    return {'file': blend_file, 'ok': False, 'duration': duration,
+            'error': 'worker exited with code {} without a record: {}'.format(result.returncode,
+                                                                              ' | '.join(stderr_tail))}
+
+
+def run_controller(args: argparse.Namespace) -> int:
+    """Distributes files across worker processes, writing each record as soon as it's available.
+
+    :return: process exit code, non-zero if any file failed.
+    """
+    blender = args.blender
+    if blender is None:
+        try:
+            import bpy
+            blender = bpy.app.binary_path
+        except ImportError:
+            print('--blender is required when not running inside Blender', file=sys.stderr)
+            return 2
+
+    blend_files = find_blend_files(args.paths)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    failures = 0
+    try:
+        with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+            futures = {
+                pool.submit(analyze_file, blender, blend_file, args.timeout, args.no_modifiers, args.eval_samples,
+                            args.cache, args.time_stages): blend_file
+                for blend_file in blend_files
+            }
+            for future in as_completed(futures):
+                try:
+                    record = future.result()
+                except Exception as e:  # one failed file must not drop the records of the others
+                    record = {'file': futures[future], 'ok': False, 'error': '{}: {}'.format(type(e).__name__, e)}
+                failures += not record['ok']
+                output.write(json.dumps(record) + '\n')
+                output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print('Analyzed {} files, {} failed'.format(len(blend_files), failures), file=sys.stderr)
+    return 1 if failures else 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='batch_analyze', description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', help='.blend files or directories to search for .blend files')
+    parser.add_argument('--output', '-o', help='JSON Lines file to write records to, defaults to stdout')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help='number of Blender processes to run at once')
+    parser.add_argument('--timeout', type=float, default=600.0, help='seconds before a file is considered hung')
+    parser.add_argument('--blender', help='Blender executable, defaults to the running Blender')
+    parser.add_argument('--no-modifiers', action='store_true', help='count mesh stats without applying modifiers')
+    parser.add_argument('--eval-samples', type=int, default=0,
+                        help='profile evaluation time per object over this many re-evaluations')
+    parser.add_argument('--cache', choices=('none', 'sidecar', 'user'), default='none',
+                        help='keep mesh and node stats between runs next to each file or in a shared user cache, '
+                             'so unchanged data is not analyzed again')
+    parser.add_argument('--time-stages', action='store_true',
+                        help='add the time spent in each refresh stage to the refresh report of each record')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args(get_script_args())
+
+
+def main():
+    args = parse_args()
+    if args.worker:
+        run_worker(args)
+    else:
+        sys.exit(run_controller(args))
+
+
+if __name__ == '__main__':
+    main()
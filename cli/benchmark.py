@@ -0,0 +1,494 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Benchmarks the refresh operators on procedurally generated scenes of increasing size.
+
+Each scene is generated from scratch with the given parameters: mesh objects sharing a number of meshes
+of quads, or of triangles, quads and n-gons, nested collections, collection instancers, and materials
+and geometry node trees whose nodes form diamonds, where every node feeds two nodes of the next layer.
+The node count of every node tree is checked, and a diamond of thousands of nodes is walked once without recursion
+and once more from the per-tree cache.
+Results are written as JSON and can be compared with a previous run, exiting with a non-zero code
+if any operator got slower than allowed::
+
+    blender --background --factory-startup --python cli/benchmark.py -- --objects 1000 10000 --output bench.json
+    blender --background --factory-startup --python cli/benchmark.py -- --objects 1000 10000 --compare bench.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from cli_util import get_resident_bytes, get_script_args, import_addon  # noqa: E402
+
+OPERATORS = ('refresh_nodes', 'refresh_meshes', 'refresh_collections', 'refresh_instances')
+"""Operators of ``bpy.ops.scene_analyzer`` to time, in the order the refresh all operator runs them."""
+
+CHECK_RECURSION_LIMIT = 300
+"""Recursion limit while walking the large node tree check's diamond, lower than its longest path,
+so a recursive walk fails with ``RecursionError`` instead of passing on a deep enough stack."""
+
+SCENE_PARAMS = ('shared_meshes', 'grid', 'polygons', 'subdivisions', 'collection_depth', 'collection_children',
+                'instancers', 'instanced_objects', 'materials', 'node_groups', 'node_width', 'node_depth')
+"""Scene generator arguments, which must match for two runs to be compared."""
+
+
+def clear_scene():
+    """Removes all objects, meshes, materials, collections and node groups."""
+    import bpy
+
+    for data in (bpy.data.objects, bpy.data.meshes, bpy.data.materials, bpy.data.collections, bpy.data.node_groups):
+        bpy.data.batch_remove(list(data))
+
+
+def get_grid_faces(size: int, mixed: bool = False) -> list[tuple[int, ...]]:
+    """Returns the faces of a flat grid of ``size`` by ``size`` vertices.
+
+    Mixed grids cycle through rows of quads, rows of triangles, and rows of hexagons spanning two cells each,
+    so both the n-gon and triangle paths of triangle counting are exercised.
+
+    :param size: vertices along each side of the grid
+    :param mixed: whether to mix triangles and n-gons with quads, otherwise all faces are quads.
+    :return: vertex indices of each face
+    """
+    faces = []
+    for y in range(size - 1):
+        row, next_row = y * size, (y + 1) * size
+        x = 0
+        while x < size - 1:
+            kind = y % 3 if mixed else 0
+            if kind == 2 and x + 2 < size:
+                faces.append((row + x, row + x + 1, row + x + 2, next_row + x + 2, next_row + x + 1, next_row + x))
+                x += 2
+                continue
+            quad = (row + x, row + x + 1, next_row + x + 1, next_row + x)
+            if kind == 1:
+                faces.extend([quad[:3], (quad[0], quad[2], quad[3])])
+            else:
+                faces.append(quad)
+            x += 1
+    return faces
+
+
+def count_subdivided_tris(faces: list[tuple[int, ...]], levels: int) -> int:
+    """Returns the triangles of faces after Catmull-Clark subdivision, computed independently of the add-on.
+
+    Subdividing once turns an n-sided face into n quads, and each further level turns each quad into 4 quads.
+    """
+    if levels == 0:
+        return sum([len(face) - 2 for face in faces])
+    return sum([len(face) for face in faces]) * 4 ** (levels - 1) * 2
+
+
+def create_grid_mesh(name: str, faces: list[tuple[int, ...]], size: int):
+    """Creates a flat grid mesh of ``size`` by ``size`` vertices from faces returned by :func:`get_grid_faces`."""
+    import bpy
+
+    verts = [(x, y, 0.0) for y in range(size) for x in range(size)]
+    mesh = bpy.data.meshes.new(name)
+    mesh.from_pydata(verts, [], faces)
+    mesh.update()
+    return mesh
+
+
+def build_diamond(node_tree, width: int, depth: int):
+    """Adds layers of math nodes where each node feeds two nodes of the next layer, summed into a single node.
+
+    Every node is reachable from the output through many paths, so walks that don't remember visited nodes
+    take exponential time.
+
+    :param node_tree: shader or geometry node tree
+    :param width: nodes per layer
+    :param depth: number of math node layers after the first layer of value nodes
+    :return: the node summing the last layer
+    """
+    nodes, links = node_tree.nodes, node_tree.links
+    layer = [nodes.new('ShaderNodeValue') for _ in range(width)]
+    for _ in range(depth):
+        next_layer = []
+        for idx in range(width):
+            node = nodes.new('ShaderNodeMath')
+            links.new(layer[idx].outputs[0], node.inputs[0])
+            links.new(layer[(idx + 1) % width].outputs[0], node.inputs[1])
+            next_layer.append(node)
+        layer = next_layer
+
+    total = layer[0]
+    for node in layer[1:]:
+        add = nodes.new('ShaderNodeMath')
+        links.new(total.outputs[0], add.inputs[0])
+        links.new(node.outputs[0], add.inputs[1])
+        total = add
+    return total
+
+
+def get_diamond_node_count(width: int, depth: int) -> int:
+    """Returns the number of nodes added by :func:`build_diamond`."""
+    return width * (depth + 1) + width - 1
+
+
+def create_material(name: str, width: int, depth: int):
+    """Creates a material whose roughness is driven by a diamond of math nodes."""
+    import bpy
+
+    material = bpy.data.materials.new(name)
+    material.use_nodes = True
+    node_tree = material.node_tree
+    principled = next(node for node in node_tree.nodes if node.type == 'BSDF_PRINCIPLED')
+    node_tree.links.new(build_diamond(node_tree, width, depth).outputs[0], principled.inputs['Roughness'])
+    return material
+
+
+def create_geometry_node_tree(name: str, width: int, depth: int):
+    """Creates a geometry node tree offsetting positions by a diamond of math nodes."""
+    import bpy
+
+    node_tree = bpy.data.node_groups.new(name, 'GeometryNodeTree')
+    if hasattr(node_tree, 'interface'):
+        node_tree.interface.new_socket('Geometry', in_out='INPUT', socket_type='NodeSocketGeometry')
+        node_tree.interface.new_socket('Geometry', in_out='OUTPUT', socket_type='NodeSocketGeometry')
+    else:  # before Blender 4.0
+        node_tree.inputs.new('NodeSocketGeometry', 'Geometry')
+        node_tree.outputs.new('NodeSocketGeometry', 'Geometry')
+
+    nodes, links = node_tree.nodes, node_tree.links
+    group_input = nodes.new('NodeGroupInput')
+    group_output = nodes.new('NodeGroupOutput')
+    set_position = nodes.new('GeometryNodeSetPosition')
+    combine = nodes.new('ShaderNodeCombineXYZ')
+    links.new(group_input.outputs[0], set_position.inputs['Geometry'])
+    links.new(set_position.outputs['Geometry'], group_output.inputs[0])
+    links.new(combine.outputs[0], set_position.inputs['Offset'])
+    links.new(build_diamond(node_tree, width, depth).outputs[0], combine.inputs[0])
+    return node_tree
+
+
+def create_collections(root, depth: int, children: int) -> list:
+    """Creates a tree of collections below a root collection.
+
+    :param root: collection to add the tree to
+    :param depth: number of nested levels
+    :param children: child collections per collection
+    :return: the root and all created collections, breadth first.
+    """
+    import bpy
+
+    collections = [root]
+    level = [root]
+    for depth_idx in range(depth):
+        next_level = []
+        for parent in level:
+            for _ in range(children):
+                child = bpy.data.collections.new('Benchmark {}.{}'.format(depth_idx, len(next_level)))
+                parent.children.link(child)
+                next_level.append(child)
+        collections.extend(next_level)
+        level = next_level
+    return collections
+
+
+def generate_scene(object_count: int, args: argparse.Namespace) -> dict:
+    """Replaces the current scene's content with a generated one.
+
+    :param object_count: number of mesh objects in the view layer
+    :param args: scene parameters, see :data:`SCENE_PARAMS`.
+    :return: counts of the generated datablocks, and the triangles the mesh objects should have in total.
+    """
+    import bpy
+
+    clear_scene()
+    scene = bpy.context.scene
+
+    materials = [create_material('Benchmark Material {}'.format(idx), args.node_width, args.node_depth)
+                 for idx in range(args.materials)]
+    for idx in range(args.node_groups):
+        create_geometry_node_tree('Benchmark Nodes {}'.format(idx), args.node_width, args.node_depth)
+
+    mesh_count = args.shared_meshes or object_count
+    # with mixed polygons, every other mesh is mixed, so quads-only meshes are compared against them too
+    grid_faces = [get_grid_faces(args.grid), get_grid_faces(args.grid, mixed=args.polygons == 'mixed')]
+    mesh_tris = [count_subdivided_tris(faces, args.subdivisions) for faces in grid_faces]
+    meshes = [create_grid_mesh('Benchmark Mesh {}'.format(idx), grid_faces[idx % 2], args.grid)
+              for idx in range(mesh_count)]
+    for idx, mesh in enumerate(meshes):
+        if materials:
+            mesh.materials.append(materials[idx % len(materials)])
+
+    collections = create_collections(scene.collection, args.collection_depth, args.collection_children)
+    for idx in range(object_count):
+        obj = bpy.data.objects.new('Benchmark Object {}'.format(idx), meshes[idx % len(meshes)])
+        obj.location = (idx % 100 * args.grid, idx // 100 * args.grid, 0.0)
+        if args.subdivisions > 0:
+            obj.modifiers.new('Subdivision', 'SUBSURF').levels = args.subdivisions
+        collections[idx % len(collections)].objects.link(obj)
+
+    instanced = bpy.data.collections.new('Benchmark Instanced')
+    for idx in range(args.instanced_objects):
+        instanced.objects.link(bpy.data.objects.new('Benchmark Instanced {}'.format(idx), meshes[idx % len(meshes)]))
+    for idx in range(args.instancers if args.instanced_objects else 0):
+        instancer = bpy.data.objects.new('Benchmark Instancer {}'.format(idx), None)
+        instancer.instance_type = 'COLLECTION'
+        instancer.instance_collection = instanced
+        instancer.location = (idx % 100 * args.grid, -args.grid - idx // 100 * args.grid, 0.0)
+        scene.collection.objects.link(instancer)
+
+    bpy.context.view_layer.update()
+    bpy.context.evaluated_depsgraph_get()
+    return {
+        'objects': object_count,
+        'meshes': mesh_count,
+        'collections': len(collections) - 1,
+        'instancers': args.instancers if args.instanced_objects else 0,
+        'materials': args.materials,
+        'node_groups': args.node_groups,
+        'nodes_per_tree': get_diamond_node_count(args.node_width, args.node_depth),
+        'expected_tris': sum([mesh_tris[(idx % mesh_count) % 2] for idx in range(object_count)]),
+    }
+
+
+def time_operator(name: str, repeat: int) -> dict:
+    """Runs an operator several times, then once more while tracing Python allocations.
+
+    Tracing slows the operator down, so the traced run is not part of the timings.
+
+    :param name: operator name within ``bpy.ops.scene_analyzer``
+    :param repeat: number of timed runs
+    :return: median and fastest duration, peak traced Python memory and resident memory growth.
+    """
+    import bpy
+
+    operator = getattr(bpy.ops.scene_analyzer, name)
+    durations = []
+    gc.collect()
+    start_memory = get_resident_bytes()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operator()
+        durations.append(time.perf_counter() - start)
+    end_memory = get_resident_bytes()
+
+    tracemalloc.start()
+    operator()
+    _current, peak_python_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {'operator': name, 'median_seconds': statistics.median(durations), 'min_seconds': min(durations),
+              'peak_python_bytes': peak_python_bytes}
+    if start_memory is not None:
+        result['rss_growth_bytes'] = end_memory - start_memory
+    return result
+
+
+def check_results(scene: dict) -> list[str]:
+    """Cross-checks the refreshed stats against the generated scene.
+
+    :param scene: counts returned by :func:`generate_scene`
+    :return: description of each problem found
+    """
+    import bpy
+    from scene_complexity.operators.SA_OT_RefreshMeshes import find_tri_count_mismatches, get_mesh_totals
+
+    problems = ['{}: {} triangles counted with NumPy, {} without'.format(*mismatch)
+                for mismatch in find_tri_count_mismatches(bpy.data.meshes)]
+    # materials also use their principled BSDF, geometry node trees their set position and combine XYZ nodes
+    expected_nodes = {'sa_material_cache': scene['nodes_per_tree'] + 1,
+                      'sa_geometry_cache': scene['nodes_per_tree'] + 2}
+    for prop_name, expected in expected_nodes.items():
+        for item in getattr(bpy.context.window_manager, prop_name):
+            if item.name.startswith('Benchmark') and item.nodes_used != expected:
+                problems.append('{}: counted {} nodes, expected {}'.format(item.name, item.nodes_used, expected))
+    mesh_totals = get_mesh_totals()
+    counted_tris = sum([tris for tris, _verts in mesh_totals.values()])
+    if len(mesh_totals) != scene['objects'] or counted_tris != scene['expected_tris']:
+        problems.append('counted {} objects with {} triangles, expected {} objects with {} triangles'.format(
+            len(mesh_totals), counted_tris, scene['objects'], scene['expected_tris']))
+    return problems
+
+
+def check_large_node_tree(width: int, depth: int) -> dict:
+    """Walks a generated diamond node tree with thousands of nodes, checking its node count and per-tree cache.
+
+    The walk runs with a recursion limit below the diamond's longest path, so a recursive walk would fail.
+
+    :param width: nodes per layer of the diamond
+    :param depth: layers of the diamond
+    :return: node count, walk durations, and description of each problem found.
+    """
+    import bpy
+    from scene_complexity.operators.SA_OT_RefreshNodes import get_node_tree_used
+
+    node_tree = create_geometry_node_tree('Benchmark Large Diamond', width, depth)
+    expected = get_diamond_node_count(width, depth) + 2
+    result = {'expected_nodes': expected, 'problems': []}
+    node_group_cache = {}
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(CHECK_RECURSION_LIMIT)
+    try:
+        start = time.perf_counter()
+        used = get_node_tree_used(node_tree, node_group_cache)
+        result['walk_seconds'] = time.perf_counter() - start
+        start = time.perf_counter()
+        cached = get_node_tree_used(node_tree, node_group_cache)
+        result['cached_walk_seconds'] = time.perf_counter() - start
+    except RecursionError:
+        result['problems'].append('walking {} nodes raised RecursionError'.format(expected))
+        return result
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+        bpy.data.node_groups.remove(node_tree)
+
+    result['counted_nodes'] = len(used[0])
+    if len(used[0]) != expected:
+        result['problems'].append('counted {} nodes in the large diamond, expected {}'.format(len(used[0]), expected))
+    if cached is not used:
+        result['problems'].append('walking the large diamond again did not reuse the per-tree cache')
+    return result
+
+
+def run(args: argparse.Namespace) -> dict:
+    import bpy
+
+    window_manager = bpy.context.window_manager
+    window_manager.sa_apply_modifiers = True
+    window_manager.sa_disk_cache_location = 'NONE'
+
+    clear_scene()
+    node_tree_check = check_large_node_tree(args.large_node_width, args.large_node_depth)
+    runs = []
+    for object_count in args.objects:
+        start = time.perf_counter()
+        scene = generate_scene(object_count, args)
+        scene['generate_seconds'] = time.perf_counter() - start
+        results = [time_operator(name, args.repeat) for name in OPERATORS]
+        runs.append({'scene': scene, 'results': results, 'problems': check_results(scene)})
+
+    return {
+        'blender': bpy.app.version_string,
+        'params': {param: getattr(args, param) for param in SCENE_PARAMS},
+        'repeat': args.repeat,
+        'node_tree_check': node_tree_check,
+        'runs': runs,
+    }
+
+
+def compare(report: dict, baseline: dict, max_slowdown: float) -> list[str]:
+    """Compares the median durations of a report with a previous one.
+
+    :param report: report returned by :func:`run`
+    :param baseline: previous report
+    :param max_slowdown: highest allowed ratio of a duration to its baseline
+    :return: description of each operator slower than allowed
+    """
+    if report['params'] != baseline['params']:
+        print('Warning: scene parameters differ from the baseline, durations may not be comparable')
+
+    baseline_durations = {
+        (run['scene']['objects'], result['operator']): result['median_seconds']
+        for run in baseline['runs'] for result in run['results']
+    }
+    regressions = []
+    print('{:>8} {:<22} {:>12} {:>12} {:>8}'.format('objects', 'operator', 'baseline', 'current', 'ratio'))
+    for run in report['runs']:
+        for result in run['results']:
+            key = (run['scene']['objects'], result['operator'])
+            if key not in baseline_durations:
+                continue
+            ratio = result['median_seconds'] / max(baseline_durations[key], 1e-9)
+            print('{:>8} {:<22} {:>12.4f} {:>12.4f} {:>8.2f}'.format(key[0], key[1], baseline_durations[key],
+                                                                    result['median_seconds'], ratio))
+            if ratio > max_slowdown:
+                regressions.append('{} with {} objects is {:.2f}x slower'.format(key[1], key[0], ratio))
+    return regressions
+
+
+def print_report(report: dict):
+    node_tree_check = report['node_tree_check']
+    print('Large node tree: {} of {} nodes counted in {:.4f}s, {:.6f}s from cache'.format(
+        node_tree_check.get('counted_nodes', 'n/a'), node_tree_check['expected_nodes'],
+        node_tree_check.get('walk_seconds', float('nan')), node_tree_check.get('cached_walk_seconds', float('nan'))))
+    for problem in node_tree_check['problems']:
+        print('Problem with the large node tree: {}'.format(problem))
+    print('{:>8} {:<22} {:>12} {:>12} {:>16} {:>16}'.format('objects', 'operator', 'median s', 'min s',
+                                                            'peak py bytes', 'rss growth'))
+    for run in report['runs']:
+        for result in run['results']:
+            print('{:>8} {:<22} {:>12.4f} {:>12.4f} {:>16} {:>16}'.format(
+                run['scene']['objects'], result['operator'], result['median_seconds'], result['min_seconds'],
+                result['peak_python_bytes'], result.get('rss_growth_bytes', 'n/a')))
+        for problem in run['problems']:
+            print('Problem with {} objects: {}'.format(run['scene']['objects'], problem))
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='benchmark', description=__doc__.splitlines()[0])
+    parser.add_argument('--objects', type=int, nargs='+', default=[1000, 10000],
+                        help='numbers of mesh objects, one scene is generated for each')
+    parser.add_argument('--shared-meshes', type=int, default=0,
+                        help='number of meshes shared by all objects, 0 for a unique mesh per object')
+    parser.add_argument('--grid', type=int, default=10, help='vertices along each side of the grid meshes')
+    parser.add_argument('--polygons', choices=('quads', 'mixed'), default='mixed',
+                        help='make every other mesh of triangles, quads and n-gons, or all meshes of quads')
+    parser.add_argument('--subdivisions', type=int, default=1, help='subdivision modifier levels, 0 for none')
+    parser.add_argument('--collection-depth', type=int, default=3, help='nesting levels of collections')
+    parser.add_argument('--collection-children', type=int, default=3, help='child collections per collection')
+    parser.add_argument('--instancers', type=int, default=100, help='number of collection instancers')
+    parser.add_argument('--instanced-objects', type=int, default=10, help='objects in the instanced collection')
+    parser.add_argument('--materials', type=int, default=50, help='number of materials')
+    parser.add_argument('--node-groups', type=int, default=20, help='number of geometry node trees')
+    parser.add_argument('--node-width', type=int, default=8, help='nodes per layer of each node tree diamond')
+    parser.add_argument('--node-depth', type=int, default=8, help='layers of each node tree diamond')
+    parser.add_argument('--large-node-width', type=int, default=10,
+                        help='nodes per layer of the diamond checked for its node count and cache')
+    parser.add_argument('--large-node-depth', type=int, default=400,
+                        help='layers of the diamond checked for its node count and cache, '
+                             'deeper than the recursion limit of the check')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per operator')
+    parser.add_argument('--output', '-o', help='JSON file to write results to')
+    parser.add_argument('--compare', help='JSON file of a previous run to compare durations with')
+    parser.add_argument('--max-slowdown', type=float, default=1.25,
+                        help='highest allowed ratio of a duration to its baseline when comparing')
+    return parser.parse_args(get_script_args())
+
+
+def main():
+    args = parse_args()
+    import_addon()
+    report = run(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    exit_code = 0
+    if report['node_tree_check']['problems'] or any(run['problems'] for run in report['runs']):
+        exit_code = 1
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.max_slowdown)
+        for regression in regressions:
+            print('Regression: {}'.format(regression))
+        if regressions:
+            exit_code = 1
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
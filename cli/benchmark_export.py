@@ -0,0 +1,102 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Measures the time, file size and peak memory of exporting a large mesh table in each export format.
+
+Rows are synthetic, with the same fields as the mesh stats store, so Blender is not needed::
+
+    python cli/benchmark_export.py --rows 500000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from table_export import EXPORT_FORMATS, export_tables, read_columnar  # noqa: E402
+
+MESH_FIELDS = ['name', 'tris', 'verts', 'material_count', 'material_node_count', 'modifier_count',
+               'eval_time_median', 'eval_time_p95', 'screen_area', 'tris_per_pixel', 'memory_bytes']
+
+
+def iter_mesh_rows(rows: int) -> Iterator[tuple]:
+    """Generates synthetic mesh rows one at a time, so the table itself takes no memory."""
+    for idx in range(rows):
+        yield ('Object.{:06d}'.format(idx), idx * 12, idx * 7, 2, 24, 3,
+               0.0004 + idx * 1e-9, 0.0009 + idx * 1e-9, float(idx % 4096), idx / 4096,
+               # beyond float32 precision, as meshes of several hundred MB are
+               float(2 ** 28 + idx * 40 + 7))
+
+
+def measure(path: str, export_format: str, rows: int) -> dict:
+    """Exports the synthetic table twice, measuring its duration, then its output size and peak traced memory.
+
+    :param path: output file path, without extension
+    :param export_format: one of ``EXPORT_FORMATS``
+    :param rows: number of rows to export
+    """
+    filepath = path + EXPORT_FORMATS[export_format]
+    start = time.perf_counter()
+    row_count = export_tables(filepath, export_format, [('meshes', MESH_FIELDS, iter_mesh_rows(rows))])
+    duration = time.perf_counter() - start
+
+    # traced separately, as tracing slows the export down several times
+    tracemalloc.start()
+    export_tables(filepath, export_format, [('meshes', MESH_FIELDS, iter_mesh_rows(rows))])
+    _current, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if export_format == 'CSV':
+        filepath = path + '_meshes.csv'
+    return {'format': export_format, 'rows': row_count, 'seconds': duration,
+            'bytes_per_row': os.path.getsize(filepath) / rows, 'peak_memory': peak_memory, 'path': filepath}
+
+
+def check_columnar(filepath: str, rows: int):
+    """Reads a columnar export back, checking it matches the rows it was written from."""
+    with open(filepath, 'rb') as f:
+        for table_name, fields, read_rows in read_columnar(f):
+            assert table_name == 'meshes' and fields == MESH_FIELDS
+            read_count = 0
+            for expected, row in zip(iter_mesh_rows(rows), read_rows):
+                assert row == expected, (row, expected)
+                read_count += 1
+            assert read_count == rows
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='benchmark_export', description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000, help='number of rows to export')
+    parser.add_argument('--check', action='store_true', help='read the columnar export back and compare its rows')
+    args = parser.parse_args()
+
+    print('{:<10} {:>8} {:>10} {:>12} {:>14} {:>14}'.format('format', 'rows', 'seconds', 'us/row', 'bytes/row',
+                                                          'peak memory'))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for export_format in EXPORT_FORMATS:
+            result = measure(os.path.join(temp_dir, 'stats'), export_format, args.rows)
+            print('{:<10} {:>8} {:>10.3f} {:>12.2f} {:>14.1f} {:>14}'.format(
+                result['format'], result['rows'], result['seconds'], result['seconds'] / args.rows * 1e6,
+                result['bytes_per_row'], result['peak_memory']))
+            if args.check and export_format == 'COLUMNAR':
+                check_columnar(result['path'], args.rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Compares the time and memory per object of the mesh stats store against one PropertyGroup item per object.
+
+Fills both with synthetic rows, without any objects in the scene::
+
+    blender --background --factory-startup --python cli/benchmark_store.py -- --rows 10000 200000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from cli_util import get_resident_bytes, get_script_args, import_addon  # noqa: E402
+
+
+def measure(fill, rows: int) -> dict:
+    """Runs a fill function, measuring its duration and resident memory growth.
+
+    :param fill: function filling ``rows`` rows
+    :param rows: number of rows to fill
+    """
+    gc.collect()
+    start_memory = get_resident_bytes()
+    start = time.perf_counter()
+    fill(rows)
+    duration = time.perf_counter() - start
+    end_memory = get_resident_bytes()
+
+    result = {'rows': rows, 'seconds': duration, 'us_per_row': duration / rows * 1e6}
+    if start_memory is not None:
+        result['bytes_per_row'] = (end_memory - start_memory) / rows
+    return result
+
+
+def run(row_counts: list[int]) -> list[dict]:
+    import bpy
+    from scene_complexity.model.column_store import MESH_COLUMNS, ColumnStore
+
+    window_manager = bpy.context.window_manager
+    results = []
+    for rows in row_counts:
+        def fill_property_groups(count):
+            mesh_cache = window_manager.sa_mesh_cache
+            for idx in range(count):
+                item = mesh_cache.add()
+                item.name = 'Object.{:06d}'.format(idx)
+                item.tris = idx
+                item.verts = idx
+                item.material_count = 1
+                item.material_node_count = 10
+                item.modifier_count = 2
+
+        store = ColumnStore(MESH_COLUMNS)
+
+        def fill_store(count):
+            for idx in range(count):
+                row = store.add('Object.{:06d}'.format(idx))
+                store.set_row(row, tris=idx, verts=idx, material_count=1, material_node_count=10, modifier_count=2)
+
+        window_manager.sa_mesh_cache.clear()
+        results.append(dict(measure(fill_property_groups, rows), storage='PropertyGroup'))
+        window_manager.sa_mesh_cache.clear()
+
+        store_result = measure(fill_store, rows)
+        store_result['store_bytes_per_row'] = store.nbytes / rows
+        results.append(dict(store_result, storage='ColumnStore'))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='benchmark_store', description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000], help='numbers of rows to fill')
+    args = parser.parse_args(get_script_args())
+
+    import_addon()
+    print('{:<14} {:>8} {:>10} {:>12} {:>14} {:>16}'.format('storage', 'rows', 'seconds', 'us/row', 'rss bytes/row',
+                                                           'store bytes/row'))
+    for result in run(args.rows):
+        print('{:<14} {:>8} {:>10.3f} {:>12.2f} {:>14} {:>16}'.format(
+            result['storage'], result['rows'], result['seconds'], result['us_per_row'],
+            '{:.1f}'.format(result['bytes_per_row']) if 'bytes_per_row' in result else 'n/a',
+            '{:.1f}'.format(result['store_bytes_per_row']) if 'store_bytes_per_row' in result else ''))
+
+
+if __name__ == '__main__':
+    main()
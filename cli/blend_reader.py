@@ -0,0 +1,617 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Reads scene complexity stats straight from .blend files, without Blender.
+
+The file is memory-mapped and only the blocks needed for the stats are read, using the file's own SDNA
+(struct layout description) to find fields. Compressed files are first streamed into a temporary file.
+Image sizes are read from the headers of packed or external image files.
+Rows use the same fields as the add-on's caches, with mesh stats matching the "Apply modifiers" option disabled::
+
+    python cli/blend_reader.py scene.blend > stats.json
+"""
+
+import gzip
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+from typing import Iterator
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from image_header import estimate_texture_bytes, probe_image, probe_image_bytes  # noqa: E402
+
+NODE_PATTERNS_TO_SKIP = {'Reroute', 'GroupInput', 'GroupOutput', 'NodeOutput'}
+"""Node types not counted as used, matching the add-on's ``SA_OT_RefreshNodes``."""
+
+NODE_MUTED = 1 << 9
+"""``bNode.flag`` bit set on muted nodes."""
+
+OB_MESH = 1
+"""``Object.type`` of mesh objects."""
+
+IMA_SRC_FILE = 1
+IMA_SRC_GENERATED = 4
+IMA_SRC_TILED = 6
+"""``Image.source`` values of images whose size can be read."""
+
+IMA_GEN_FLOAT = 1
+"""``Image.gen_flag`` bit set on generated float images."""
+
+UNSIGNED_TYPES = {'uchar', 'ushort', 'uint', 'uint8_t', 'uint16_t', 'uint32_t', 'uint64_t'}
+"""SDNA integer types read as unsigned."""
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+_field_name_pattern = re.compile(r'^[*(]*(\w+)\)?(\(.*\))?((?:\[\d+\])*)$')
+
+_CORRUPT_DATA_ERRORS = (struct.error, UnicodeDecodeError, IndexError, KeyError, ValueError, EOFError)
+"""Errors raised when reading truncated or corrupt data, reported as a :class:`BlendFileError`."""
+
+
+class BlendFileError(Exception):
+    """Raised when a file is not a .blend file or uses an unsupported layout."""
+
+
+class Field:
+    """A field of an SDNA struct."""
+
+    def __init__(self, name: str, type_name: str, offset: int, size: int, pointer_depth: int, dims: list[int]):
+        self.name = name
+        self.type_name = type_name
+        self.offset = offset
+        self.size = size
+        self.pointer_depth = pointer_depth
+        self.dims = dims
+
+
+class Struct:
+    """An SDNA struct with its fields by name."""
+
+    def __init__(self, type_name: str, size: int):
+        self.type_name = type_name
+        self.size = size
+        self.fields: dict[str, Field] = {}
+
+
+class BlockHeader:
+    """Header of a file block, pointing at its data within the file."""
+    __slots__ = ('code', 'size', 'old_ptr', 'sdna_index', 'count', 'offset')
+
+    def __init__(self, code: bytes, size: int, old_ptr: int, sdna_index: int, count: int, offset: int):
+        self.code = code
+        self.size = size
+        self.old_ptr = old_ptr
+        self.sdna_index = sdna_index
+        self.count = count
+        self.offset = offset
+
+
+def _parse_field_name(name: str) -> tuple[str, int, list[int]]:
+    """Splits an SDNA field name such as ``*mat[4]`` into its identifier, pointer depth and array dimensions."""
+    match = _field_name_pattern.match(name)
+    if match is None:
+        raise BlendFileError('Unexpected SDNA field name {}'.format(name))
+    pointer_depth = len(name) - len(name.lstrip('*('))
+    if match.group(2) is not None:
+        pointer_depth = max(pointer_depth, 1)  # function pointer
+    dims = [int(d) for d in re.findall(r'\[(\d+)\]', match.group(3))]
+    return match.group(1), pointer_depth, dims
+
+
+def open_decompressed(path: str):
+    """Opens a .blend file for reading, streaming compressed files into a temporary file first.
+
+    :param path: path to the .blend file
+    :return: binary file object of the uncompressed file contents.
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+
+    if magic[:2] == GZIP_MAGIC:
+        stream = gzip.open(path, 'rb')
+    elif magic == ZSTD_MAGIC:
+        stream = _open_zstd(path)
+    else:
+        return open(path, 'rb')
+
+    decompressed = tempfile.TemporaryFile()
+    try:
+        with stream:
+            shutil.copyfileobj(stream, decompressed, 1024 * 1024)
+    except Exception as e:  # each decompressor raises its own errors on truncated or corrupt streams
+        decompressed.close()
+        raise BlendFileError('Could not decompress {}: {}'.format(path, e)) from e
+    decompressed.seek(0)
+    return decompressed
+
+
+def _open_zstd(path: str):
+    try:
+        from compression import zstd
+        return zstd.open(path, 'rb')
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise BlendFileError('Reading zstd-compressed files requires the zstandard module')
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+
+
+class BlendFile:
+    """Memory-mapped .blend file with its block index and SDNA.
+
+    :param path: path to the .blend file, optionally gzip- or zstd-compressed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open_decompressed(path)
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise BlendFileError('{} is empty'.format(path))
+        self.blocks: list[BlockHeader] = []
+        self.blocks_by_ptr: dict[int, BlockHeader] = {}
+        self.structs: list[Struct] = []
+        self.structs_by_name: dict[str, Struct] = {}
+        try:
+            self._read_header()
+            self._read_block_index()
+            self._read_sdna()
+        except _CORRUPT_DATA_ERRORS as e:
+            self.close()
+            raise BlendFileError('{} is truncated or corrupt: {}'.format(path, e)) from e
+        except BlendFileError:
+            self.close()
+            raise
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _read_header(self):
+        data = self._data
+        if data[:7] != b'BLENDER':
+            raise BlendFileError('{} is not a .blend file'.format(self.path))
+
+        if data[7:8] in (b'_', b'-'):
+            # legacy header: BLENDER, pointer size, endianness, 3-digit version
+            self.pointer_size = 4 if data[7:8] == b'_' else 8
+            self.endian = '<' if data[8:9] == b'v' else '>'
+            self.version = int(data[9:12])
+            self.header_size = 12
+            self.large_bhead = False
+        else:
+            # header since Blender 5.0: BLENDER, header size, pointer size, format version, endianness, version
+            self.header_size = int(data[7:9])
+            if data[9:10] != b'-':
+                raise BlendFileError('Unsupported pointer size in {}'.format(self.path))
+            self.pointer_size = 8
+            self.large_bhead = int(data[10:12]) >= 1
+            self.endian = '<' if data[12:13] == b'v' else '>'
+            self.version = int(data[13:17])
+
+        pointer_format = 'I' if self.pointer_size == 4 else 'Q'
+        self.pointer_format = self.endian + pointer_format
+        if self.large_bhead:
+            self._bhead = struct.Struct(self.endian + '4si' + pointer_format + 'qq')
+        else:
+            self._bhead = struct.Struct(self.endian + '4si' + pointer_format + 'ii')
+
+    def _read_block_index(self):
+        data = self._data
+        bhead = self._bhead
+        offset = self.header_size
+        end = len(data)
+        while offset + bhead.size <= end:
+            if self.large_bhead:
+                code, sdna_index, old_ptr, size, count = bhead.unpack_from(data, offset)
+            else:
+                code, size, old_ptr, sdna_index, count = bhead.unpack_from(data, offset)
+            offset += bhead.size
+            if code == b'ENDB':
+                break
+            block = BlockHeader(code.rstrip(b'\0'), size, old_ptr, sdna_index, count, offset)
+            self.blocks.append(block)
+            if old_ptr:
+                self.blocks_by_ptr[old_ptr] = block
+            offset += size
+
+    def _read_sdna(self):
+        dna_block = next((b for b in self.blocks if b.code == b'DNA1'), None)
+        if dna_block is None:
+            raise BlendFileError('{} has no SDNA block'.format(self.path))
+        data = self._data
+        offset = dna_block.offset
+        dna_end = dna_block.offset + dna_block.size
+        endian = self.endian
+
+        def expect(marker: bytes):
+            nonlocal offset
+            offset = dna_block.offset + ((offset - dna_block.offset + 3) & ~3)
+            if data[offset:offset + 4] != marker:
+                raise BlendFileError('Corrupt SDNA block in {}'.format(self.path))
+            offset += 4
+
+        def read_strings() -> list[str]:
+            nonlocal offset
+            count, = struct.unpack_from(endian + 'i', data, offset)
+            offset += 4
+            strings = []
+            for _ in range(count):
+                string_end = data.find(b'\0', offset, dna_end)
+                if string_end == -1:
+                    raise BlendFileError('Truncated SDNA block in {}'.format(self.path))
+                strings.append(data[offset:string_end].decode('ascii'))
+                offset = string_end + 1
+            return strings
+
+        expect(b'SDNA')
+        expect(b'NAME')
+        names = read_strings()
+        expect(b'TYPE')
+        types = read_strings()
+        expect(b'TLEN')
+        type_sizes = struct.unpack_from(endian + '{}h'.format(len(types)), data, offset)
+        offset += 2 * len(types)
+        expect(b'STRC')
+        struct_count, = struct.unpack_from(endian + 'i', data, offset)
+        offset += 4
+
+        for _ in range(struct_count):
+            type_index, field_count = struct.unpack_from(endian + 'hh', data, offset)
+            offset += 4
+            sdna_struct = Struct(types[type_index], type_sizes[type_index])
+            field_offset = 0
+            for _ in range(field_count):
+                field_type, field_name = struct.unpack_from(endian + 'hh', data, offset)
+                offset += 4
+                identifier, pointer_depth, dims = _parse_field_name(names[field_name])
+                item_size = self.pointer_size if pointer_depth else type_sizes[field_type]
+                size = item_size
+                for dim in dims:
+                    size *= dim
+                sdna_struct.fields[identifier] = Field(identifier, types[field_type], field_offset, size,
+                                                       pointer_depth, dims)
+                field_offset += size
+            self.structs.append(sdna_struct)
+            self.structs_by_name[sdna_struct.type_name] = sdna_struct
+
+    def iter_blocks(self, code: bytes) -> Iterator[BlockHeader]:
+        """Iterates over all blocks with the given code, such as ``b'ME'`` for meshes."""
+        return (block for block in self.blocks if block.code == code)
+
+    def get_struct(self, block: BlockHeader) -> Struct:
+        """Returns the SDNA struct describing a block's data."""
+        return self.structs[block.sdna_index]
+
+    def has_field(self, struct_name: str, field_name: str) -> bool:
+        sdna_struct = self.structs_by_name.get(struct_name)
+        return sdna_struct is not None and field_name in sdna_struct.fields
+
+    def _get_field(self, struct_name: str, field_name: str) -> Field:
+        try:
+            return self.structs_by_name[struct_name].fields[field_name]
+        except KeyError:
+            raise BlendFileError('{} has no field {}.{}'.format(self.path, struct_name, field_name))
+
+    def read_int(self, offset: int, struct_name: str, field_name: str) -> int:
+        """Reads an integer field of a struct starting at ``offset``, whatever its integer type."""
+        field = self._get_field(struct_name, field_name)
+        if field.pointer_depth:
+            return self.read_pointer(offset + field.offset)
+        item_size = field.size // _product(field.dims)
+        int_format = {1: 'b', 2: 'h', 4: 'i', 8: 'q'}[item_size]
+        if field.type_name in UNSIGNED_TYPES:
+            int_format = int_format.upper()
+        return struct.unpack_from(self.endian + int_format, self._data, offset + field.offset)[0]
+
+    def read_pointer(self, offset: int) -> int:
+        return struct.unpack_from(self.pointer_format, self._data, offset)[0]
+
+    def read_pointer_field(self, offset: int, struct_name: str, field_name: str) -> int:
+        return self.read_pointer(offset + self._get_field(struct_name, field_name).offset)
+
+    def read_string(self, offset: int, struct_name: str, field_name: str) -> str:
+        """Reads a null-terminated ``char`` array field of a struct starting at ``offset``."""
+        field = self._get_field(struct_name, field_name)
+        raw = self._data[offset + field.offset:offset + field.offset + field.size]
+        return raw.split(b'\0', 1)[0].decode('utf-8', errors='replace')
+
+    def read_id_name(self, block: BlockHeader) -> str:
+        """Returns the name of an ID block, without its two-letter type prefix."""
+        return self.read_string(block.offset, 'ID', 'name')[2:]
+
+    def read_pointer_array(self, ptr: int) -> list[int]:
+        """Reads the array of pointers stored in the block at old address ``ptr``."""
+        block = self.blocks_by_ptr.get(ptr)
+        if block is None:
+            return []
+        count = block.size // self.pointer_size
+        return [self.read_pointer(block.offset + i * self.pointer_size) for i in range(count)]
+
+    def read_bytes(self, ptr: int) -> bytes:
+        """Reads the raw data of the block at old address ``ptr``."""
+        block = self.blocks_by_ptr.get(ptr)
+        if block is None:
+            return b''
+        return self._data[block.offset:block.offset + block.size]
+
+    def iter_list(self, offset: int, struct_name: str, field_name: str) -> Iterator[BlockHeader]:
+        """Iterates over the blocks of a ``ListBase`` field, following each item's ``next`` pointer."""
+        ptr = self.read_pointer_field(offset, struct_name, field_name)
+        visited = set()
+        while ptr and ptr not in visited:
+            visited.add(ptr)
+            block = self.blocks_by_ptr.get(ptr)
+            if block is None:
+                break
+            yield block
+            ptr = self.read_pointer(block.offset)  # ``next`` is the first field of all linked list items
+
+
+def _product(values: list[int]) -> int:
+    result = 1
+    for value in values:
+        result *= value
+    return result
+
+
+def _first_field(blend: BlendFile, struct_name: str, *field_names: str) -> str:
+    """Returns the first of several names a field has had across Blender versions."""
+    for field_name in field_names:
+        if blend.has_field(struct_name, field_name):
+            return field_name
+    raise BlendFileError('{} has none of the fields {}.{}'.format(blend.path, struct_name, field_names))
+
+
+class NodeTreeReader:
+    """Counts nodes used by node trees, following the same rules as the add-on's ``get_nodes_used``."""
+
+    def __init__(self, blend: BlendFile):
+        self.blend = blend
+        self.group_cache: dict[int, tuple[frozenset, frozenset]] = {}
+
+    def _read_tree(self, tree_offset: int):
+        """Reads nodes and links of the tree starting at ``tree_offset``."""
+        blend = self.blend
+        nodes = {}
+        for node_block in blend.iter_list(tree_offset, 'bNodeTree', 'nodes'):
+            offset = node_block.offset
+            nodes[node_block.old_ptr] = (
+                blend.read_string(offset, 'bNode', 'idname'),
+                blend.read_int(offset, 'bNode', 'flag') & NODE_MUTED != 0,
+                blend.read_pointer_field(offset, 'bNode', 'id'),
+            )
+        input_links: dict[int, list[int]] = {}
+        for link_block in blend.iter_list(tree_offset, 'bNodeTree', 'links'):
+            from_node = blend.read_pointer_field(link_block.offset, 'bNodeLink', 'fromnode')
+            to_node = blend.read_pointer_field(link_block.offset, 'bNodeLink', 'tonode')
+            input_links.setdefault(to_node, []).append(from_node)
+        return nodes, input_links
+
+    def get_nodes_used(self, tree_ptr: int) -> tuple[frozenset, frozenset]:
+        """Returns the nodes used by a node tree and the images they reference.
+
+        :param tree_ptr: old address of the node tree block
+        :return: ``(node_ptrs, image_ptrs)``
+        """
+        if tree_ptr in self.group_cache:
+            return self.group_cache[tree_ptr]
+        self.group_cache[tree_ptr] = (frozenset(), frozenset())  # guards against recursive groups
+
+        tree_block = self.blend.blocks_by_ptr.get(tree_ptr)
+        if tree_block is None:
+            return self.group_cache[tree_ptr]
+        nodes, input_links = self._read_tree(tree_block.offset)
+
+        used_nodes = set()
+        images = set()
+        visited = set()
+        stack = [ptr for ptr, (idname, _, _) in nodes.items() if 'Output' in idname]
+        while stack:
+            node_ptr = stack.pop()
+            if node_ptr in visited or node_ptr not in nodes:
+                continue
+            visited.add(node_ptr)
+            idname, is_muted, id_ptr = nodes[node_ptr]
+            if not is_muted:
+                if idname.endswith('NodeGroup') or idname.endswith('NodeCustomGroup'):
+                    group_nodes, group_images = self.get_nodes_used(id_ptr) if id_ptr else ((), ())
+                    used_nodes.update(group_nodes)
+                    images.update(group_images)
+                elif not any(p in idname for p in NODE_PATTERNS_TO_SKIP):
+                    used_nodes.add(node_ptr)
+                    if idname == 'ShaderNodeTexImage' and id_ptr:
+                        images.add(id_ptr)
+            stack.extend(input_links.get(node_ptr, ()))
+
+        result = (frozenset(used_nodes), frozenset(images))
+        self.group_cache[tree_ptr] = result
+        return result
+
+
+def _read_file_image_headers(blend: BlendFile, offset: int, source: int) -> list:
+    """Reads the headers of a packed image, or of an image's files relative to the .blend file."""
+    packed_file = next(blend.iter_list(offset, 'Image', 'packedfiles'), None) \
+        if blend.has_field('Image', 'packedfiles') else None
+    if packed_file is not None:
+        packed_ptr = blend.read_pointer_field(packed_file.offset, 'ImagePackedFile', 'packedfile')
+        packed_block = blend.blocks_by_ptr.get(packed_ptr)
+        if packed_block is None:
+            return []
+        data = blend.read_bytes(blend.read_pointer_field(packed_block.offset, 'PackedFile', 'data'))
+        return [probe_image_bytes(data)]
+
+    filepath = blend.read_string(offset, 'Image', _first_field(blend, 'Image', 'filepath', 'name'))
+    if filepath.startswith('//'):
+        filepath = os.path.join(os.path.dirname(os.path.abspath(blend.path)), filepath[2:])
+    filepath = os.path.normpath(filepath.replace('\\', os.sep))
+    if source == IMA_SRC_TILED:
+        return [
+            probe_image(filepath.replace('<UDIM>', str(blend.read_int(tile.offset, 'ImageTile', 'tile_number'))))
+            for tile in blend.iter_list(offset, 'Image', 'tiles')
+        ]
+    return [probe_image(filepath)]
+
+
+def read_image_stats(blend: BlendFile, image_ptr: int) -> tuple[int, float]:
+    """Returns the largest dimension and estimated texture memory of an image, ``(0, 0.0)`` if unknown.
+
+    Generated image sizes are stored in the .blend file, other images are measured from their file headers.
+    Float images are assumed to use half precision, Blender's default.
+    """
+    block = blend.blocks_by_ptr.get(image_ptr)
+    if block is None:
+        return 0, 0.0
+    source = blend.read_int(block.offset, 'Image', 'source')
+    if source == IMA_SRC_GENERATED:
+        width = blend.read_int(block.offset, 'Image', 'gen_x')
+        height = blend.read_int(block.offset, 'Image', 'gen_y')
+        is_float = blend.read_int(block.offset, 'Image', 'gen_flag') & IMA_GEN_FLOAT != 0
+        return max(width, height), estimate_texture_bytes(width, height, 4, is_float, True)
+    if source not in (IMA_SRC_FILE, IMA_SRC_TILED):
+        return 0, 0.0
+
+    headers = [header for header in _read_file_image_headers(blend, block.offset, source) if header is not None]
+    return (
+        max((max(header.width, header.height) for header in headers), default=0),
+        sum(estimate_texture_bytes(header.width, header.height, header.channels, header.is_float, True)
+            for header in headers),
+    )
+
+
+def read_stats(path: str) -> dict:
+    """Reads mesh, material and geometry node stats of a .blend file.
+
+    :param path: path to the .blend file
+    :return: dictionary of ``meshes``, ``materials`` and ``geometry_nodes`` rows,
+        with the same fields as ``MeshObjectCache`` and ``NodeCache``.
+    :raises BlendFileError: if the file is not a .blend file, or is truncated or corrupt.
+    """
+    with BlendFile(path) as blend:
+        try:
+            return _read_blend_stats(blend)
+        except _CORRUPT_DATA_ERRORS as e:
+            raise BlendFileError('{} is truncated or corrupt: {}'.format(path, e)) from e
+
+
+def _read_blend_stats(blend: BlendFile) -> dict:
+    node_reader = NodeTreeReader(blend)
+
+    materials = {}
+    image_stats = {}
+    for block in blend.iter_blocks(b'MA'):
+        use_nodes = (blend.read_int(block.offset, 'Material', 'use_nodes')
+                     if blend.has_field('Material', 'use_nodes') else 1)
+        tree_ptr = blend.read_pointer_field(block.offset, 'Material', 'nodetree')
+        if not use_nodes or not tree_ptr:
+            continue
+        used_nodes, images = node_reader.get_nodes_used(tree_ptr)
+        texture_stats = [image_stats.setdefault(image, read_image_stats(blend, image)) for image in images]
+        materials[block.old_ptr] = {
+            'name': blend.read_id_name(block),
+            'nodes_used': len(used_nodes),
+            'max_texture_size': max((size for size, _memory in texture_stats), default=0),
+            'texture_memory': sum(memory for _size, memory in texture_stats),
+        }
+
+    geometry_nodes = []
+    for block in blend.iter_blocks(b'NT'):
+        if blend.read_string(block.offset, 'bNodeTree', 'idname') != 'GeometryNodeTree':
+            continue
+        used_nodes, _images = node_reader.get_nodes_used(block.old_ptr)
+        geometry_nodes.append({'name': blend.read_id_name(block), 'nodes_used': len(used_nodes)})
+
+    verts_field = _first_field(blend, 'Mesh', 'verts_num', 'totvert')
+    faces_field = _first_field(blend, 'Mesh', 'faces_num', 'totpoly')
+    loops_field = _first_field(blend, 'Mesh', 'corners_num', 'totloop')
+    meshes = {}
+    for block in blend.iter_blocks(b'ME'):
+        offset = block.offset
+        face_count = blend.read_int(offset, 'Mesh', faces_field)
+        meshes[block.old_ptr] = {
+            'verts': blend.read_int(offset, 'Mesh', verts_field),
+            'tris': blend.read_int(offset, 'Mesh', loops_field) - 2 * face_count,
+            'materials': blend.read_pointer_array(blend.read_pointer_field(offset, 'Mesh', 'mat'))
+            [:blend.read_int(offset, 'Mesh', 'totcol')],
+        }
+
+    mesh_objects = []
+    for block in blend.iter_blocks(b'OB'):
+        offset = block.offset
+        if blend.read_int(offset, 'Object', 'type') != OB_MESH:
+            continue
+        mesh = meshes.get(blend.read_pointer_field(offset, 'Object', 'data'))
+        if mesh is None:
+            continue
+
+        slot_count = blend.read_int(offset, 'Object', 'totcol')
+        object_materials = blend.read_pointer_array(blend.read_pointer_field(offset, 'Object', 'mat'))
+        matbits = blend.read_bytes(blend.read_pointer_field(offset, 'Object', 'matbits'))
+        slot_materials = []
+        for idx in range(slot_count):
+            if idx < len(matbits) and matbits[idx] and idx < len(object_materials):
+                slot_materials.append(object_materials[idx])
+            elif idx < len(mesh['materials']):
+                slot_materials.append(mesh['materials'][idx])
+        slot_materials = [m for m in slot_materials if m]
+
+        mesh_objects.append({
+            'name': blend.read_id_name(block),
+            'tris': mesh['tris'],
+            'verts': mesh['verts'],
+            'material_count': len(set(slot_materials)),
+            'material_node_count': sum(materials[m]['nodes_used'] for m in slot_materials if m in materials),
+            'modifier_count': sum(1 for _ in blend.iter_list(offset, 'Object', 'modifiers')),
+        })
+
+    return {
+        'file': blend.path,
+        'version': blend.version,
+        'meshes': mesh_objects,
+        'materials': list(materials.values()),
+        'texture_memory_total': sum(memory for _size, memory in image_stats.values()),
+        'geometry_nodes': geometry_nodes,
+    }
+
+
+def main():
+    if len(sys.argv) < 2:
+        print('usage: blend_reader.py FILE.blend [FILE.blend ...]', file=sys.stderr)
+        sys.exit(2)
+    for path in sys.argv[1:]:
+        try:
+            record = read_stats(path)
+        except (BlendFileError, OSError) as e:
+            record = {'file': path, 'error': str(e)}
+        print(json.dumps(record))
+
+
+if __name__ == '__main__':
+    main()
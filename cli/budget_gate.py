@@ -0,0 +1,123 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Checks a scene against complexity budgets and a baseline snapshot, exiting with a non-zero code on violations.
+
+Meant for publishing pipelines: the scene is analyzed by the same refresh operators as the panel,
+then its totals and rows are checked against the limits of a budget file and compared with a previous snapshot::
+
+    blender --background --factory-startup scene.blend --python cli/budget_gate.py -- \\
+        --budget budget.json --baseline published.json --write-snapshot current.json
+
+A snapshot written earlier can be checked again without Blender, by any Python 3 interpreter::
+
+    python cli/budget_gate.py --snapshot current.json --budget budget.json
+
+Exit codes are 0 if all checks passed, 1 on violations, and 2 if the checks could not run.
+See ``snapshot.py`` for the budget file format.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cli_util import get_script_args, import_addon  # noqa: E402
+from snapshot import build_snapshot, check_budgets, compare_snapshots, load_snapshot, save_snapshot  # noqa: E402
+
+
+def take_snapshot(apply_modifiers: bool = True) -> tuple[dict, list[dict]]:
+    """Runs all refresh operators on the open file and snapshots their tables.
+
+    :param apply_modifiers: whether mesh stats are based on evaluated meshes.
+    :return: the snapshot, and a violation for each item that failed to refresh, as its stats are missing.
+    """
+    import bpy
+
+    import_addon()
+    from scene_complexity.model import instrumentation
+    from scene_complexity.model.rows import get_scene_totals, iter_tables
+
+    window_manager = bpy.context.window_manager
+    window_manager.sa_apply_modifiers = apply_modifiers
+    bpy.ops.scene_analyzer.refresh_all()
+
+    snapshot = build_snapshot(iter_tables(window_manager), get_scene_totals(window_manager), bpy.data.filepath)
+    failures = [{'kind': 'failure', 'table': refresh_pass, 'name': item_name, 'field': '', 'value': error,
+                 'limit': None} for refresh_pass, item_name, error in instrumentation.get_failures()]
+    return snapshot, failures
+
+
+def format_violation(violation: dict) -> str:
+    if violation['kind'] == 'failure':
+        return 'FAILED     {table} "{name}": {value}'.format(**violation)
+    location = violation['table'] if not violation['name'] else '{table} "{name}"'.format(**violation)
+    return '{:<10} {} {}: {:g} > {:g}'.format(violation['kind'].upper(), location, violation['field'],
+                                               violation['value'], violation['limit'])
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='budget_gate', description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', help='JSON budget file of scene, collection, object and material limits')
+    parser.add_argument('--baseline', help='snapshot to compare with, e.g. of the last published version')
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='growth allowed since the baseline, as a fraction of each baseline value')
+    parser.add_argument('--snapshot', help='check this snapshot instead of analyzing the open file')
+    parser.add_argument('--write-snapshot', help='write the snapshot of the open file, e.g. to use as a baseline')
+    parser.add_argument('--report', help='write all violations to this JSON file')
+    parser.add_argument('--no-modifiers', action='store_true', help='count mesh stats without applying modifiers')
+    return parser.parse_args(get_script_args())
+
+
+def main():
+    args = parse_args()
+    if not args.snapshot:
+        try:
+            import bpy  # noqa: F401
+        except ImportError:
+            print('--snapshot is required when not running inside Blender', file=sys.stderr)
+            sys.exit(2)
+
+    try:
+        if args.snapshot:
+            snapshot, violations = load_snapshot(args.snapshot), []
+        else:
+            snapshot, violations = take_snapshot(not args.no_modifiers)
+        if args.write_snapshot:
+            save_snapshot(args.write_snapshot, snapshot)
+
+        if args.budget:
+            with open(args.budget, encoding='utf-8') as f:
+                violations.extend(check_budgets(snapshot, json.load(f)))
+        if args.baseline:
+            violations.extend(compare_snapshots(snapshot, load_snapshot(args.baseline), args.tolerance))
+    except (OSError, ValueError) as e:
+        print('Could not check budgets: {}'.format(e), file=sys.stderr)
+        sys.exit(2)
+
+    for violation in violations:
+        print(format_violation(violation))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'source': snapshot['source'], 'violations': violations}, f, indent=2)
+
+    print('{}: {} violations'.format(snapshot['source'] or 'snapshot', len(violations)), file=sys.stderr)
+    sys.exit(1 if violations else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Helpers shared by the command line scripts, which run outside of the add-on package."""
+
+import os
+import sys
+
+ADDON_MODULE = 'scene_complexity'
+"""Module name the add-on is imported as by :func:`import_addon`."""
+
+
+def get_script_args() -> list[str]:
+    """Returns command line arguments meant for the script, after Blender's ``--`` separator if present."""
+    if '--' in sys.argv:
+        return sys.argv[sys.argv.index('--') + 1:]
+    return sys.argv[1:]
+
+
+def import_addon():
+    """Imports and registers the add-on package containing the scripts, without it being installed.
+
+    :return: the add-on module.
+    """
+    import importlib.util
+
+    if ADDON_MODULE in sys.modules:
+        return sys.modules[ADDON_MODULE]
+
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    spec = importlib.util.spec_from_file_location(ADDON_MODULE, os.path.join(package_dir, '__init__.py'),
+                                                  submodule_search_locations=[package_dir])
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = addon
+    spec.loader.exec_module(addon)
+    addon.register()
+    return addon
+
+
+def get_resident_bytes() -> int | None:
+    """Returns the resident memory of this process in bytes, or ``None`` where it cannot be read cheaply."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
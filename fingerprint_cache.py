@@ -0,0 +1,149 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Persistent cache of analysis results, keyed by fingerprints of the data they were computed from.
+
+Keys are built from the content of datablocks and files (counts, checksums, structural hashes, file sizes and
+modification times), never from names alone, so an entry stays valid for as long as its key can be rebuilt,
+across sessions and even across files. Does not depend on ``bpy``, so it can also be used by the command line scripts.
+
+Entries are stored as JSON, oldest first. The cache holds at most ``max_entries`` entries,
+evicting the least recently used ones, and is written atomically so an interrupted save never leaves a partial file.
+Unreadable or corrupt files are treated as an empty cache and replaced on the next save.
+"""
+
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+CACHE_VERSION = 1
+"""Version of the file layout and key formats. Files of other versions are ignored."""
+
+DEFAULT_MAX_ENTRIES = 100000
+
+
+class FingerprintCache:
+    """Least recently used mapping of fingerprint keys to JSON values, loaded from and saved to a file.
+
+    :param path: path of the cache file, which does not need to exist yet.
+    :param max_entries: maximum number of entries kept, the least recently used are evicted first.
+    """
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max(max_entries, 0)
+        self.hits = 0
+        self.misses = 0
+        self.load_error: str | None = None
+        """Why the file could not be loaded, if it exists but is unreadable or corrupt."""
+        self._entries: OrderedDict[str, object] = OrderedDict()
+        self._is_dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self) -> 'FingerprintCache':
+        """Reads the cache file, starting empty if it is missing, unreadable, corrupt or of another version.
+
+        :return: this cache
+        """
+        self._entries.clear()
+        self._is_dirty = False
+        self.load_error = None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get('version') != CACHE_VERSION:
+                raise ValueError('unsupported cache version')
+            entries = data['entries']
+            if not isinstance(entries, list):
+                raise ValueError('entries are not a list')
+            for entry in entries:
+                if not isinstance(entry, list) or len(entry) != 2 or not isinstance(entry[0], str):
+                    raise ValueError('malformed entry')
+                self._entries[entry[0]] = entry[1]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:  # JSON and Unicode decode errors are value errors
+            self._entries.clear()
+            self.load_error = str(e)
+            self._is_dirty = True  # replace the corrupt file on the next save
+        self._evict()
+        return self
+
+    def get(self, key: str):
+        """Returns the value stored under a key, marking it as recently used.
+
+        :param key: fingerprint key
+        :return: stored value, or ``None`` if there is none.
+        """
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value):
+        """Stores a value under a key, evicting the least recently used entries if the cache is full.
+
+        :param key: fingerprint key
+        :param value: JSON serializable value, not ``None``.
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        self._is_dirty = True
+        self._evict()
+
+    def discard(self, key: str):
+        """Removes an entry, such as one whose value turned out to be malformed."""
+        if self._entries.pop(key, None) is not None:
+            self._is_dirty = True
+
+    def clear(self):
+        """Removes all entries, emptying the file on the next save."""
+        self._entries.clear()
+        self._is_dirty = True
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._is_dirty = True
+
+    def save(self) -> bool:
+        """Writes the cache file if any entry changed since it was loaded.
+
+        The file is written to a temporary file first and then moved over the previous one.
+
+        :return: ``False`` if the file could not be written.
+        """
+        if not self._is_dirty:
+            return True
+        directory = os.path.dirname(os.path.abspath(self.path))
+        temp_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(prefix='.sa_cache_', suffix='.tmp', dir=directory)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'entries': [[key, value] for key, value in self._entries.items()]},
+                          f, separators=(',', ':'))
+            os.replace(temp_path, self.path)
+        except (OSError, TypeError, ValueError):
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+        self._is_dirty = False
+        return True
@@ -0,0 +1,278 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Reads image dimensions and pixel formats from file headers, without decoding any pixels.
+
+Supports PNG, JPEG, OpenEXR, TIFF, Radiance HDR and Targa files. Does not depend on ``bpy``,
+so it can also be used by the command line scripts.
+"""
+
+import io
+import os
+import struct
+from typing import BinaryIO, NamedTuple
+
+HEADER_READ_SIZE = 64 * 1024
+"""Bytes read at once while looking for header fields."""
+
+MIPMAP_MEMORY_FACTOR = 4 / 3
+"""Memory of a texture with its full mipmap chain, relative to the texture alone."""
+
+
+class ImageHeader(NamedTuple):
+    """Size and pixel format of an image file."""
+    width: int
+    height: int
+    channels: int
+    bits_per_channel: int
+    is_float: bool
+
+
+_header_cache: dict[str, tuple[float, int, ImageHeader | None]] = {}
+"""Headers of probed files by path, along with the file's modification time and size when probed."""
+
+
+def _read_png(f: BinaryIO) -> ImageHeader | None:
+    data = f.read(26)
+    if len(data) < 26 or data[12:16] != b'IHDR':
+        return None
+    width, height, bit_depth, color_type = struct.unpack('>IIBB', data[16:26])
+    channels = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}.get(color_type, 4)
+    # Blender loads 16-bit PNGs into float buffers
+    return ImageHeader(width, height, channels, bit_depth, bit_depth > 8)
+
+
+def _read_jpeg(f: BinaryIO) -> ImageHeader | None:
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        while len(marker) == 2 and marker[1] == 0xFF:  # fill bytes
+            marker = marker[1:] + f.read(1)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:  # markers without segments
+            continue
+        length_data = f.read(2)
+        if len(length_data) < 2:
+            return None
+        length, = struct.unpack('>H', length_data)
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            segment = f.read(6)
+            if len(segment) < 6:
+                return None
+            precision, height, width, components = struct.unpack('>BHHB', segment)
+            return ImageHeader(width, height, components, precision, False)
+        f.seek(length - 2, io.SEEK_CUR)
+
+
+def _read_exr(f: BinaryIO) -> ImageHeader | None:
+    data = f.read(HEADER_READ_SIZE)
+    offset = 8  # magic number and version
+    data_window = None
+    channel_types = []
+    while offset < len(data):
+        name_end = data.find(b'\0', offset)
+        if name_end == -1:
+            return None
+        if name_end == offset:  # end of header
+            break
+        name = data[offset:name_end]
+        type_end = data.find(b'\0', name_end + 1)
+        if type_end == -1 or type_end + 4 > len(data):
+            return None
+        size, = struct.unpack_from('<i', data, type_end + 1)
+        value_offset = type_end + 5
+        if name == b'dataWindow':
+            data_window = struct.unpack_from('<iiii', data, value_offset)
+        elif name == b'channels':
+            channel_offset = value_offset
+            while data[channel_offset] != 0:
+                channel_offset = data.index(b'\0', channel_offset) + 1
+                pixel_type, = struct.unpack_from('<i', data, channel_offset)
+                channel_types.append(pixel_type)
+                channel_offset += 16  # pixel type, linear flag, reserved bytes, x and y sampling
+        offset = value_offset + size
+
+    if data_window is None:
+        return None
+    x_min, y_min, x_max, y_max = data_window
+    bits = 16 if channel_types and all(t == 1 for t in channel_types) else 32
+    return ImageHeader(x_max - x_min + 1, y_max - y_min + 1, len(channel_types) or 4, bits, True)
+
+
+def _read_tiff(f: BinaryIO) -> ImageHeader | None:
+    data = f.read(8)
+    endian = '<' if data[:2] == b'II' else '>'
+    if struct.unpack(endian + 'H', data[2:4])[0] != 42:
+        return None  # BigTIFF or not a TIFF
+    ifd_offset, = struct.unpack(endian + 'I', data[4:8])
+    f.seek(ifd_offset)
+    entry_count_data = f.read(2)
+    if len(entry_count_data) < 2:
+        return None
+    entry_count, = struct.unpack(endian + 'H', entry_count_data)
+    entries = f.read(12 * entry_count)
+
+    tags = {}
+    for idx in range(len(entries) // 12):
+        tag, field_type, count = struct.unpack_from(endian + 'HHI', entries, idx * 12)
+        item_format = endian + ('H' if field_type == 3 else 'I')
+        if count * struct.calcsize(item_format) <= 4:
+            value, = struct.unpack_from(item_format, entries, idx * 12 + 8)
+        else:
+            # the entry holds an offset to its values, all samples share the same value in practice
+            value_offset, = struct.unpack_from(endian + 'I', entries, idx * 12 + 8)
+            f.seek(value_offset)
+            value, = struct.unpack(item_format, f.read(struct.calcsize(item_format)))
+        tags[tag] = value
+
+    if 256 not in tags or 257 not in tags:
+        return None
+    bits = tags.get(258, 8)
+    return ImageHeader(tags[256], tags[257], tags.get(277, 1), bits, tags.get(339) == 3 or bits > 8)
+
+
+def _read_hdr(f: BinaryIO) -> ImageHeader | None:
+    data = f.read(HEADER_READ_SIZE)
+    lines = data.split(b'\n')
+    for idx, line in enumerate(lines):
+        if line.strip() == b'' and idx + 1 < len(lines):
+            parts = lines[idx + 1].split()
+            if len(parts) == 4 and parts[0][1:] == b'Y' and parts[2][1:] == b'X':
+                return ImageHeader(int(parts[3]), int(parts[1]), 3, 32, True)
+            return None
+    return None
+
+
+def _read_tga(f: BinaryIO) -> ImageHeader | None:
+    data = f.read(18)
+    if len(data) < 18:
+        return None
+    image_type = data[2]
+    if image_type not in (1, 2, 3, 9, 10, 11):
+        return None
+    width, height, bits_per_pixel = struct.unpack_from('<HHB', data, 12)
+    channels = {8: 1, 15: 3, 16: 3, 24: 3, 32: 4}.get(bits_per_pixel, 4)
+    return ImageHeader(width, height, channels, 8, False)
+
+
+def read_image_header(f: BinaryIO, extension: str = '') -> ImageHeader | None:
+    """Reads the header of an image file, identified by its magic number or, for Targa, its extension.
+
+    :param f: binary file object, positioned at the start of the image
+    :param extension: lowercase file extension, including the dot
+    :return: image header, or ``None`` if the format is not supported or the header is invalid.
+    """
+    start = f.tell()
+    magic = f.read(10)
+    f.seek(start)
+    try:
+        if magic.startswith(b'\x89PNG\r\n\x1a\n'):
+            return _read_png(f)
+        if magic.startswith(b'\xff\xd8'):
+            return _read_jpeg(f)
+        if magic.startswith(b'\x76\x2f\x31\x01'):
+            return _read_exr(f)
+        if magic[:4] in (b'II*\0', b'MM\0*'):
+            return _read_tiff(f)
+        if magic.startswith(b'#?'):
+            return _read_hdr(f)
+        if extension == '.tga':
+            return _read_tga(f)
+    except (struct.error, ValueError, IndexError, OSError):
+        return None
+    return None
+
+
+def get_file_key(path: str, stat: os.stat_result) -> str:
+    """Returns the persistent cache key of an image file's header, changing whenever the file is modified.
+
+    :param path: absolute path to the image file
+    :param stat: file status of the image file
+    """
+    return 'image:{}:{}:{}'.format(path, stat.st_mtime_ns, stat.st_size)
+
+
+def probe_image(path: str, disk_cache=None) -> ImageHeader | None:
+    """Reads the header of an image file, reusing the previous result if the file is unchanged.
+
+    :param path: absolute path to the image file
+    :param disk_cache: optional :class:`FingerprintCache` keeping headers across sessions.
+    :return: image header, or ``None`` if the file is missing, unsupported or invalid.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    cached = _header_cache.get(path)
+    if cached is not None and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+        return cached[2]
+
+    file_key = get_file_key(path, stat) if disk_cache is not None else None
+    if file_key is not None:
+        stored = disk_cache.get(file_key)
+        try:
+            header = ImageHeader(*stored) if stored is not None else None
+        except TypeError:
+            disk_cache.discard(file_key)
+            header = None
+        if header is not None:
+            _header_cache[path] = (stat.st_mtime, stat.st_size, header)
+            return header
+
+    try:
+        with open(path, 'rb') as f:
+            header = read_image_header(f, os.path.splitext(path)[1].lower())
+    except OSError:
+        header = None
+    _header_cache[path] = (stat.st_mtime, stat.st_size, header)
+    if file_key is not None and header is not None:
+        disk_cache.put(file_key, list(header))
+    return header
+
+
+def probe_image_bytes(data: bytes, extension: str = '') -> ImageHeader | None:
+    """Reads the header of an image held in memory, such as a packed file.
+
+    :param data: bytes of the image file
+    :param extension: lowercase file extension, including the dot
+    """
+    return read_image_header(io.BytesIO(data), extension)
+
+
+def estimate_texture_bytes(width: int, height: int, channels: int, is_float: bool, use_half_precision: bool) -> float:
+    """Estimates the GPU memory of an image texture, including its mipmaps.
+
+    Byte images are uploaded with 8 bits per channel and float images with 16 or 32 bits, depending on
+    their half precision setting. Color images are padded to four channels.
+
+    :param width: width of the image, or of one of its UDIM tiles
+    :param height: height of the image, or of one of its UDIM tiles
+    :param channels: number of channels in the image file or buffer
+    :param is_float: whether the image is loaded into a float buffer
+    :param use_half_precision: whether float images are uploaded with 16 bits per channel
+    """
+    if is_float:
+        bytes_per_channel = 2 if use_half_precision else 4
+    else:
+        bytes_per_channel = 1
+    channels = 4 if channels >= 3 else max(channels, 1)
+    return width * height * channels * bytes_per_channel * MIPMAP_MEMORY_FACTOR
+
+
+def clear_cache():
+    """Forgets all probed headers."""
+    _header_cache.clear()
@@ -0,0 +1,284 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import time
+
+import bpy
+from bpy.app.handlers import persistent
+
+from .operators.SA_OT_RefreshCollections import (CollectionTotals, count_collection_instances,
+                                                 fill_collection_cache_item, refresh_collection_cache)
+from .model import instrumentation
+from .model.column_store import mesh_stats
+from .model.generation import bump_cache_generation
+from .operators.SA_OT_RefreshMeshes import (fill_material_stats, fill_mesh_stats_row, get_mesh_totals,
+                                            refresh_mesh_window, update_mesh_memory_total)
+from .operators.step_util import run_steps
+from .operators.SA_OT_RefreshNodes import (fill_geometry_cache_item, fill_material_cache_item, get_scene_materials,
+                                           set_duplicate_counts)
+
+_dirty_objects = set()
+"""Names of mesh objects whose geometry changed since the last flush."""
+_dirty_materials = set()
+"""Names of materials whose node trees changed since the last flush."""
+_dirty_geometry_trees = set()
+"""Names of geometry node trees changed since the last flush."""
+_dirty_all_materials = False
+"""Set when a shared shader node group changed, as any material may use it."""
+_dirty_structure = False
+"""Set when objects or collections may have been added or removed."""
+_last_update_time = 0.0
+
+
+def _mark_dirty(depsgraph: bpy.types.Depsgraph):
+    """Records which cached datablocks were changed by a depsgraph update.
+
+    :param depsgraph: depsgraph passed to the update handler
+    """
+    global _dirty_all_materials, _dirty_structure
+    for update in depsgraph.updates:
+        id_data = update.id.original
+        if isinstance(id_data, bpy.types.Object):
+            if id_data.type == 'MESH' and update.is_updated_geometry:
+                _dirty_objects.add(id_data.name_full)
+        elif isinstance(id_data, bpy.types.Material):
+            _dirty_materials.add(id_data.name)
+        elif isinstance(id_data, bpy.types.NodeTree):
+            if id_data.bl_idname == 'GeometryNodeTree':
+                _dirty_geometry_trees.add(id_data.name)
+            elif not id_data.is_embedded_data:
+                _dirty_all_materials = True
+        elif isinstance(id_data, bpy.types.Collection):
+            _dirty_structure = True
+
+
+def _has_dirty_data() -> bool:
+    return bool(_dirty_objects or _dirty_materials or _dirty_geometry_trees or _dirty_all_materials or
+                _dirty_structure)
+
+
+def _clear_dirty_data():
+    global _dirty_all_materials, _dirty_structure
+    _dirty_objects.clear()
+    _dirty_materials.clear()
+    _dirty_geometry_trees.clear()
+    _dirty_all_materials = False
+    _dirty_structure = False
+
+
+def _update_nodes(window_manager: bpy.types.WindowManager, scene: bpy.types.Scene) -> set[str]:
+    """Updates cache entries of changed materials and geometry node trees.
+
+    :return: names of updated materials
+    """
+    node_group_cache = dict()
+    material_cache = window_manager.sa_material_cache
+    if _dirty_all_materials:
+        material_names = {m.name for m in material_cache}
+    else:
+        material_names = _dirty_materials
+
+    updated_materials = set()
+    for material_name in material_names:
+        material = bpy.data.materials.get(material_name)
+        idx = material_cache.find(material_name)
+        if material is None or not material.use_nodes:
+            if idx != -1:
+                material_cache.remove(idx)
+            continue
+        added = idx == -1
+        if added:
+            if material not in get_scene_materials(scene):
+                continue
+            material_cache_item = material_cache.add()
+        else:
+            material_cache_item = material_cache[idx]
+        try:
+            fill_material_cache_item(material_cache_item, material, node_group_cache)
+        except Exception as e:
+            instrumentation.record_failure(material_name, e)
+            if added:
+                material_cache.remove(len(material_cache) - 1)
+        updated_materials.add(material_name)
+
+    geometry_cache = window_manager.sa_geometry_cache
+    for tree_name in _dirty_geometry_trees:
+        node_tree = bpy.data.node_groups.get(tree_name)
+        idx = geometry_cache.find(tree_name)
+        if node_tree is None:
+            if idx != -1:
+                geometry_cache.remove(idx)
+            continue
+        added = idx == -1
+        try:
+            fill_geometry_cache_item(geometry_cache.add() if added else geometry_cache[idx], node_tree,
+                                     node_group_cache)
+        except Exception as e:
+            instrumentation.record_failure(tree_name, e)
+            if added:
+                geometry_cache.remove(len(geometry_cache) - 1)
+
+    if updated_materials:
+        set_duplicate_counts(material_cache)
+    if _dirty_geometry_trees:
+        set_duplicate_counts(geometry_cache)
+    return updated_materials
+
+
+def _update_meshes(window_manager: bpy.types.WindowManager, view_layer: bpy.types.ViewLayer,
+                   depsgraph: bpy.types.Depsgraph, updated_materials: set[str]) -> set[bpy.types.Collection]:
+    """Updates rows of changed mesh objects in the mesh stats store.
+
+    Objects only affected by changed materials keep their geometry stats, so they are not evaluated again.
+
+    :return: collections containing the updated objects
+    """
+    material_node_counts = {m.name: m.nodes_used for m in window_manager.sa_material_cache}
+    use_bmesh = window_manager.sa_apply_modifiers
+
+    material_object_names = set()
+    if updated_materials:
+        material_object_names = {
+            o.name_full
+            for o in view_layer.objects
+            if o.type == 'MESH' and any(s.material is not None and s.material.name in updated_materials
+                                        for s in o.material_slots)
+        }
+
+    mesh_memo = dict()
+    affected_collections = set()
+    for object_name in _dirty_objects | material_object_names:
+        obj = bpy.data.objects.get(object_name)
+        idx = mesh_stats.find(object_name)
+        if obj is None or obj.name not in view_layer.objects:
+            if idx != -1:
+                mesh_stats.remove(idx)
+            continue
+        added = idx == -1
+        if added:
+            idx = mesh_stats.add(object_name)
+        try:
+            if added or object_name in _dirty_objects:
+                fill_mesh_stats_row(mesh_stats, idx, obj, depsgraph, use_bmesh, material_node_counts, mesh_memo)
+            else:
+                fill_material_stats(mesh_stats, idx, obj, material_node_counts)
+        except Exception as e:
+            instrumentation.record_failure(obj.name, e)
+            if added:
+                mesh_stats.remove(idx)
+        affected_collections.update(obj.users_collection)
+
+    return affected_collections
+
+
+def _update_collections(window_manager: bpy.types.WindowManager, view_layer: bpy.types.ViewLayer,
+                        collections: set[bpy.types.Collection]):
+    """Recomputes triangle and vertex totals of cached collections from the mesh stats store.
+
+    Changes to one collection also change the recursive totals of its parents and the instanced totals of
+    collections instancing it, so all cached collections are updated in place, in one linear pass.
+    """
+    if not collections:
+        return
+    coll_cache = window_manager.sa_collection_cache
+    totals = CollectionTotals(get_mesh_totals())
+    instance_counts = count_collection_instances(view_layer.layer_collection.collection)
+    for coll_cache_item in coll_cache:
+        collection = bpy.data.collections.get(coll_cache_item.name)
+        if collection is not None:
+            fill_collection_cache_item(coll_cache_item, collection, totals, instance_counts)
+
+
+def _prune_removed_objects(view_layer: bpy.types.ViewLayer):
+    """Removes rows of objects no longer in the view layer from the mesh stats store."""
+    for idx in reversed(range(len(mesh_stats))):
+        obj = bpy.data.objects.get(mesh_stats.names[idx])
+        if obj is None or obj.name not in view_layer.objects:
+            mesh_stats.remove(idx)
+
+
+def flush_updates():
+    """Timer callback updating the cache entries marked dirty since the last flush.
+
+    Reschedules itself until no update has arrived for the window manager's live update delay.
+    """
+    window_manager = bpy.context.window_manager
+    remaining = _last_update_time + window_manager.sa_live_update_delay - time.monotonic()
+    if remaining > 0:
+        return remaining
+
+    if not window_manager.sa_live_update or not _has_dirty_data():
+        _clear_dirty_data()
+        return None
+
+    instrumentation.begin_pass('Live update')
+    try:
+        view_layer = bpy.context.view_layer
+        with instrumentation.stage('depsgraph evaluation'):
+            depsgraph = bpy.context.evaluated_depsgraph_get()
+        updated_materials = _update_nodes(window_manager, bpy.context.scene)
+        affected_collections = _update_meshes(window_manager, view_layer, depsgraph, updated_materials)
+
+        if _dirty_structure:
+            _prune_removed_objects(view_layer)
+            # called directly rather than through its operator, which would push an undo step on every flush
+            run_steps(refresh_collection_cache(bpy.context))
+        else:
+            _update_collections(window_manager, view_layer, affected_collections)
+        update_mesh_memory_total(window_manager, [o for o in view_layer.objects if o.type == 'MESH'])
+        refresh_mesh_window(window_manager)
+    except Exception as e:
+        # a failed flush must not stop later ones, so the error is only recorded in the refresh report
+        instrumentation.record_failure('live update', e)
+    finally:
+        bump_cache_generation()
+        _clear_dirty_data()
+    return None
+
+
+@persistent
+def on_depsgraph_update(scene: bpy.types.Scene, depsgraph: bpy.types.Depsgraph):
+    """Marks changed datablocks as dirty and schedules a debounced cache update."""
+    global _last_update_time
+    window_manager = bpy.context.window_manager
+    if window_manager is None or not window_manager.sa_live_update:
+        return
+
+    _mark_dirty(depsgraph)
+    if not _has_dirty_data():
+        return
+
+    _last_update_time = time.monotonic()
+    if not bpy.app.timers.is_registered(flush_updates):
+        bpy.app.timers.register(flush_updates, first_interval=window_manager.sa_live_update_delay)
+
+
+def toggle_live_update(window_manager: bpy.types.WindowManager, _context):
+    """Update callback of the live update property, adding or removing the depsgraph handler."""
+    handlers = bpy.app.handlers.depsgraph_update_post
+    if window_manager.sa_live_update:
+        if on_depsgraph_update not in handlers:
+            handlers.append(on_depsgraph_update)
+    else:
+        unregister()
+
+
+def unregister():
+    handlers = bpy.app.handlers.depsgraph_update_post
+    if on_depsgraph_update in handlers:
+        handlers.remove(on_depsgraph_update)
+    if bpy.app.timers.is_registered(flush_updates):
+        bpy.app.timers.unregister(flush_updates)
+    _clear_dirty_data()
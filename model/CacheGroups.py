@@ -17,7 +17,10 @@ import bpy
 
 
 class MeshObjectCache(bpy.types.PropertyGroup):
-    """Cache of objects and their sizes by triangles, vertices, materials and their nodes, and modifiers."""
+    """Cache of objects and their sizes by triangles, vertices, materials and their nodes, and modifiers.
+
+    Only holds the rows currently shown by the mesh table, copied from :data:`column_store.mesh_stats`.
+    """
     name: bpy.props.StringProperty(name="Mesh Object Name", default="")
 
     tris: bpy.props.IntProperty(default=0)
@@ -28,19 +31,67 @@ class MeshObjectCache(bpy.types.PropertyGroup):
 
     modifier_count: bpy.props.IntProperty(default=0)
 
+    # seconds to re-evaluate the object and its dependents, over repeated updates by the evaluation profiler
+    eval_time_median: bpy.props.FloatProperty(default=0.0)
+    eval_time_p95: bpy.props.FloatProperty(default=0.0)
+
+    # pixels covered by the bounding box in the scene camera's view, zero if outside of it
+    screen_area: bpy.props.FloatProperty(default=0.0)
+    tris_per_pixel: bpy.props.FloatProperty(default=0.0)
+
+    # estimated bytes of the object's mesh data, from its attributes, UV maps and shape keys
+    memory_bytes: bpy.props.FloatProperty(default=0.0)
+
+
+class ModifierCache(bpy.types.PropertyGroup):
+    """Cache of modifiers by their evaluation time, and the geometry they add to their object's mesh."""
+    name: bpy.props.StringProperty(name="Modifier", default="")  # object and modifier name, unique across the scene
+
+    object_name: bpy.props.StringProperty(default="")
+    modifier_name: bpy.props.StringProperty(default="")
+    modifier_type: bpy.props.StringProperty(default="")
+
+    execution_time: bpy.props.FloatProperty(default=0.0)  # seconds, of the last evaluation
+
+    # measured by evaluating the stack one modifier at a time, can be negative (e.g. Decimate)
+    is_measured: bpy.props.BoolProperty(default=False)
+    tris_added: bpy.props.IntProperty(default=0)
+    verts_added: bpy.props.IntProperty(default=0)
+
 
 class CollectionCache(bpy.types.PropertyGroup):
     """Cache of collections and their sizes by total triangles, vertices, and the number of times it's instanced."""
     name: bpy.props.StringProperty(name="Collection Name", default="")
 
-    total_tris: bpy.props.IntProperty(default=0)
+    total_tris: bpy.props.IntProperty(default=0)  # objects directly in the collection
     total_verts: bpy.props.IntProperty(default=0)
 
+    recursive_tris: bpy.props.IntProperty(default=0)  # objects in the collection and its children
+    recursive_verts: bpy.props.IntProperty(default=0)
+
+    # geometry drawn by all instances of the collection, can exceed the integer property range
+    instanced_tris: bpy.props.FloatProperty(default=0.0)
+    instanced_verts: bpy.props.FloatProperty(default=0.0)
+
     instance_count: bpy.props.IntProperty(default=0)  # all collection instances (recursive)
 
     is_visible: bpy.props.BoolProperty(default=True)
 
 
+class InstancerCache(bpy.types.PropertyGroup):
+    """Cache of objects instancing meshes, by the geometry drawn for all their instances
+    and the geometry of the unique meshes they instance."""
+    name: bpy.props.StringProperty(name="Instancer Name", default="")
+
+    instance_count: bpy.props.IntProperty(default=0)
+    unique_mesh_count: bpy.props.IntProperty(default=0)
+
+    # drawn geometry can exceed the integer property range on scatter systems
+    drawn_tris: bpy.props.FloatProperty(default=0.0)
+    drawn_verts: bpy.props.FloatProperty(default=0.0)
+    unique_tris: bpy.props.IntProperty(default=0)  # each instanced mesh counted once
+
+
 class NodeCache(bpy.types.PropertyGroup):
     """Cache of node trees and their sizes. Used for both material and geometry nodes."""
     name: bpy.props.StringProperty(name="Node Name", default="")
@@ -48,3 +99,39 @@ class NodeCache(bpy.types.PropertyGroup):
     nodes_used: bpy.props.IntProperty(default=0)
 
     max_texture_size: bpy.props.IntProperty(default=0)
+    texture_memory: bpy.props.FloatProperty(default=0.0)  # estimated bytes of all textures used, including mipmaps
+
+    fingerprint: bpy.props.StringProperty(default="")  # hash of node tree structure, equal for duplicated trees
+    duplicate_count: bpy.props.IntProperty(default=0)  # other node trees with the same fingerprint
+
+
+class TimelineFrameCache(bpy.types.PropertyGroup):
+    """Cache of sampled frames and the scene's complexity at each of them."""
+    name: bpy.props.StringProperty(name="Frame", default="")
+
+    frame: bpy.props.IntProperty(default=0)
+    tris: bpy.props.FloatProperty(default=0.0)  # mesh objects and their instances, can exceed the integer range
+    verts: bpy.props.FloatProperty(default=0.0)
+    instance_count: bpy.props.IntProperty(default=0)
+    eval_time: bpy.props.FloatProperty(default=0.0)  # seconds to evaluate the scene at this frame
+    recounted_objects: bpy.props.IntProperty(default=0)  # objects measured again, as they may change over time
+
+
+class SnapshotDiffCache(bpy.types.PropertyGroup):
+    """Cache of a value that changed between two snapshots, ranked by the diff table."""
+    name: bpy.props.StringProperty(name="Name", default="")
+
+    table: bpy.props.StringProperty(default="")  # table of the row, e.g. "meshes"
+    field: bpy.props.StringProperty(default="")
+    base_value: bpy.props.FloatProperty(default=0.0)
+    value: bpy.props.FloatProperty(default=0.0)
+
+
+class SnapshotChangeCache(bpy.types.PropertyGroup):
+    """Cache of a row added or removed between two snapshots."""
+    name: bpy.props.StringProperty(name="Name", default="")
+
+    table: bpy.props.StringProperty(default="")
+    is_added: bpy.props.BoolProperty(default=True)  # otherwise removed
+    field: bpy.props.StringProperty(default="")  # first diffed field of the table, e.g. "tris"
+    value: bpy.props.FloatProperty(default=0.0)  # in the snapshot the row is part of
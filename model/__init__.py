@@ -6,12 +6,33 @@ from .. import unregister_all
 from .CacheGroups import MeshObjectCache
 from .CacheGroups import CollectionCache
 from .CacheGroups import NodeCache
+from .CacheGroups import InstancerCache
+from .CacheGroups import ModifierCache
+from .CacheGroups import TimelineFrameCache
+from .CacheGroups import SnapshotDiffCache
+from .CacheGroups import SnapshotChangeCache
+from . import snapshots
+from .column_store import mesh_stats
 
-_register_order = (MeshObjectCache, CollectionCache, NodeCache)
+_register_order = (MeshObjectCache, ModifierCache, CollectionCache, NodeCache, InstancerCache, TimelineFrameCache,
+                   SnapshotDiffCache, SnapshotChangeCache)
 _register_props = (('sa_mesh_cache', bpy.props.CollectionProperty(type=MeshObjectCache, options={'SKIP_SAVE'})),
+                   ('sa_modifier_cache', bpy.props.CollectionProperty(type=ModifierCache, options={'SKIP_SAVE'})),
                    ('sa_collection_cache', bpy.props.CollectionProperty(type=CollectionCache, options={'SKIP_SAVE'})),
                    ('sa_material_cache', bpy.props.CollectionProperty(type=NodeCache, options={'SKIP_SAVE'})),
-                   ('sa_geometry_cache', bpy.props.CollectionProperty(type=NodeCache, options={'SKIP_SAVE'})))
+                   ('sa_geometry_cache', bpy.props.CollectionProperty(type=NodeCache, options={'SKIP_SAVE'})),
+                   ('sa_instancer_cache', bpy.props.CollectionProperty(type=InstancerCache, options={'SKIP_SAVE'})),
+                   ('sa_instanced_tris_total', bpy.props.FloatProperty(default=0.0, options={'SKIP_SAVE'})),
+                   ('sa_instanced_unique_tris_total', bpy.props.FloatProperty(default=0.0, options={'SKIP_SAVE'})),
+                   ('sa_timeline_cache', bpy.props.CollectionProperty(type=TimelineFrameCache,
+                                                                      options={'SKIP_SAVE'})),
+                   ('sa_timeline_peak_frame', bpy.props.IntProperty(default=0, options={'SKIP_SAVE'})),
+                   ('sa_texture_memory_total', bpy.props.FloatProperty(default=0.0, options={'SKIP_SAVE'})),
+                   ('sa_mesh_memory_total', bpy.props.FloatProperty(default=0.0, options={'SKIP_SAVE'})),
+                   ('sa_snapshot_diff_cache', bpy.props.CollectionProperty(type=SnapshotDiffCache,
+                                                                           options={'SKIP_SAVE'})),
+                   ('sa_snapshot_change_cache', bpy.props.CollectionProperty(type=SnapshotChangeCache,
+                                                                             options={'SKIP_SAVE'})))
 
 
 def register():
@@ -19,4 +40,6 @@ def register():
 
 
 def unregister():
+    snapshots.clear()
+    mesh_stats.clear()
     unregister_all(_register_order[::-1])
@@ -0,0 +1,188 @@
+"""Columnar storage of per-object stats, one NumPy array per metric.
+
+Storing large tables as ``PropertyGroup`` items allocates an RNA struct and name string per row.
+A :class:`ColumnStore` keeps each metric in a contiguous array and each name once in an interned table,
+so only the rows shown by the interface are copied into ``PropertyGroup`` items.
+"""
+
+import sys
+from fnmatch import fnmatchcase
+from typing import Iterator
+
+import numpy as np
+
+INITIAL_CAPACITY = 1024
+"""Rows allocated by an empty store, doubled whenever the store is full."""
+
+ITER_CHUNK_ROWS = 16384
+"""Rows converted to Python values at once when iterating over a store."""
+
+
+class ColumnStore:
+    """Table of named rows, with one fixed-width NumPy array per column.
+
+    Rows are addressed by index, which stays valid until a row is removed.
+    :attr:`generation` increases on every change, so derived data (such as sorted orders) can tell when it is stale.
+
+    :param columns: NumPy data type of each column, by column name.
+    """
+
+    def __init__(self, columns: dict[str, str]):
+        self.columns = list(columns)
+        self.names: list[str] = []
+        self.generation = 0
+        self._rows: dict[str, int] = {}
+        self._arrays = {column: np.zeros(INITIAL_CAPACITY, dtype=dtype) for column, dtype in columns.items()}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def fields(self) -> list[str]:
+        """Names of all fields of a row, starting with its name."""
+        return ['name'] + self.columns
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the store's arrays, name table and name index, in bytes."""
+        array_bytes = sum([array.nbytes for array in self._arrays.values()])
+        name_bytes = sys.getsizeof(self.names) + sum([sys.getsizeof(name) for name in self.names])
+        return array_bytes + name_bytes + sys.getsizeof(self._rows)
+
+    def clear(self):
+        """Removes all rows, keeping the allocated arrays for the next refresh."""
+        self.names.clear()
+        self._rows.clear()
+        self.generation += 1
+
+    def find(self, name: str) -> int:
+        """Returns the index of a row by name, or ``-1`` if there is none, like ``bpy_prop_collection.find``."""
+        return self._rows.get(name, -1)
+
+    def add(self, name: str) -> int:
+        """Appends a row with all columns set to zero.
+
+        :param name: unique row name
+        :return: index of the new row
+        """
+        idx = len(self.names)
+        if idx == len(self._arrays[self.columns[0]]):
+            for column, array in self._arrays.items():
+                grown = np.zeros(idx * 2, dtype=array.dtype)
+                grown[:idx] = array
+                self._arrays[column] = grown
+        else:
+            for array in self._arrays.values():
+                array[idx] = 0
+
+        name = sys.intern(name)
+        self.names.append(name)
+        self._rows[name] = idx
+        self.generation += 1
+        return idx
+
+    def set_row(self, idx: int, **values):
+        """Writes column values of a row.
+
+        :param idx: row index
+        :param values: values by column name, columns not given are left unchanged.
+        """
+        for column, value in values.items():
+            self._arrays[column][idx] = value
+        self.generation += 1
+
+    def set_column(self, column: str, rows: np.ndarray, values: np.ndarray):
+        """Writes values of a column for many rows at once.
+
+        :param column: column name
+        :param rows: row indices
+        :param values: one value per row index
+        """
+        self._arrays[column][rows] = values
+        self.generation += 1
+
+    def get(self, idx: int, column: str):
+        """Returns a single value of a row as a Python scalar."""
+        if column == 'name':
+            return self.names[idx]
+        return self._arrays[column][idx].item()
+
+    def remove(self, idx: int):
+        """Removes a row by moving the last row into its place, so removal does not shift other rows.
+
+        :param idx: index of the row to remove
+        """
+        last = len(self.names) - 1
+        del self._rows[self.names[idx]]
+        if idx != last:
+            last_name = self.names[last]
+            self.names[idx] = last_name
+            self._rows[last_name] = idx
+            for array in self._arrays.values():
+                array[idx] = array[last]
+        self.names.pop()
+        self.generation += 1
+
+    def column(self, column: str) -> np.ndarray:
+        """Returns a read-only view of a column's values, one per row."""
+        view = self._arrays[column][:len(self.names)]
+        view.flags.writeable = False
+        return view
+
+    def iter_rows(self, fields: list[str] = None) -> Iterator[tuple]:
+        """Iterates over rows as tuples of Python values, one row at a time.
+
+        Columns are converted to Python values :data:`ITER_CHUNK_ROWS` rows at a time,
+        so iterating a large store never holds a full copy of it.
+
+        :param fields: fields to read, defaults to :attr:`fields`.
+        """
+        fields = self.fields if fields is None else fields
+        for start in range(0, len(self.names), ITER_CHUNK_ROWS):
+            end = start + ITER_CHUNK_ROWS
+            values = [self.names[start:end] if field == 'name' else self.column(field)[start:end].tolist()
+                      for field in fields]
+            yield from zip(*values)
+
+    def sorted_indices(self, column: str, descending: bool = False, name_filter: str = '') -> np.ndarray:
+        """Returns row indices sorted by a column, optionally keeping only rows whose name matches a filter.
+
+        :param column: field to sort by, names are sorted case-insensitively.
+        :param descending: whether to sort from the largest value
+        :param name_filter: case-insensitive substring or wildcard pattern names must match, like UI list filters.
+        """
+        if name_filter:
+            pattern = name_filter.lower()
+            if '*' not in pattern:
+                pattern = '*{}*'.format(pattern)
+            indices = np.array([idx for idx, name in enumerate(self.names) if fnmatchcase(name.lower(), pattern)],
+                               dtype=np.int64)
+        else:
+            indices = np.arange(len(self.names), dtype=np.int64)
+
+        if column == 'name':
+            names = [self.names[idx].lower() for idx in indices.tolist()]
+            order = sorted(range(len(names)), key=names.__getitem__, reverse=descending)
+            return indices[np.array(order, dtype=np.int64)]
+
+        values = self.column(column)[indices]
+        order = np.argsort(-values if descending else values, kind='stable')
+        return indices[order]
+
+
+MESH_COLUMNS = {
+    'tris': 'int32',
+    'verts': 'int32',
+    'material_count': 'int32',
+    'material_node_count': 'int32',
+    'modifier_count': 'int32',
+    'eval_time_median': 'float32',
+    'eval_time_p95': 'float32',
+    'screen_area': 'float32',
+    'tris_per_pixel': 'float32',
+    'memory_bytes': 'float64',
+}
+"""Columns of the mesh stats store, matching the fields of :class:`MeshObjectCache`."""
+
+mesh_stats = ColumnStore(MESH_COLUMNS)
+"""Stats of all analyzed mesh objects, by object name."""
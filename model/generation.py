@@ -0,0 +1,18 @@
+"""Counter of changes to the scene analyzer caches.
+
+Data derived from the caches, such as the filtered and sorted rows of UI lists, store the generation they were
+computed for and are recomputed once it changes.
+"""
+
+_cache_generation = 0
+
+
+def get_cache_generation() -> int:
+    """Returns the current cache generation."""
+    return _cache_generation
+
+
+def bump_cache_generation():
+    """Marks all data derived from the caches as stale. Call after adding, removing or changing cache entries."""
+    global _cache_generation
+    _cache_generation += 1
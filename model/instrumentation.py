@@ -0,0 +1,140 @@
+"""Per-stage timing of the refresh passes, and errors of items that failed to refresh.
+
+Each refresh pass (nodes, meshes, collections, etc.) calls :func:`begin_pass`, which clears what was recorded for it
+by its previous run. Within a pass, hot paths are wrapped in :func:`stage` blocks, recording their wall time,
+number of calls and number of items processed. While instrumentation is disabled, :func:`stage` returns a shared
+no-op context manager, so instrumented code only pays for a function call and a flag check.
+
+Failures are recorded whether instrumentation is enabled or not, so they can be reported alongside the timings.
+"""
+
+import time
+
+_enabled = False
+_current_pass = ''
+_stages: dict[tuple[str, str], 'StageStats'] = {}
+_failures: list[tuple[str, str, str]] = []
+
+
+class StageStats:
+    """Totals of one stage of a refresh pass."""
+    __slots__ = ('refresh_pass', 'name', 'calls', 'items', 'seconds')
+
+    def __init__(self, refresh_pass: str, name: str):
+        self.refresh_pass = refresh_pass
+        self.name = name
+        self.calls = 0
+        self.items = 0
+        self.seconds = 0.0
+
+
+class _Stage:
+    __slots__ = ('stats', 'items', 'start')
+
+    def __init__(self, stats: StageStats, items: int):
+        self.stats = stats
+        self.items = items
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        stats = self.stats
+        stats.seconds += time.perf_counter() - self.start
+        stats.calls += 1
+        stats.items += self.items
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    # accepts item counts only known once a stage has run, like _Stage
+    items = property(lambda self: 0, lambda self, value: None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def is_enabled() -> bool:
+    """Returns whether stages are timed."""
+    return _enabled
+
+
+def set_enabled(enabled: bool):
+    """Turns timing of stages on or off. Failures are always recorded."""
+    global _enabled
+    _enabled = enabled
+
+
+def begin_pass(refresh_pass: str):
+    """Starts recording a refresh pass, forgetting its stages and failures from its previous run.
+
+    :param refresh_pass: pass name shown in the report, such as ``'Meshes'``.
+    """
+    global _current_pass
+    _current_pass = refresh_pass
+    for key in [key for key in _stages if key[0] == refresh_pass]:
+        del _stages[key]
+    _failures[:] = [failure for failure in _failures if failure[0] != refresh_pass]
+
+
+def stage(name: str, items: int = 1):
+    """Returns a context manager timing a stage of the current refresh pass.
+
+    Item counts only known once the stage has run can be set on the context manager's ``items`` attribute.
+
+    :param name: stage name, such as ``'count triangles'``.
+    :param items: number of objects, nodes or rows processed by this call.
+    """
+    if not _enabled:
+        return _NO_STAGE
+    key = (_current_pass, name)
+    stats = _stages.get(key)
+    if stats is None:
+        stats = _stages[key] = StageStats(_current_pass, name)
+    return _Stage(stats, items)
+
+
+def record_failure(item_name: str, error: Exception | str):
+    """Records an item of the current refresh pass that failed to refresh.
+
+    :param item_name: name of the object, node tree, etc.
+    :param error: raised exception or error message
+    """
+    _failures.append((_current_pass, item_name, str(error)))
+
+
+def get_failures(refresh_pass: str = None) -> list[tuple[str, str, str]]:
+    """Returns ``(refresh_pass, item_name, error)`` of each recorded failure, optionally of a single pass."""
+    return [failure for failure in _failures if refresh_pass is None or failure[0] == refresh_pass]
+
+
+def get_stages() -> list[StageStats]:
+    """Returns the recorded stages, in the order they first ran."""
+    return list(_stages.values())
+
+
+def get_report() -> dict:
+    """Returns the recorded stages and failures as JSON serializable data."""
+    return {
+        'enabled': _enabled,
+        'stages': [{'pass': stats.refresh_pass, 'stage': stats.name, 'calls': stats.calls, 'items': stats.items,
+                    'seconds': stats.seconds} for stats in _stages.values()],
+        'failures': [{'pass': refresh_pass, 'name': item_name, 'error': error}
+                     for refresh_pass, item_name, error in _failures],
+    }
+
+
+def clear():
+    """Forgets all recorded stages and failures."""
+    _stages.clear()
+    _failures.clear()
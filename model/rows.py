@@ -0,0 +1,81 @@
+from typing import Iterator
+
+import bpy
+
+from .CacheGroups import CollectionCache, InstancerCache, ModifierCache, NodeCache, TimelineFrameCache
+from .column_store import mesh_stats
+
+STORES = (('meshes', mesh_stats),)
+"""Each column store as ``(table_name, store)``."""
+
+CACHES = (('modifiers', 'sa_modifier_cache', ModifierCache),
+          ('collections', 'sa_collection_cache', CollectionCache),
+          ('materials', 'sa_material_cache', NodeCache),
+          ('geometry_nodes', 'sa_geometry_cache', NodeCache),
+          ('instancers', 'sa_instancer_cache', InstancerCache),
+          ('timeline', 'sa_timeline_cache', TimelineFrameCache))
+"""Each cache as ``(table_name, window_manager_property, cache_type)``."""
+
+SKIPPED_PROPERTIES = {'rna_type'}
+"""Properties of cache entries that are not part of their stats."""
+
+
+def get_cache_fields(cache_type: type[bpy.types.PropertyGroup]) -> list[str]:
+    """Returns the property names of a cache entry type, starting with its name.
+
+    :param cache_type: cache ``PropertyGroup`` class, such as :class:`CollectionCache`.
+    """
+    return [prop.identifier for prop in cache_type.bl_rna.properties if prop.identifier not in SKIPPED_PROPERTIES]
+
+
+def iter_cache_rows(cache: bpy.types.bpy_prop_collection, fields: list[str]) -> Iterator[tuple]:
+    """Iterates over cache entries as tuples of their values, one entry at a time.
+
+    :param cache: window manager cache collection, such as ``sa_collection_cache``.
+    :param fields: property names to read, see :func:`get_cache_fields`.
+    """
+    for item in cache:
+        yield tuple(getattr(item, field) for field in fields)
+
+
+def iter_cache_dicts(cache: bpy.types.bpy_prop_collection, fields: list[str]) -> Iterator[dict]:
+    """Iterates over cache entries as dictionaries of their values, one entry at a time.
+
+    :param cache: window manager cache collection, such as ``sa_collection_cache``.
+    :param fields: property names to read, see :func:`get_cache_fields`.
+    """
+    for row in iter_cache_rows(cache, fields):
+        yield dict(zip(fields, row))
+
+
+def iter_tables(window_manager: bpy.types.WindowManager) -> Iterator[tuple[str, list[str], Iterator[tuple]]]:
+    """Iterates over all tables, from column stores and window manager caches alike.
+
+    :param window_manager: window manager holding the caches
+    :return: generator of ``(table_name, fields, rows)``, where rows are tuples of values in field order.
+    """
+    for table_name, store in STORES:
+        yield table_name, store.fields, store.iter_rows()
+    for table_name, prop_name, cache_type in CACHES:
+        fields = get_cache_fields(cache_type)
+        yield table_name, fields, iter_cache_rows(getattr(window_manager, prop_name), fields)
+
+
+def get_scene_totals(window_manager: bpy.types.WindowManager) -> dict:
+    """Returns scene-wide totals of all tables, as used by batch records and budget checks.
+
+    :param window_manager: window manager holding the caches
+    :return: totals by name, counting each object's stats once and instanced triangles separately.
+    """
+    return {
+        'objects': len(mesh_stats),
+        'tris': int(mesh_stats.column('tris').sum(dtype='int64')),
+        'verts': int(mesh_stats.column('verts').sum(dtype='int64')),
+        'mesh_memory': window_manager.sa_mesh_memory_total,
+        'materials': len(window_manager.sa_material_cache),
+        'material_nodes': sum([item.nodes_used for item in window_manager.sa_material_cache]),
+        'texture_memory': window_manager.sa_texture_memory_total,
+        'geometry_node_trees': len(window_manager.sa_geometry_cache),
+        'geometry_nodes': sum([item.nodes_used for item in window_manager.sa_geometry_cache]),
+        'instanced_tris': window_manager.sa_instanced_tris_total,
+    }
@@ -0,0 +1,61 @@
+"""Named snapshots of the stats tables, kept in memory for the session, and the last diff between two of them.
+
+Snapshots are packed by :func:`snapshot.pack_tables`, so they only hold the fields compared by diffs.
+"""
+
+CURRENT_TABLES = '__CURRENT__'
+"""Snapshot name standing for the tables as they are now, packed whenever a diff is computed."""
+
+_snapshots: dict[str, dict] = {}
+_enum_items: list[tuple[str, str, str]] = []  # Blender requires dynamic enum items to be referenced from Python
+_diff: tuple[list[tuple], list[tuple], list[tuple]] | None = None
+_diff_totals: list[tuple[str, float, float]] = []
+
+
+def add_snapshot(name: str, packed_snapshot: dict):
+    """Stores a packed snapshot, replacing any snapshot of the same name."""
+    _snapshots[name] = packed_snapshot
+
+
+def get_snapshot(name: str) -> dict | None:
+    return _snapshots.get(name)
+
+
+def remove_snapshot(name: str):
+    _snapshots.pop(name, None)
+
+
+def get_snapshot_names() -> list[str]:
+    return list(_snapshots)
+
+
+def get_snapshot_items(_self, _context) -> list[tuple[str, str, str]]:
+    """Enum items of all snapshots, followed by the current tables."""
+    _enum_items[:] = [(name, name, 'Snapshot "{}" of {}'.format(name, snapshot['source'] or 'an unsaved file'))
+                      for name, snapshot in _snapshots.items()]
+    _enum_items.append((CURRENT_TABLES, 'Current Tables', 'Tables as they are now'))
+    return _enum_items
+
+
+def set_diff(diff: tuple[list[tuple], list[tuple], list[tuple]] | None, totals: list[tuple[str, float, float]]):
+    """Stores the last diff, as returned by :func:`snapshot.diff_packed`, and its scene totals.
+
+    :param diff: changed, added and removed rows, or ``None`` to clear the diff.
+    :param totals: scene totals as ``(name, base_value, value)``
+    """
+    global _diff, _diff_totals
+    _diff, _diff_totals = diff, totals
+
+
+def get_diff() -> tuple[list[tuple], list[tuple], list[tuple]] | None:
+    return _diff
+
+
+def get_diff_totals() -> list[tuple[str, float, float]]:
+    return _diff_totals
+
+
+def clear():
+    """Removes all snapshots and the last diff."""
+    _snapshots.clear()
+    set_diff(None, [])
@@ -0,0 +1,131 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import bpy
+import numpy as np
+
+from ..model.column_store import mesh_stats
+from .SA_OT_RefreshMeshes import get_mesh_objects, refresh_mesh_window
+
+
+def get_world_bound_corners(objects: list[bpy.types.Object], depsgraph: bpy.types.Depsgraph) -> np.ndarray:
+    """Returns the corners of each object's evaluated bounding box in world space.
+
+    Corners and matrices are read one object at a time, as Blender has no bulk access for them,
+    but all transformations are done in a single batch.
+
+    :param objects: objects to read
+    :param depsgraph: evaluated depsgraph
+    :return: array of shape ``(len(objects), 8, 4)`` with homogeneous world space corners.
+    """
+    corners = np.ones((len(objects), 8, 4))
+    matrices = np.empty((len(objects), 4, 4))
+    for idx, obj in enumerate(objects):
+        evaluated_obj = obj.evaluated_get(depsgraph)
+        corners[idx, :, :3] = evaluated_obj.bound_box
+        matrices[idx] = evaluated_obj.matrix_world
+    return np.einsum('nij,nkj->nki', matrices, corners)
+
+
+def get_screen_areas(clip_corners: np.ndarray, resolution_x: int, resolution_y: int) -> np.ndarray:
+    """Culls bounding boxes against the view frustum and estimates the pixels they cover.
+
+    A box is culled if all of its corners are outside the same frustum plane. The area of a box in view
+    is the area of the screen rectangle enclosing its projected corners, clamped to the frame.
+    Boxes crossing the camera plane are assumed to cover the frame along both axes.
+
+    :param clip_corners: clip space corners, of shape ``(box_count, 8, 4)``
+    :param resolution_x: horizontal render resolution, in pixels
+    :param resolution_y: vertical render resolution, in pixels
+    :return: covered pixels per box, zero for culled boxes.
+    """
+    x, y, z, w = clip_corners[..., 0], clip_corners[..., 1], clip_corners[..., 2], clip_corners[..., 3]
+    outside = (np.all(x < -w, axis=1) | np.all(x > w, axis=1) |
+               np.all(y < -w, axis=1) | np.all(y > w, axis=1) |
+               np.all(z < -w, axis=1) | np.all(z > w, axis=1))
+
+    in_front = w > 1e-6
+    safe_w = np.where(in_front, w, 1.0)
+    ndc_x = np.clip(x / safe_w, -1.0, 1.0)
+    ndc_y = np.clip(y / safe_w, -1.0, 1.0)
+    min_x = np.where(in_front, ndc_x, 1.0).min(axis=1)
+    max_x = np.where(in_front, ndc_x, -1.0).max(axis=1)
+    min_y = np.where(in_front, ndc_y, 1.0).min(axis=1)
+    max_y = np.where(in_front, ndc_y, -1.0).max(axis=1)
+
+    crosses_camera = np.any(in_front, axis=1) & ~np.all(in_front, axis=1)
+    min_x[crosses_camera], max_x[crosses_camera] = -1.0, 1.0
+    min_y[crosses_camera], max_y[crosses_camera] = -1.0, 1.0
+
+    width = np.maximum(max_x - min_x, 0.0) * 0.5 * resolution_x
+    height = np.maximum(max_y - min_y, 0.0) * 0.5 * resolution_y
+    visible = ~outside & np.any(in_front, axis=1)
+    return np.where(visible, width * height, 0.0)
+
+
+def analyze_camera_view(context: bpy.types.Context, camera: bpy.types.Object) -> tuple[int, int]:
+    """Writes the screen area and triangles per pixel of every mesh object into the mesh stats store.
+
+    Adds rows for objects not analyzed yet, whose triangles per pixel stay zero until meshes are refreshed.
+
+    :param context: Blender context
+    :param camera: camera object to view the scene from
+    :return: number of objects in the camera's view, and number of analyzed objects.
+    """
+    scene = context.scene
+    depsgraph = context.evaluated_depsgraph_get()
+    render = scene.render
+    resolution_x = int(render.resolution_x * render.resolution_percentage / 100)
+    resolution_y = int(render.resolution_y * render.resolution_percentage / 100)
+
+    evaluated_camera = camera.evaluated_get(depsgraph)
+    projection = np.array(evaluated_camera.calc_matrix_camera(depsgraph, x=resolution_x, y=resolution_y,
+                                                              scale_x=render.pixel_aspect_x,
+                                                              scale_y=render.pixel_aspect_y))
+    view = np.array(evaluated_camera.matrix_world.inverted())
+
+    mesh_objects = get_mesh_objects(context)
+    rows = np.empty(len(mesh_objects), dtype=np.int64)
+    for idx, obj in enumerate(mesh_objects):
+        row = mesh_stats.find(obj.name_full)
+        rows[idx] = row if row != -1 else mesh_stats.add(obj.name_full)
+
+    clip_corners = get_world_bound_corners(mesh_objects, depsgraph) @ (projection @ view).T
+    screen_areas = get_screen_areas(clip_corners, resolution_x, resolution_y)
+    tris = mesh_stats.column('tris')[rows]
+    tris_per_pixel = np.where(screen_areas > 0, tris / np.maximum(screen_areas, 1.0), 0.0)
+
+    mesh_stats.set_column('screen_area', rows, screen_areas)
+    mesh_stats.set_column('tris_per_pixel', rows, tris_per_pixel)
+    refresh_mesh_window(context.window_manager)
+    return int(np.count_nonzero(screen_areas)), len(mesh_objects)
+
+
+class SA_OT_AnalyzeCamera(bpy.types.Operator):
+    """Measures how much of the scene camera's view each mesh object covers."""
+    bl_idname = 'scene_analyzer.analyze_camera'
+    bl_label = 'Analyze camera view'
+    bl_description = ('Cull mesh objects outside the scene camera, and estimate the pixels each object covers '
+                      'and its triangles per pixel')
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene.camera is not None
+
+    def execute(self, context):
+        visible_count, object_count = analyze_camera_view(context, context.scene.camera)
+        self.report({'INFO'}, '{} of {} mesh objects in camera view'.format(visible_count, object_count))
+        return {'FINISHED'}
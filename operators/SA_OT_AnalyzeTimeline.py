@@ -0,0 +1,231 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import time
+from typing import Iterator
+
+import bpy
+from bpy_extras.io_utils import ExportHelper
+
+from ..model import instrumentation
+from ..model.CacheGroups import TimelineFrameCache
+from ..model.rows import get_cache_fields, iter_cache_rows
+from ..table_export import write_csv
+from .SA_OT_RefreshCollections import find_instanced_colls
+from .SA_OT_RefreshInstances import count_object_instances
+from .SA_OT_RefreshMeshes import get_bmesh_data, get_mesh_objects
+from .step_util import RefreshSteps, run_steps
+
+TIME_DEPENDENT_MODIFIERS = {'CLOTH', 'COLLISION', 'DYNAMIC_PAINT', 'EXPLODE', 'FLUID', 'MESH_CACHE',
+                            'MESH_SEQUENCE_CACHE', 'NODES', 'OCEAN', 'PARTICLE_SYSTEM', 'SOFT_BODY', 'SURFACE',
+                            'WAVE'}
+"""Modifiers whose result may change over time without any animation data, e.g. simulations and cached geometry."""
+
+INSTANCING_MODIFIERS = {'NODES', 'PARTICLE_SYSTEM'}
+"""Modifiers that may create instances."""
+
+
+def has_animation(id_data) -> bool:
+    """Returns whether a datablock is animated by an action, NLA tracks or drivers.
+
+    :param id_data: datablock, or ``None``
+    """
+    animation_data = getattr(id_data, 'animation_data', None)
+    return animation_data is not None and (animation_data.action is not None or len(animation_data.drivers) > 0 or
+                                           len(animation_data.nla_tracks) > 0)
+
+
+def get_modifier_objects(obj: bpy.types.Object) -> Iterator[bpy.types.Object]:
+    """Iterates over objects referenced by an object's modifiers, such as booleans and deform targets."""
+    for mod in obj.modifiers:
+        for prop in mod.bl_rna.properties:
+            if prop.type == 'POINTER' and prop.fixed_type is not None and prop.fixed_type.identifier == 'Object':
+                target = getattr(mod, prop.identifier)
+                if target is not None:
+                    yield target
+
+
+def is_time_dependent(obj: bpy.types.Object, memo: dict[bpy.types.Object, bool]) -> bool:
+    """Returns whether an object's evaluated geometry or transform may change between frames.
+
+    Objects are time dependent if they, their data or shape keys are animated, if they have constraints or
+    time dependent modifiers, or if their parent or any object referenced by their modifiers is time dependent.
+
+    :param obj: object to check
+    :param memo: previous results by object, shared between calls.
+    """
+    if obj in memo:
+        return memo[obj]
+    memo[obj] = True  # objects depending on themselves are treated as time dependent
+
+    data = obj.data
+    result = (has_animation(obj) or has_animation(data) or has_animation(getattr(data, 'shape_keys', None)) or
+              len(obj.constraints) > 0 or any(mod.type in TIME_DEPENDENT_MODIFIERS for mod in obj.modifiers) or
+              (obj.parent is not None and is_time_dependent(obj.parent, memo)) or
+              any(is_time_dependent(target, memo) for target in get_modifier_objects(obj)))
+    memo[obj] = result
+    return result
+
+
+def may_change_instances(objects: list[bpy.types.Object], instanced_objects: set[bpy.types.Object]) -> bool:
+    """Returns whether any of the given time dependent objects may change the scene's instances between frames.
+
+    :param objects: time dependent objects
+    :param instanced_objects: objects within collections instanced by other objects
+    """
+    return any(
+        o.is_instancer or o in instanced_objects or any(mod.type in INSTANCING_MODIFIERS for mod in o.modifiers)
+        for o in objects
+    )
+
+
+def get_sampled_frames(frame_start: int, frame_end: int, stride: int) -> list[int]:
+    """Returns the frames sampled in a range, always including its last frame so end-of-shot peaks are not missed.
+
+    :param frame_start: first frame
+    :param frame_end: last frame, inclusive
+    :param stride: number of frames between samples
+    """
+    frames = list(range(frame_start, frame_end + 1, stride))
+    if frames and frames[-1] != frame_end:
+        frames.append(frame_end)
+    return frames
+
+
+def analyze_timeline(context: bpy.types.Context, frames: list[int]) -> RefreshSteps:
+    """Clears and refills the timeline cache with the scene's complexity at each sampled frame.
+
+    All mesh objects are measured at the first frame. At later frames, only objects that may change over time
+    are measured again, and instances are only counted again if a time dependent object may change them.
+    The scene's current frame is restored afterwards.
+
+    :param context: Blender context
+    :param frames: frames to sample, in order
+    :return: refresh generator, returning the frame with the most triangles.
+    """
+    instrumentation.begin_pass('Timeline')
+    window_manager = context.window_manager
+    scene = context.scene
+    window_manager.sa_timeline_cache.clear()
+    use_bmesh = window_manager.sa_apply_modifiers
+
+    mesh_objects = get_mesh_objects(context)
+    instanced_objects = {o for c in find_instanced_colls(scene.collection) if c is not None for o in c.all_objects}
+    memo = {}
+    dynamic_objects = [o for o in context.view_layer.objects if is_time_dependent(o, memo)]
+    dynamic_objects.extend(o for o in instanced_objects if is_time_dependent(o, memo))
+    dynamic_mesh_objects = [o for o in mesh_objects if memo.get(o, False)]
+    instances_change = may_change_instances(dynamic_objects, instanced_objects)
+
+    object_stats = {}
+    instance_totals = (0, 0, 0)
+    peak_frame, peak_tris = scene.frame_current, -1.0
+    original_frame = scene.frame_current
+    try:
+        for idx, frame in enumerate(frames):
+            with instrumentation.stage('frame change'):
+                start = time.perf_counter()
+                scene.frame_set(frame)
+                eval_time = time.perf_counter() - start
+
+            depsgraph = context.evaluated_depsgraph_get()
+            recounted_objects = mesh_objects if idx == 0 else dynamic_mesh_objects
+            for obj in recounted_objects:
+                object_stats[obj.name] = get_bmesh_data(obj, depsgraph, use_bmesh)
+
+            if idx == 0 or instances_change:
+                instance_counts, instanced_mesh_stats = count_object_instances(depsgraph)
+                instance_totals = (
+                    sum(instance_counts.values()),
+                    sum([instanced_mesh_stats[mesh][0] * count for (_name, mesh), count in instance_counts.items()]),
+                    sum([instanced_mesh_stats[mesh][1] * count for (_name, mesh), count in instance_counts.items()]),
+                )
+
+            new_data: TimelineFrameCache = window_manager.sa_timeline_cache.add()
+            new_data.name = str(frame)
+            new_data.frame = frame
+            new_data.instance_count = instance_totals[0]
+            new_data.tris = sum([tris for tris, _verts in object_stats.values()]) + instance_totals[1]
+            new_data.verts = sum([verts for _tris, verts in object_stats.values()]) + instance_totals[2]
+            new_data.eval_time = eval_time
+            new_data.recounted_objects = len(recounted_objects)
+            if new_data.tris > peak_tris:
+                peak_frame, peak_tris = frame, new_data.tris
+            yield idx + 1, len(frames)
+    finally:
+        scene.frame_set(original_frame)
+
+    window_manager.sa_timeline_peak_frame = peak_frame
+    return peak_frame
+
+
+class SA_OT_AnalyzeTimeline(bpy.types.Operator):
+    """Samples the scene's complexity over a frame range."""
+    bl_idname = 'scene_analyzer.analyze_timeline'
+    bl_label = 'Analyze timeline'
+    bl_description = ('Sample triangles, vertices, instances and evaluation time over a frame range, '
+                      'to find the most complex frame')
+    bl_options = {'REGISTER'}
+
+    use_scene_range: bpy.props.BoolProperty(
+        name='Scene Frame Range',
+        description="Sample the scene's frame range instead of the given one",
+        default=True,
+    )
+    frame_start: bpy.props.IntProperty(name='Start', default=1)
+    frame_end: bpy.props.IntProperty(name='End', default=250)
+    stride: bpy.props.IntProperty(
+        name='Stride',
+        description='Number of frames between samples. The last frame of the range is always sampled',
+        default=1,
+        min=1,
+    )
+
+    def execute(self, context):
+        scene = context.scene
+        if self.use_scene_range:
+            frame_start, frame_end = scene.frame_start, scene.frame_end
+        else:
+            frame_start, frame_end = self.frame_start, self.frame_end
+        frames = get_sampled_frames(frame_start, frame_end, self.stride)
+        if not frames:
+            self.report({'WARNING'}, 'Frame range is empty')
+            return {'CANCELLED'}
+
+        peak_frame = run_steps(analyze_timeline(context, frames))
+        self.report({'INFO'}, 'Sampled {} frames, most triangles at frame {}'.format(len(frames), peak_frame))
+        return {'FINISHED'}
+
+
+class SA_OT_ExportTimeline(bpy.types.Operator, ExportHelper):
+    """Exports the sampled timeline as a CSV file."""
+    bl_idname = 'scene_analyzer.export_timeline'
+    bl_label = 'Export timeline'
+    bl_description = 'Export the complexity of each sampled frame as a CSV file'
+    bl_options = {'REGISTER'}
+
+    filename_ext = '.csv'
+    filter_glob: bpy.props.StringProperty(default='*.csv', options={'HIDDEN'})
+
+    @classmethod
+    def poll(cls, context):
+        return len(context.window_manager.sa_timeline_cache) > 0
+
+    def execute(self, context):
+        fields = get_cache_fields(TimelineFrameCache)
+        with open(self.filepath, 'w', newline='', encoding='utf-8') as f:
+            frame_count = write_csv(f, fields, iter_cache_rows(context.window_manager.sa_timeline_cache, fields))
+        self.report({'INFO'}, 'Exported {} frames to {}'.format(frame_count, self.filepath))
+        return {'FINISHED'}
@@ -0,0 +1,33 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import json
+
+import bpy
+
+from ..model import instrumentation
+
+
+class SA_OT_CopyRefreshReport(bpy.types.Operator):
+    """Copies the refresh report to the clipboard as JSON."""
+    bl_idname = 'scene_analyzer.copy_refresh_report'
+    bl_label = 'Copy refresh report'
+    bl_description = 'Copy the time spent in each refresh stage and the items that failed to update, as JSON'
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        context.window_manager.clipboard = json.dumps(instrumentation.get_report(), indent=2)
+        self.report({'INFO'}, 'Copied refresh report to the clipboard')
+        return {'FINISHED'}
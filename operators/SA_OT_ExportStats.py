@@ -0,0 +1,60 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import os
+
+import bpy
+from bpy_extras.io_utils import ExportHelper
+
+from ..model.rows import iter_tables
+from ..table_export import EXPORT_FORMATS, PackingError, export_tables
+
+
+class SA_OT_ExportStats(bpy.types.Operator, ExportHelper):
+    """Exports all analyzed stats, streaming each table's rows straight to disk."""
+    bl_idname = 'scene_analyzer.export_stats'
+    bl_label = 'Export stats'
+    bl_description = ('Export the stats of all meshes, modifiers, collections, instancers, node trees '
+                      'and sampled frames')
+    bl_options = {'REGISTER'}
+
+    # the extension follows the chosen format in execute, not ExportHelper's check
+    filename_ext = ''
+    check_extension = None
+    filter_glob: bpy.props.StringProperty(default='*.jsonl;*.csv;*.scxt', options={'HIDDEN'})
+
+    export_format: bpy.props.EnumProperty(
+        name='Format',
+        items=(
+            ('JSONL', 'JSON Lines', 'One JSON object per row, with its table name under "table"'),
+            ('CSV', 'CSV', 'One CSV file per table, named after the file and the table'),
+            ('COLUMNAR', 'Columnar', 'Compact binary file with packed columns, for very large scenes'),
+        ),
+        default='JSONL',
+    )
+
+    def execute(self, context):
+        filepath = os.path.splitext(self.filepath)[0] + EXPORT_FORMATS[self.export_format]
+        try:
+            row_count = export_tables(filepath, self.export_format, iter_tables(context.window_manager))
+        except OSError as e:
+            self.report({'ERROR'}, 'Could not export stats: {}'.format(e))
+            return {'CANCELLED'}
+        except PackingError as e:
+            self.report({'ERROR'}, 'Could not write a value of the stats: {}'.format(e))
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, 'Exported {} rows to {}'.format(row_count, filepath))
+        return {'FINISHED'}
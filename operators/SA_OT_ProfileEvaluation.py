@@ -0,0 +1,118 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import math
+import statistics
+import time
+
+import bpy
+
+from ..model import instrumentation
+from ..model.column_store import mesh_stats
+from .SA_OT_RefreshMeshes import get_mesh_objects, refresh_mesh_window
+from .step_util import RefreshSteps, report_failures, run_steps
+
+
+def time_object_evaluation(obj: bpy.types.Object, depsgraph: bpy.types.Depsgraph, samples: int) -> list[float]:
+    """Times repeated re-evaluations of an object.
+
+    Each sample tags the object's transform and data as changed and updates the depsgraph,
+    so the time includes its drivers, constraints, modifiers and the objects depending on it.
+
+    :param obj: object to re-evaluate
+    :param depsgraph: evaluated depsgraph
+    :param samples: number of re-evaluations
+    :return: seconds taken by each re-evaluation
+    """
+    times = []
+    for _ in range(samples):
+        obj.update_tag(refresh={'OBJECT', 'DATA'})
+        start = time.perf_counter()
+        depsgraph.update()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def get_percentile(values: list[float], percentile: float) -> float:
+    """Returns the nearest-rank percentile of values.
+
+    :param values: values, in any order
+    :param percentile: percentile between 0 and 100
+    """
+    sorted_values = sorted(values)
+    rank = max(math.ceil(percentile / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def profile_object_evaluation(context: bpy.types.Context, samples: int) -> RefreshSteps:
+    """Measures the median and 95th percentile evaluation time of every mesh object in the view layer.
+
+    Times are written into the mesh stats store, adding rows for objects not analyzed yet.
+    Objects that fail to evaluate are recorded as failures of the ``'Evaluation'`` pass, see :mod:`instrumentation`.
+
+    :param context: Blender context
+    :param samples: number of re-evaluations per object
+    :return: refresh generator, returning the number of profiled objects and the total seconds spent re-evaluating.
+    """
+    instrumentation.begin_pass('Evaluation')
+    all_mesh_objects = get_mesh_objects(context)
+    depsgraph = context.evaluated_depsgraph_get()
+    # settle any pending updates, so they aren't counted in the first object's time
+    depsgraph.update()
+
+    total_time = 0.0
+    profiled_count = 0
+    try:
+        for idx, obj in enumerate(all_mesh_objects):
+            try:
+                times = time_object_evaluation(obj, depsgraph, samples)
+            except Exception as e:
+                instrumentation.record_failure(obj.name, e)
+            else:
+                total_time += sum(times)
+                profiled_count += 1
+                row = mesh_stats.find(obj.name_full)
+                if row == -1:
+                    row = mesh_stats.add(obj.name_full)
+                mesh_stats.set_row(row, eval_time_median=statistics.median(times),
+                                   eval_time_p95=get_percentile(times, 95))
+            yield idx + 1, len(all_mesh_objects)
+    finally:
+        # times measured before a cancel or error are still shown
+        refresh_mesh_window(context.window_manager)
+    return profiled_count, total_time
+
+
+class SA_OT_ProfileEvaluation(bpy.types.Operator):
+    """Profiles the time each mesh object takes to evaluate."""
+    bl_idname = 'scene_analyzer.profile_evaluation'
+    bl_label = 'Profile evaluation'
+    bl_description = ('Measure how long each mesh object takes to re-evaluate, '
+                      'including its drivers, constraints, modifiers and dependent objects')
+    bl_options = {'REGISTER'}
+
+    samples: bpy.props.IntProperty(
+        name='Samples',
+        description='Number of times each object is re-evaluated',
+        default=5,
+        min=1,
+        soft_max=50,
+    )
+
+    def execute(self, context):
+        object_count, total_time = run_steps(profile_object_evaluation(context, self.samples))
+        self.report({'INFO'}, 'Profiled {} mesh objects in {:.2f}s'.format(object_count, total_time))
+        report_failures(self, 'Evaluation')
+        return {'FINISHED'}
@@ -0,0 +1,163 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import bpy
+
+from ..model import instrumentation
+from ..model.CacheGroups import ModifierCache
+from ..model.column_store import mesh_stats
+from .SA_OT_RefreshMeshes import get_bmesh_data
+from .step_util import RefreshSteps, report_failures, run_steps
+
+
+def get_modifier_cache_name(obj: bpy.types.Object, modifier: bpy.types.Modifier) -> str:
+    """Returns the unique cache entry name of a modifier, as modifier names are only unique per object."""
+    return '{}: {}'.format(obj.name, modifier.name)
+
+
+def get_execution_times(obj: bpy.types.Object, depsgraph: bpy.types.Depsgraph) -> dict[str, float]:
+    """Returns how long each modifier of an object took in its last evaluation.
+
+    Blender only records modifier times on evaluated objects, since Blender 3.6.
+    Modifiers evaluated in parallel may not have reliable times.
+
+    :param obj: mesh object
+    :param depsgraph: evaluated depsgraph
+    :return: seconds per modifier name, ``0.0`` where Blender does not record it.
+    """
+    evaluated_modifiers = obj.evaluated_get(depsgraph).modifiers
+    return {mod.name: getattr(mod, 'execution_time', 0.0) for mod in evaluated_modifiers}
+
+
+def measure_modifier_growth(obj: bpy.types.Object, depsgraph: bpy.types.Depsgraph) -> dict[str, tuple[int, int]]:
+    """Evaluates an object's modifier stack one modifier at a time, measuring the geometry each one adds.
+
+    The stack is re-evaluated once per enabled modifier, so this is only meant for a few heavy objects.
+    The viewport visibility of all modifiers is restored afterwards.
+
+    :param obj: mesh object, not in edit mode
+    :param depsgraph: evaluated depsgraph
+    :return: ``(triangles_added, vertices_added)`` per enabled modifier name.
+    """
+    enabled_modifiers = [mod for mod in obj.modifiers if mod.show_viewport]
+    stats = []
+    try:
+        for mod in enabled_modifiers:
+            mod.show_viewport = False
+        depsgraph.update()
+        stats.append(get_bmesh_data(obj, depsgraph))
+
+        for mod in enabled_modifiers:
+            mod.show_viewport = True
+            depsgraph.update()
+            stats.append(get_bmesh_data(obj, depsgraph))
+    finally:
+        for mod in enabled_modifiers:
+            mod.show_viewport = True
+        depsgraph.update()
+
+    return {
+        mod.name: (stats[idx + 1][0] - stats[idx][0], stats[idx + 1][1] - stats[idx][1])
+        for idx, mod in enumerate(enabled_modifiers)
+    }
+
+
+def refresh_modifier_cache(context: bpy.types.Context, top_count: int) -> RefreshSteps:
+    """Clears and refills the modifier cache with every modifier on mesh objects in the view layer.
+
+    Execution times are read for all modifiers first, since measuring geometry growth re-evaluates stacks.
+    Geometry growth is then measured for the ``top_count`` heaviest objects, by triangle count if meshes
+    were refreshed, otherwise by total modifier time.
+
+    Objects that fail to evaluate are recorded as failures of the ``'Modifiers'`` pass, see :mod:`instrumentation`.
+
+    :param context: Blender context
+    :param top_count: number of objects whose modifier stacks are evaluated one modifier at a time.
+    :return: refresh generator, returning the number of objects whose geometry growth was measured.
+    """
+    instrumentation.begin_pass('Modifiers')
+    window_manager = context.window_manager
+    window_manager.sa_modifier_cache.clear()
+    root_collection = context.view_layer.layer_collection.collection
+    modifier_objects = [o for o in root_collection.all_objects if o.type == 'MESH' and len(o.modifiers) > 0]
+    depsgraph = context.evaluated_depsgraph_get()
+
+    total_steps = len(modifier_objects) + min(top_count, len(modifier_objects))
+    object_times = {}
+    for idx, obj in enumerate(modifier_objects):
+        try:
+            execution_times = get_execution_times(obj, depsgraph)
+            object_times[obj.name] = sum(execution_times.values())
+            for mod in obj.modifiers:
+                new_data: ModifierCache = window_manager.sa_modifier_cache.add()
+                new_data.name = get_modifier_cache_name(obj, mod)
+                new_data.object_name = obj.name
+                new_data.modifier_name = mod.name
+                new_data.modifier_type = mod.type
+                new_data.execution_time = execution_times.get(mod.name, 0.0)
+        except Exception as e:
+            object_times[obj.name] = 0.0
+            instrumentation.record_failure(obj.name, e)
+        yield idx + 1, total_steps
+
+    def get_weight(obj: bpy.types.Object) -> tuple[int, float]:
+        row = mesh_stats.find(obj.name_full)
+        return mesh_stats.get(row, 'tris') if row != -1 else 0, object_times[obj.name]
+
+    heaviest_objects = sorted([o for o in modifier_objects if o.mode != 'EDIT'], key=get_weight, reverse=True)
+    heaviest_objects = heaviest_objects[:top_count]
+    modifier_cache = window_manager.sa_modifier_cache
+    measured_count = 0
+    for idx, obj in enumerate(heaviest_objects):
+        try:
+            modifier_growth = measure_modifier_growth(obj, depsgraph)
+        except Exception as e:
+            instrumentation.record_failure(obj.name, e)
+        else:
+            for modifier_name, (tris_added, verts_added) in modifier_growth.items():
+                cache_idx = modifier_cache.find(get_modifier_cache_name(obj, obj.modifiers[modifier_name]))
+                if cache_idx != -1:
+                    modifier_cache[cache_idx].is_measured = True
+                    modifier_cache[cache_idx].tris_added = tris_added
+                    modifier_cache[cache_idx].verts_added = verts_added
+            measured_count += 1
+        yield len(modifier_objects) + idx + 1, total_steps
+
+    return measured_count
+
+
+class SA_OT_ProfileModifiers(bpy.types.Operator):
+    """Profiles the evaluation time and added geometry of modifiers."""
+    bl_idname = 'scene_analyzer.profile_modifiers'
+    bl_label = 'Profile modifiers'
+    bl_description = ('Measure the evaluation time of each modifier, '
+                      'and the geometry added by each modifier of the heaviest objects')
+    bl_options = {'REGISTER'}
+
+    top_count: bpy.props.IntProperty(
+        name='Measured Objects',
+        description='Number of heaviest objects whose modifier stacks are evaluated one modifier at a time '
+                    'to measure the geometry each modifier adds',
+        default=10,
+        min=0,
+        soft_max=100,
+    )
+
+    def execute(self, context):
+        measured_count = run_steps(refresh_modifier_cache(context, self.top_count))
+        self.report({'INFO'}, 'Profiled {} modifiers, measured added geometry on {} objects'.format(
+            len(context.window_manager.sa_modifier_cache), measured_count))
+        report_failures(self, 'Modifiers')
+        return {'FINISHED'}
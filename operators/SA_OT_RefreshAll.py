@@ -17,7 +17,7 @@ import bpy
 
 
 class SA_OT_RefreshAll(bpy.types.Operator):
-    """Refreshes all node, mesh, and collection caches."""
+    """Refreshes all node, mesh, collection, and instancer caches."""
     bl_idname = 'scene_analyzer.refresh_all'
     bl_label = 'Refresh'
     bl_description = 'Refresh all scene analyzer caches'
@@ -28,4 +28,5 @@ class SA_OT_RefreshAll(bpy.types.Operator):
         ops.scene_analyzer.refresh_nodes()
         ops.scene_analyzer.refresh_meshes()
         ops.scene_analyzer.refresh_collections()
+        ops.scene_analyzer.refresh_instances()
         return {'FINISHED'}
@@ -0,0 +1,163 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import time
+
+import bpy
+
+from ..model.generation import bump_cache_generation
+from .disk_cache_util import close_disk_cache, open_disk_cache
+from .SA_OT_RefreshCollections import refresh_collection_cache
+from .SA_OT_RefreshInstances import refresh_instance_cache
+from .SA_OT_RefreshMeshes import refresh_mesh_cache, refresh_mesh_window
+from .SA_OT_RefreshNodes import refresh_node_caches
+from .step_util import report_failures, run_steps
+
+
+def tag_properties_redraw(context: bpy.types.Context):
+    """Redraws all properties editors, where the scene analyzer panel is shown, with the caches' latest rows."""
+    bump_cache_generation()
+    for window in context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'PROPERTIES':
+                area.tag_redraw()
+
+
+class SA_OT_RefreshAllModal(bpy.types.Operator):
+    """Refreshes all node, mesh, collection, and instancer caches in the background, a few rows at a time."""
+    bl_idname = 'scene_analyzer.refresh_all_modal'
+    bl_label = 'Refresh in Background'
+    bl_description = 'Refresh all scene analyzer caches without blocking the interface. Press Esc to cancel'
+    bl_options = {'REGISTER'}
+
+    time_budget: bpy.props.FloatProperty(
+        name='Time Budget',
+        description='Seconds spent refreshing caches per timer step',
+        default=0.05,
+        min=0.001,
+        soft_max=1.0,
+        subtype='TIME_ABSOLUTE',
+        unit='TIME_ABSOLUTE',
+    )
+    """Time spent refreshing per timer event, balancing interface responsiveness against total refresh time."""
+
+    _timer = None
+    _passes = None
+    _pass_index = 0
+    _steps = None
+    _disk_cache = None
+
+    @classmethod
+    def poll(cls, context):
+        return not context.window_manager.sa_is_refreshing
+
+    def _get_passes(self) -> tuple:
+        """Returns each refresh pass as ``(label, start)``, where ``start`` takes the context and returns its steps."""
+        return (
+            ('Nodes', lambda c: refresh_node_caches(c, self._disk_cache)),
+            ('Meshes', lambda c: refresh_mesh_cache(c, self._disk_cache)),
+            ('Collections', refresh_collection_cache),
+            ('Instancers', refresh_instance_cache),
+        )
+
+    def _start_pass(self, context) -> bool:
+        """Starts the next refresh pass.
+
+        :return: ``False`` if all passes are finished.
+        """
+        if self._pass_index >= len(self._passes):
+            return False
+        label, start = self._passes[self._pass_index]
+        context.window_manager.sa_refresh_status = label
+        self._steps = start(context)
+        return True
+
+    def _set_progress(self, context, done: int, total: int):
+        pass_progress = done / total if total else 1.0
+        context.window_manager.sa_refresh_progress = (self._pass_index + pass_progress) / len(self._passes)
+
+    def _finish(self, context):
+        window_manager = context.window_manager
+        if self._timer is not None:
+            window_manager.event_timer_remove(self._timer)
+            self._timer = None
+        window_manager.sa_is_refreshing = False
+        window_manager.sa_refresh_status = ''
+        refresh_mesh_window(window_manager)
+        close_disk_cache(self, self._disk_cache)
+        report_failures(self, 'Nodes', 'Meshes')
+        tag_properties_redraw(context)
+
+    def _cancel_on_error(self, context, error: Exception) -> set[str]:
+        """Stops the refresh after an error, so the operator and its timer are not left running."""
+        label = context.window_manager.sa_refresh_status
+        self._finish(context)
+        self.report({'ERROR'}, 'Refresh of {} stopped by an error: {}'.format(label, error))
+        return {'CANCELLED'}
+
+    def invoke(self, context, event):
+        self._disk_cache = open_disk_cache(context)
+        self._passes = self._get_passes()
+        self._pass_index = 0
+        window_manager = context.window_manager
+        self._start_pass(context)
+
+        window_manager.sa_is_refreshing = True
+        window_manager.sa_refresh_progress = 0.0
+        self._timer = window_manager.event_timer_add(0.01, window=context.window)
+        window_manager.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        # without an event loop (e.g. from scripts), all passes are run at once
+        self._disk_cache = open_disk_cache(context)
+        try:
+            for _label, start in self._get_passes():
+                run_steps(start(context))
+        finally:
+            refresh_mesh_window(context.window_manager)
+            close_disk_cache(self, self._disk_cache)
+        report_failures(self, 'Nodes', 'Meshes')
+        return {'FINISHED'}
+
+    def modal(self, context, event):
+        try:
+            return self._step(context, event)
+        except Exception as e:  # e.g. ReferenceError when data is removed or undone during the refresh
+            return self._cancel_on_error(context, e)
+
+    def _step(self, context, event) -> set[str]:
+        """Handles an event of the modal operator, running refresh steps for up to the time budget on timer events."""
+        if event.type == 'ESC':
+            self._finish(context)
+            self.report({'INFO'}, 'Refresh cancelled, showing rows analyzed so far')
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        end_time = time.perf_counter() + self.time_budget
+        while time.perf_counter() < end_time:
+            try:
+                done, total = next(self._steps)
+                self._set_progress(context, done, total)
+            except StopIteration:
+                self._pass_index += 1
+                if not self._start_pass(context):
+                    self._finish(context)
+                    return {'FINISHED'}
+
+        tag_properties_redraw(context)
+        return {'RUNNING_MODAL'}
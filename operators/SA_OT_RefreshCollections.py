@@ -13,10 +13,14 @@
 #     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+from collections import Counter
 from typing import Iterator
 
 import bpy
+from ..model import instrumentation
 from ..model.CacheGroups import CollectionCache
+from .SA_OT_RefreshMeshes import get_mesh_totals
+from .step_util import RefreshSteps, run_steps
 
 
 def coll_iter(curr_coll: bpy.types.LayerCollection) -> Iterator[bpy.types.LayerCollection]:
@@ -63,6 +67,136 @@ def find_instanced_objs_in_colls(curr_coll: bpy.types.Collection) -> Iterator[bp
                 yield obj
 
 
+def count_collection_instances(curr_coll: bpy.types.Collection) -> Counter:
+    """Counts how many objects instance each collection, in a single pass over all objects.
+
+    :param curr_coll: current collection
+    :return: number of instancing objects, by instanced collection name
+    """
+    return Counter(c.name for c in find_instanced_colls(curr_coll) if c is not None)
+
+
+class CollectionTotals:
+    """Sums triangles and vertices of collections, remembering the totals of each collection once computed.
+
+    :param mesh_cache: ``(triangle_count, vertex_count)`` of mesh objects, by name.
+    """
+
+    def __init__(self, mesh_cache: dict[str, tuple[int, int]]):
+        self.mesh_cache = mesh_cache
+        self._direct = {}
+        self._recursive = {}
+        self._with_instances = {}
+
+    def direct(self, collection: bpy.types.Collection) -> tuple[int, int, bool]:
+        """Totals of objects directly in a collection.
+
+        :return: tuple of triangles, vertices, and whether any of the objects is also in another collection.
+        """
+        if collection not in self._direct:
+            tris = verts = 0
+            has_shared_objects = False
+            for o in collection.objects:
+                if o.name in self.mesh_cache:
+                    obj_tris, obj_verts = self.mesh_cache[o.name]
+                    tris += obj_tris
+                    verts += obj_verts
+                    has_shared_objects = has_shared_objects or len(o.users_collection) > 1
+            self._direct[collection] = (tris, verts, has_shared_objects)
+        return self._direct[collection]
+
+    def recursive(self, collection: bpy.types.Collection) -> tuple[int, int, bool]:
+        """Totals of objects in a collection and its children, rolled up from the children's totals.
+
+        Objects linked to several collections within the hierarchy would be counted more than once by adding up
+        children, so those hierarchies are summed from their unique objects instead.
+
+        :return: tuple of triangles, vertices, and whether any of the objects is also in another collection.
+        """
+        if collection not in self._recursive:
+            self._recursive[collection] = (0, 0, False)  # guards against invalid cyclic hierarchies
+            tris, verts, has_shared_objects = self.direct(collection)
+            for child in collection.children:
+                child_tris, child_verts, child_has_shared = self.recursive(child)
+                tris += child_tris
+                verts += child_verts
+                has_shared_objects = has_shared_objects or child_has_shared
+
+            if has_shared_objects:
+                mesh_children = [self.mesh_cache[o.name] for o in collection.all_objects if o.name in self.mesh_cache]
+                tris = sum([v[0] for v in mesh_children])
+                verts = sum([v[1] for v in mesh_children])
+            self._recursive[collection] = (tris, verts, has_shared_objects)
+        return self._recursive[collection]
+
+    def with_instances(self, collection: bpy.types.Collection) -> tuple[int, int]:
+        """Totals drawn by one instance of a collection: its own objects, and collections instanced within it.
+
+        :return: tuple of triangles and vertices
+        """
+        if collection not in self._with_instances:
+            self._with_instances[collection] = (0, 0)  # guards against collections instancing themselves
+            tris, verts, _has_shared_objects = self.recursive(collection)
+            for instanced_coll in find_instanced_colls(collection):
+                if instanced_coll is not None:
+                    instance_tris, instance_verts = self.with_instances(instanced_coll)
+                    tris += instance_tris
+                    verts += instance_verts
+            self._with_instances[collection] = (tris, verts)
+        return self._with_instances[collection]
+
+
+def fill_collection_cache_item(coll_cache: CollectionCache, collection: bpy.types.Collection,
+                               totals: CollectionTotals, instance_counts: Counter):
+    """Writes the direct, recursive and instanced totals of a collection into its cache entry.
+
+    :param coll_cache: cache entry to fill
+    :param collection: Blender collection
+    :param totals: collection totals, shared between all collections of a refresh.
+    :param instance_counts: number of instancing objects, by instanced collection name
+    """
+    with instrumentation.stage('aggregate totals'):
+        direct_tris, direct_verts, _has_shared_objects = totals.direct(collection)
+        recursive_tris, recursive_verts, _has_shared_objects = totals.recursive(collection)
+        instance_count = instance_counts[collection.name]
+        instance_tris, instance_verts = totals.with_instances(collection) if instance_count > 0 else (0, 0)
+
+    with instrumentation.stage('cache writes'):
+        coll_cache.total_tris, coll_cache.total_verts = direct_tris, direct_verts
+        coll_cache.recursive_tris, coll_cache.recursive_verts = recursive_tris, recursive_verts
+        coll_cache.instance_count = instance_count
+        coll_cache.instanced_tris = instance_tris * instance_count
+        coll_cache.instanced_verts = instance_verts * instance_count
+
+
+def refresh_collection_cache(context: bpy.types.Context) -> RefreshSteps:
+    """Clears and refills the collection cache from the current mesh cache.
+
+    :param context: Blender context
+    :return: refresh generator.
+    """
+    instrumentation.begin_pass('Collections')
+    window_manager = context.window_manager
+    root_collection = context.view_layer.layer_collection
+    window_manager.sa_collection_cache.clear()
+
+    with instrumentation.stage('read mesh totals') as stage:
+        mesh_totals = get_mesh_totals()
+        stage.items = len(mesh_totals)
+    totals = CollectionTotals(mesh_totals)
+    with instrumentation.stage('find instancers'):
+        instance_counts = count_collection_instances(root_collection.collection)
+
+    layer_collections = list(coll_iter(root_collection))
+    for idx, coll in enumerate(layer_collections):
+        new_coll_data: CollectionCache = window_manager.sa_collection_cache.add()
+        new_coll_data.name = coll.collection.name
+        new_coll_data.is_visible = coll.is_visible
+
+        fill_collection_cache_item(new_coll_data, coll.collection, totals, instance_counts)
+        yield idx + 1, len(layer_collections)
+
+
 class SA_OT_RefreshCollections(bpy.types.Operator):
     """Refreshes the collection cache."""
     bl_idname = 'scene_analyzer.refresh_collections'
@@ -71,22 +205,5 @@ class SA_OT_RefreshCollections(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        window_manager = context.window_manager
-        root_collection = context.view_layer.layer_collection
-        window_manager.sa_collection_cache.clear()
-
-        mesh_cache = {o.name: (o.tris, o.verts) for o in window_manager.sa_mesh_cache.values()}
-
-        instanced_colls = [c.name for c in find_instanced_colls(root_collection.collection)]
-
-        for coll in coll_iter(root_collection):
-            new_coll_data: CollectionCache = window_manager.sa_collection_cache.add()
-            new_coll_data.name = coll.collection.name
-            new_coll_data.is_visible = coll.is_visible
-
-            mesh_children = [mesh_cache[o.name] for o in coll.collection.objects if o.name in mesh_cache]
-            new_coll_data.total_tris = sum([v[0] for v in mesh_children])
-            new_coll_data.total_verts = sum([v[1] for v in mesh_children])
-            new_coll_data.instance_count = len([c for c in instanced_colls if c == coll.collection.name])
-
+        run_steps(refresh_collection_cache(context))
         return {'FINISHED'}
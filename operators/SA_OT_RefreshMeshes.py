@@ -16,8 +16,18 @@
 from typing import Iterator
 
 import bpy
+import numpy as np
+from bpy.app.handlers import persistent
 
-from ..model.CacheGroups import MeshObjectCache
+from ..fingerprint_cache import FingerprintCache
+from ..model import instrumentation
+from ..model.column_store import ColumnStore, mesh_stats
+from ..model.generation import bump_cache_generation
+from .disk_cache_util import close_disk_cache, hash_bytes, open_disk_cache
+from .step_util import RefreshSteps, report_failures, run_steps
+
+_loop_total_buffer = None
+"""Reusable buffer for polygon loop totals, grown as larger meshes are counted."""
 
 
 def find_vert_face_instancers(curr_coll: bpy.types.Collection) -> Iterator[bpy.types.Collection]:
@@ -41,6 +51,52 @@ def get_parent_ancestors(obj: bpy.types.Object) -> list[bpy.types.Object]:
     return parents
 
 
+def _get_loop_total_buffer(size: int):
+    """Returns a view of the shared loop total buffer with exactly ``size`` elements.
+
+    The buffer is only reallocated when a mesh has more polygons than any mesh counted before it.
+
+    :param size: number of polygons to be read into the buffer.
+    """
+    global _loop_total_buffer
+    if _loop_total_buffer is None or len(_loop_total_buffer) < size:
+        _loop_total_buffer = np.empty(size, dtype=np.int32)
+    return _loop_total_buffer[:size]
+
+
+def count_tris_python(data: bpy.types.Mesh) -> int:
+    """Counts triangles of a mesh by walking each polygon.
+
+    :param data: mesh data
+    """
+    return sum([len(face.vertices) - 2 for face in data.polygons])
+
+
+def count_tris_numpy(data: bpy.types.Mesh) -> int:
+    """Counts triangles of a mesh by reading all polygon loop totals at once with ``foreach_get``.
+
+    :param data: mesh data
+    """
+    face_count = len(data.polygons)
+    if face_count == 0:
+        return 0
+    loop_totals = _get_loop_total_buffer(face_count)
+    data.polygons.foreach_get('loop_total', loop_totals)
+    return int(loop_totals.sum(dtype=np.int64)) - 2 * face_count
+
+
+def count_tris(data: bpy.types.Mesh) -> int:
+    """Counts triangles of a mesh with :func:`count_tris_numpy`, falling back to :func:`count_tris_python`
+    if its polygons cannot be read in bulk.
+
+    :param data: mesh data
+    """
+    try:
+        return count_tris_numpy(data)
+    except (TypeError, RuntimeError):
+        return count_tris_python(data)
+
+
 def get_bmesh_data(obj: bpy.types.Object, depsgraph: bpy.types.Depsgraph, use_bmesh: bool = True) -> tuple[int, int]:
     """Gets bmesh stats for object.
 
@@ -49,12 +105,360 @@ def get_bmesh_data(obj: bpy.types.Object, depsgraph: bpy.types.Depsgraph, use_bm
     :param use_bmesh: whether to use evaluated bmesh or simplified stats.
     :return: Tuple containing the evaluated ``(triangle_count, vertex_count)`` of the mesh object.
     """
+    with instrumentation.stage('read evaluated mesh'):
+        if not use_bmesh:
+            data = obj.data
+        else:
+            data = obj.evaluated_get(depsgraph).data
+
+    with instrumentation.stage('count triangles'):
+        return count_tris(data), len(data.vertices)
+
+
+MODIFIER_PROPS_TO_SKIP = {'rna_type', 'name', 'show_expanded', 'show_in_editmode', 'show_on_cage', 'show_render',
+                          'is_active', 'is_override_data_local', 'use_pin_to_last', 'persistent_uid',
+                          'execution_time'}
+"""Modifier properties that do not change the evaluated viewport geometry."""
+
+
+def get_modifier_signature(obj: bpy.types.Object) -> tuple | None:
+    """Builds a hashable signature of an object's viewport modifier stack.
+
+    Two objects sharing mesh data and signature evaluate to identical geometry.
+    Modifiers referencing other data (objects, textures, node groups, etc.) may depend on the object they are on,
+    so stacks containing them are not considered comparable.
+
+    :param obj: mesh object
+    :return: tuple describing the modifier stack, or ``None`` if the stack cannot be proven identical to another.
+    """
+    signature = []
+    for mod in obj.modifiers:
+        if not mod.show_viewport:
+            continue
+        mod_signature = [mod.type]
+        for prop in mod.bl_rna.properties:
+            identifier = prop.identifier
+            if identifier in MODIFIER_PROPS_TO_SKIP:
+                continue
+            value = getattr(mod, identifier)
+            if prop.type == 'POINTER' and value is not None or prop.type == 'COLLECTION' and len(value) > 0:
+                return None
+            elif prop.type in {'POINTER', 'COLLECTION'}:
+                continue
+            elif isinstance(value, set):
+                value = tuple(sorted(value))
+            elif getattr(prop, 'is_array', False):
+                value = tuple(value)
+            mod_signature.append((identifier, value))
+        signature.append(tuple(mod_signature))
+
+    if signature:
+        # vertex groups are referenced by name from modifiers, but their order is stored on the object
+        signature.append(tuple(vertex_group.name for vertex_group in obj.vertex_groups))
+    return tuple(signature)
+
+
+def get_mesh_memo_key(obj: bpy.types.Object, use_bmesh: bool = True) -> tuple | None:
+    """Returns the key under which an object's mesh stats can be shared with other objects.
+
+    :param obj: mesh object
+    :param use_bmesh: whether stats are based on the evaluated mesh, in which case the modifier stack is part of the key.
+    :return: tuple of mesh data and modifier signature, or ``None`` if the object must be evaluated by itself.
+    """
     if not use_bmesh:
-        data = obj.data
-    else:
-        data = obj.evaluated_get(depsgraph).data
+        return obj.data, ()
+    if obj.mode == 'EDIT':
+        return None
+    signature = get_modifier_signature(obj)
+    if signature is None:
+        return None
+    return obj.data, signature
+
+
+def get_mesh_checksum(data: bpy.types.Mesh) -> str:
+    """Hashes the positions, topology, attribute layout and shape key values of a mesh.
+
+    :param data: mesh data
+    :return: hexadecimal digest
+    """
+    counts = np.array([len(data.vertices), len(data.edges), len(data.polygons), len(data.loops)], dtype=np.int64)
+    positions = np.empty(counts[0] * 3, dtype=np.float32)
+    data.vertices.foreach_get('co', positions)
+    edges = np.empty(counts[1] * 2, dtype=np.int32)
+    data.edges.foreach_get('vertices', edges)
+    loop_totals = np.empty(counts[2], dtype=np.int32)
+    data.polygons.foreach_get('loop_total', loop_totals)
+    loop_vertices = np.empty(counts[3], dtype=np.int32)
+    data.loops.foreach_get('vertex_index', loop_vertices)
+
+    layout = sorted((attribute.name, attribute.domain, attribute.data_type) for attribute in data.attributes)
+    shape_keys = [] if data.shape_keys is None else [
+        (key_block.name, key_block.value, key_block.mute) for key_block in data.shape_keys.key_blocks
+    ]
+    return hash_bytes(counts, positions, edges, loop_totals, loop_vertices,
+                      repr((layout, shape_keys)).encode('utf-8'))
+
+
+def get_mesh_disk_key(memo_key: tuple) -> str | None:
+    """Returns the persistent cache key of an object's evaluated mesh stats.
+
+    Only stacks with modifiers are cached, as counting unmodified meshes is faster than hashing them.
+    Modifiers using vertex groups are not cached either, as vertex weights are not part of the checksum.
+
+    :param memo_key: key returned by :func:`get_mesh_memo_key`
+    :return: key, or ``None`` if the stats should not be cached.
+    """
+    data, signature = memo_key
+    if not signature:
+        return None
+    for mod_signature in signature[:-1]:  # the last entry is the object's vertex group names
+        if any(identifier.endswith('vertex_group') and value for identifier, value in mod_signature[1:]):
+            return None
+    signature_hash = hash_bytes(repr(signature).encode('utf-8'))
+    return 'mesh:{}:{}:{}'.format(bpy.app.version_string, get_mesh_checksum(data), signature_hash)
+
+
+ATTRIBUTE_TYPE_BYTES = {
+    'FLOAT': 4, 'INT': 4, 'FLOAT_VECTOR': 12, 'FLOAT_COLOR': 16, 'BYTE_COLOR': 4, 'STRING': 8, 'BOOLEAN': 1,
+    'FLOAT2': 8, 'INT8': 1, 'INT16_2D': 4, 'INT32_2D': 8, 'QUATERNION': 16, 'FLOAT4X4': 64,
+}
+"""Bytes per element of each attribute data type."""
+
+TOPOLOGY_ATTRIBUTES = (('position', 'vertices', 12), ('.edge_verts', 'edges', 8), ('.corner_vert', 'loops', 4),
+                       ('.corner_edge', 'loops', 4))
+"""Built-in attributes as ``(name, element_collection, bytes_per_element)``, stored outside of the attributes
+in Blender versions before they became attributes."""
+
+
+def estimate_mesh_bytes(data: bpy.types.Mesh) -> int:
+    """Estimates the memory of a mesh's data from the sizes and data types of its layers, without reading them.
+
+    Counts all attributes (including positions, topology, UV maps, colors and custom normals),
+    face offsets and shape keys. Layers that are not attributes in older Blender versions are added separately.
+    Vertex group weights are not counted, as their size can only be known by reading them.
+
+    :param data: mesh data
+    :return: estimated bytes
+    """
+    total = 0
+    attribute_names = set()
+    for attribute in data.attributes:
+        attribute_names.add(attribute.name)
+        total += len(attribute.data) * ATTRIBUTE_TYPE_BYTES.get(attribute.data_type, 4)
+
+    for name, collection_name, element_bytes in TOPOLOGY_ATTRIBUTES:
+        if name not in attribute_names:
+            total += len(getattr(data, collection_name)) * element_bytes
+    loop_count = len(data.loops)
+    total += (len(data.polygons) + 1) * 4  # face offsets
+    total += sum([loop_count * 8 for uv_layer in data.uv_layers if uv_layer.name not in attribute_names])
+    if getattr(data, 'has_custom_normals', False) and 'custom_normal' not in attribute_names:
+        total += loop_count * 4
+
+    if data.shape_keys is not None:
+        total += len(data.shape_keys.key_blocks) * len(data.vertices) * 12
+    return total
 
-    return sum([len(face.vertices) - 2 for face in data.polygons]), len(data.vertices)
+
+def update_mesh_memory_total(window_manager: bpy.types.WindowManager, objects: list[bpy.types.Object]):
+    """Sums the memory of the meshes used by mesh objects, counting meshes shared by several objects once.
+
+    :param window_manager: window manager holding the total
+    :param objects: analyzed mesh objects
+    """
+    mesh_bytes = {}
+    for obj in objects:
+        row = mesh_stats.find(obj.name_full)
+        if row != -1:
+            mesh_bytes[obj.data] = mesh_stats.get(row, 'memory_bytes')
+    window_manager.sa_mesh_memory_total = sum(mesh_bytes.values())
+
+
+def find_tri_count_mismatches(meshes: Iterator[bpy.types.Mesh]) -> list[tuple[str, int, int]]:
+    """Compares the NumPy and pure Python triangle counts of each mesh.
+
+    :param meshes: meshes to compare
+    :return: list of ``(mesh_name, numpy_count, python_count)`` for each mesh where the counts differ.
+    """
+    mismatches = []
+    for mesh in meshes:
+        numpy_count, python_count = count_tris_numpy(mesh), count_tris_python(mesh)
+        if numpy_count != python_count:
+            mismatches.append((mesh.name, numpy_count, python_count))
+    return mismatches
+
+
+def fill_material_stats(mesh_stats: ColumnStore, idx: int, obj: bpy.types.Object,
+                        material_node_counts: dict[str, int]):
+    """Writes the modifier and material stats of a mesh object into its row of the mesh stats store.
+
+    :param mesh_stats: mesh stats store
+    :param idx: index of the object's row
+    :param obj: mesh object
+    :param material_node_counts: number of nodes used by each material, by material name.
+    """
+    with instrumentation.stage('material stats'):
+        mesh_stats.set_row(
+            idx,
+            modifier_count=len(obj.modifiers),
+            material_count=len({m.material.name_full for m in obj.material_slots if m.material is not None}),
+            material_node_count=sum([
+                material_node_counts[m.material.name]
+                for m in obj.material_slots
+                if m.material is not None and
+                m.material.name in material_node_counts
+            ]),
+        )
+
+
+def fill_mesh_stats_row(mesh_stats: ColumnStore, idx: int, obj: bpy.types.Object, depsgraph: bpy.types.Depsgraph,
+                        use_bmesh: bool, material_node_counts: dict[str, int], mesh_memo: dict = None,
+                        disk_cache: FingerprintCache = None) -> bool:
+    """Writes the stats of a mesh object into its row of the mesh stats store.
+
+    :param mesh_stats: mesh stats store
+    :param idx: index of the object's row
+    :param obj: mesh object
+    :param depsgraph: current scene depsgraph.
+    :param use_bmesh: whether to use evaluated bmesh or simplified stats.
+    :param material_node_counts: number of nodes used by each material, by material name.
+    :param mesh_memo: stats of previously evaluated objects, by :func:`get_mesh_memo_key`.
+    :param disk_cache: persistent cache of evaluated stats, only used along with ``mesh_memo``.
+    :return: whether the geometry stats were reused from ``mesh_memo`` or ``disk_cache`` instead of evaluated.
+    """
+    fill_material_stats(mesh_stats, idx, obj, material_node_counts)
+    with instrumentation.stage('estimate memory'):
+        mesh_stats.set_row(idx, memory_bytes=estimate_mesh_bytes(obj.data))
+
+    with instrumentation.stage('modifier signature'):
+        memo_key = get_mesh_memo_key(obj, use_bmesh) if mesh_memo is not None else None
+    if memo_key is not None and memo_key in mesh_memo:
+        tris, verts = mesh_memo[memo_key]
+        mesh_stats.set_row(idx, tris=tris, verts=verts)
+        return True
+
+    disk_key = None
+    if disk_cache is not None and memo_key is not None:
+        with instrumentation.stage('mesh checksum'):
+            disk_key = get_mesh_disk_key(memo_key)
+    if disk_key is not None:
+        stored = disk_cache.get(disk_key)
+        if stored is not None:
+            try:
+                tris, verts = int(stored[0]), int(stored[1])
+            except (TypeError, ValueError, IndexError):
+                disk_cache.discard(disk_key)
+            else:
+                mesh_stats.set_row(idx, tris=tris, verts=verts)
+                mesh_memo[memo_key] = (tris, verts)
+                return True
+
+    tris, verts = get_bmesh_data(obj, depsgraph, use_bmesh)
+    mesh_stats.set_row(idx, tris=tris, verts=verts)
+    if memo_key is not None:
+        mesh_memo[memo_key] = (tris, verts)
+    if disk_key is not None:
+        disk_cache.put(disk_key, [tris, verts])
+    return False
+
+
+def get_mesh_objects(context: bpy.types.Context) -> list[bpy.types.Object]:
+    """Returns all mesh objects in the view layer, in the order they are analyzed."""
+    root_collection = context.view_layer.layer_collection.collection
+    return [o for o in root_collection.all_objects if o.type == 'MESH']
+
+
+def get_object_name(obj: bpy.types.Object) -> str:
+    """Returns an object's name, or a placeholder if the object was removed since it was listed."""
+    try:
+        return obj.name
+    except ReferenceError:
+        return '<removed object>'
+
+
+def refresh_mesh_cache(context: bpy.types.Context, disk_cache: FingerprintCache = None) -> RefreshSteps:
+    """Clears and refills the mesh stats store with all mesh objects in the view layer.
+
+    Objects that fail to update are recorded as failures of the ``'Meshes'`` pass, see :mod:`instrumentation`.
+
+    :param context: Blender context
+    :param disk_cache: persistent cache of evaluated stats from previous sessions.
+    :return: refresh generator, returning the number of evaluations saved by shared meshes and the disk cache.
+    """
+    instrumentation.begin_pass('Meshes')
+    window_manager = context.window_manager
+    mesh_stats.clear()
+    all_mesh_objects = get_mesh_objects(context)
+    material_cache_tree = {m.name: m.nodes_used for m in window_manager.sa_material_cache}
+
+    with instrumentation.stage('depsgraph evaluation'):
+        depsgraph = context.evaluated_depsgraph_get()
+    use_bmesh = window_manager.sa_apply_modifiers
+    mesh_memo = {}
+    saved_evaluations = 0
+    analyzed_objects = []
+    for idx, o in enumerate(all_mesh_objects):
+        row = -1
+        try:
+            row = mesh_stats.add(o.name_full)
+            if fill_mesh_stats_row(mesh_stats, row, o, depsgraph, use_bmesh, material_cache_tree, mesh_memo,
+                                   disk_cache):
+                saved_evaluations += 1
+            analyzed_objects.append(o)
+        except Exception as e:
+            if row != -1:
+                mesh_stats.remove(row)
+            instrumentation.record_failure(get_object_name(o), e)
+        yield idx + 1, len(all_mesh_objects)
+
+    update_mesh_memory_total(window_manager, analyzed_objects)
+    refresh_mesh_window(window_manager)
+    return saved_evaluations
+
+
+def get_mesh_totals() -> dict[str, tuple[int, int]]:
+    """Returns ``(triangle_count, vertex_count)`` of all analyzed mesh objects, by name."""
+    return dict(zip(mesh_stats.names, zip(mesh_stats.column('tris').tolist(), mesh_stats.column('verts').tolist())))
+
+
+def refresh_mesh_window(window_manager: bpy.types.WindowManager):
+    """Copies the rows of the mesh stats store shown by the mesh table into the window manager's mesh cache.
+
+    Only a window of at most ``sa_mesh_window_size`` rows, in the table's sort order, is copied,
+    so the interface never holds a ``PropertyGroup`` item per object.
+
+    :param window_manager: window manager holding the mesh cache and window settings.
+    """
+    sort_value = window_manager.mesh_cache_sort_value
+    order = mesh_stats.sorted_indices(sort_value, descending=sort_value != 'name',
+                                      name_filter=window_manager.sa_mesh_window_filter)
+    start = min(window_manager.sa_mesh_window_start, max(len(order) - 1, 0))
+    rows = order[start:start + window_manager.sa_mesh_window_size]
+
+    mesh_cache = window_manager.sa_mesh_cache
+    with instrumentation.stage('window writes', len(rows)):
+        mesh_cache.clear()
+        for row in rows.tolist():
+            mesh_cache.add().name = mesh_stats.names[row]
+        for column in mesh_stats.columns:
+            values = mesh_stats.column(column)[rows]
+            # foreach_set reads int properties as 32-bit integers and float properties as 32-bit floats
+            mesh_cache.foreach_set(column, np.ascontiguousarray(values, dtype=np.float32 if values.dtype.kind == 'f'
+                                                                else np.int32))
+    window_manager.sa_mesh_window_total = len(order)
+    bump_cache_generation()
+
+
+@persistent
+def clear_mesh_stats(_filepath: str):
+    """Clears the mesh stats store when a file is loaded, since its rows describe the objects of the previous file."""
+    mesh_stats.clear()
+    refresh_mesh_window(bpy.context.window_manager)
+
+
+def update_mesh_window(window_manager: bpy.types.WindowManager, _context):
+    """Update callback of the mesh table's sort and window properties."""
+    refresh_mesh_window(window_manager)
 
 
 class SA_OT_RefreshMeshes(bpy.types.Operator):
@@ -65,38 +469,12 @@ class SA_OT_RefreshMeshes(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        window_manager = context.window_manager
-        window_manager.sa_mesh_cache.clear()
-        root_collection = context.view_layer.layer_collection.collection
-        all_mesh_objects = [o for o in root_collection.all_objects if o.type == 'MESH']
-        material_cache_tree = {m.name: m.nodes_used for m in window_manager.sa_material_cache}
-
-        depsgraph = context.evaluated_depsgraph_get()
-        use_bmesh = window_manager.sa_apply_modifiers
-        failed_meshes = []
-        for o in all_mesh_objects:
-            new_data: MeshObjectCache = window_manager.sa_mesh_cache.add()
-            new_data.name = o.name_full
-            new_data.material_count = len({m.material.name_full for m in o.material_slots if m.material is not None})
-            try:
-                new_data.tris, new_data.verts = get_bmesh_data(o, depsgraph, use_bmesh)
-            except Exception as e:
-                failed_meshes.append((o.name, str(e)))
-
-            new_data.modifier_count = len(o.modifiers)
+        disk_cache = open_disk_cache(context)
+        saved_evaluations = run_steps(refresh_mesh_cache(context, disk_cache))
+        close_disk_cache(self, disk_cache)
 
-            new_data.material_count = sum([
-                material_cache_tree[m.material.name]
-                for m in o.material_slots
-                if m.material is not None and
-                m.material.name in material_cache_tree
-            ])
-
-        if failed_meshes:
-            self.report({'WARNING'}, 'Some meshes failed to update (see console)')
-            print(''.join([
-                '\n\t{} ({})'.format(mesh_name, e)
-                for mesh_name, e in failed_meshes
-            ]))
+        self.report({'INFO'}, 'Refreshed {} mesh objects ({} evaluations saved by shared meshes and cache)'.format(
+            len(mesh_stats), saved_evaluations))
+        report_failures(self, 'Meshes')
 
         return {'FINISHED'}
@@ -13,11 +13,18 @@
 #     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 
+import hashlib
+import os
+from collections import Counter
 from typing import Iterator
 
 import bpy
 
-from ..model import NodeCache
+from ..fingerprint_cache import FingerprintCache
+from ..image_header import ImageHeader, estimate_texture_bytes, probe_image
+from ..model import NodeCache, instrumentation
+from .disk_cache_util import close_disk_cache, open_disk_cache
+from .step_util import RefreshSteps, report_failures, run_steps
 
 NODE_PATTERNS_TO_SKIP = {'Reroute', 'GroupInput', 'GroupOutput', 'NodeOutput'}
 """Node types that can be skipped in calculations.
@@ -25,44 +32,393 @@ Should only be non-operational nodes or otherwise not actually affecting the com
 """
 
 
-def get_nodes_used(curr_node: bpy.types.Node, node_group_cache: dict[str, set[bpy.types.Node]], image_cache: set[bpy.types.Image]) -> set[bpy.types.Node]:
+NodeGroupCache = dict[bpy.types.NodeTree, tuple[set[bpy.types.Node], set[bpy.types.Image]]]
+"""Nodes and images used by each node tree, shared between all node trees analyzed in a refresh."""
+
+
+def get_nodes_used(curr_node: bpy.types.Node, node_group_cache: NodeGroupCache,
+                   image_cache: set[bpy.types.Image], visited: set[bpy.types.Node] = None) -> set[bpy.types.Node]:
     """Get all nodes currently used within a node tree.
 
+    Nodes are walked iteratively and visited at most once,
+    so subgraphs shared by several paths (e.g. mix chains reusing texture coordinates) are only walked once.
+
     :param curr_node: node to start with.
+    :param node_group_cache: nodes and images used by node groups, filled as groups are found.
+    :param image_cache: set to which images used by the nodes are added.
+    :param visited: nodes already walked, to be shared when walking from several nodes of the same tree.
     """
+    if visited is None:
+        visited = set()
+
     node_set = set()
-    if not curr_node.mute:
-        if hasattr(curr_node, 'node_tree'):
-            node_group_name = curr_node.node_tree.name
-            if node_group_name not in node_group_cache:
-                new_node_group_entry = set()
-                for output in get_output_nodes(curr_node.node_tree):
-                    new_node_group_entry.update(get_nodes_used(output, node_group_cache, image_cache))
-                node_group_cache[node_group_name] = new_node_group_entry
-
-            node_set.update(node_group_cache[curr_node.node_tree.name])
-        elif not any(p in curr_node.bl_idname for p in NODE_PATTERNS_TO_SKIP):
-            node_set.add(curr_node)
-
-            if curr_node.type == 'TEX_IMAGE' and hasattr(curr_node.image, 'size'):
-                image_cache.add(curr_node.image)
-
-    nodes_from_inputs = [
-        get_nodes_used(link.from_node, node_group_cache, image_cache)
-        for node_input in curr_node.inputs
-        for link in node_input.links
-        if node_input.is_linked
-    ]
-    for n in nodes_from_inputs:
-        node_set.update(n)
+    stack = [curr_node]
+    while stack:
+        node = stack.pop()
+        if node in visited:
+            continue
+        visited.add(node)
+
+        if not node.mute:
+            if hasattr(node, 'node_tree'):
+                if node.node_tree is not None:
+                    group_nodes, group_images = get_node_tree_used(node.node_tree, node_group_cache)
+                    node_set.update(group_nodes)
+                    image_cache.update(group_images)
+            elif not any(p in node.bl_idname for p in NODE_PATTERNS_TO_SKIP):
+                node_set.add(node)
+
+                if node.type == 'TEX_IMAGE' and node.image is not None:
+                    image_cache.add(node.image)
+
+        stack.extend(
+            link.from_node
+            for node_input in node.inputs
+            if node_input.is_linked
+            for link in node_input.links
+        )
     return node_set
 
 
+def get_node_tree_used(node_tree: bpy.types.NodeTree,
+                       node_group_cache: NodeGroupCache) -> tuple[set[bpy.types.Node], set[bpy.types.Image]]:
+    """Get all nodes and images used by a node tree, walking it only once per refresh.
+
+    :param node_tree: node tree, either a node group or embedded in a material.
+    :param node_group_cache: nodes and images used by node trees, filled as trees are walked.
+    :return: tuple of used nodes and used images.
+    """
+    if node_tree not in node_group_cache:
+        node_group_cache[node_tree] = (set(), set())  # guards against groups nested within themselves
+        node_set = set()
+        image_cache = set()
+        visited = set()
+        for output in get_output_nodes(node_tree):
+            node_set.update(get_nodes_used(output, node_group_cache, image_cache, visited))
+        node_group_cache[node_tree] = (node_set, image_cache)
+    return node_group_cache[node_tree]
+
+
 def get_output_nodes(node_tree: bpy.types.NodeTree) -> Iterator[bpy.types.Node]:
     """Returns all output nodes in a node tree."""
     return (node for node in node_tree.nodes if 'Output' in node.bl_idname)
 
 
+NODE_BASE_PROPERTIES = {prop.identifier for prop in bpy.types.Node.bl_rna.properties} | {'node_tree'}
+"""Properties shared by all nodes (name, location, label, etc.), which don't change what a node computes.
+Node groups are hashed by their own fingerprint rather than by name, see :func:`get_node_tree_fingerprint`."""
+
+
+def get_value_key(value):
+    """Returns a hashable representation of a node property or socket value.
+
+    Referenced datablocks are represented by their names, color ramps and curves by their points,
+    and other nested structs are ignored.
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, bpy.types.ID):
+        return value.name_full
+    if isinstance(value, bpy.types.ColorRamp):
+        return (value.interpolation, value.color_mode,
+                tuple((element.position, tuple(element.color)) for element in value.elements))
+    if isinstance(value, bpy.types.CurveMapping):
+        return tuple(tuple((tuple(point.location), point.handle_type) for point in curve.points)
+                     for curve in value.curves)
+    if isinstance(value, set):  # enum flags
+        return tuple(sorted(value))
+    try:
+        return tuple(value)  # vectors, colors and other arrays
+    except TypeError:
+        return None
+
+
+def get_node_settings(node: bpy.types.Node) -> tuple:
+    """Returns the values of a node's own properties and of its unlinked inputs, which change what it computes."""
+    properties = tuple(
+        (prop.identifier, get_value_key(getattr(node, prop.identifier)))
+        for prop in node.bl_rna.properties
+        if prop.identifier not in NODE_BASE_PROPERTIES and prop.type != 'COLLECTION'
+    )
+    inputs = tuple(
+        (socket.identifier, get_value_key(socket.default_value))
+        for socket in node.inputs
+        if not socket.is_linked and hasattr(socket, 'default_value')
+    )
+    return properties, inputs
+
+
+def get_node_tree_fingerprint(node_tree: bpy.types.NodeTree, fingerprint_cache: dict[bpy.types.NodeTree, str]) -> str:
+    """Hashes the content of a node tree: its nodes' types, mute state, settings and input values, links,
+    and referenced groups and images.
+
+    Node trees with the same fingerprint compute the same result with the same nodes and images,
+    such as duplicated materials.
+
+    :param node_tree: node tree to hash
+    :param fingerprint_cache: fingerprints of node trees already hashed, filled as node groups are found.
+    :return: hexadecimal digest
+    """
+    if node_tree in fingerprint_cache:
+        return fingerprint_cache[node_tree]
+    fingerprint_cache[node_tree] = ''  # guards against groups nested within themselves
+
+    node_entries = []
+    for node in node_tree.nodes:
+        reference = ''
+        if getattr(node, 'node_tree', None) is not None:
+            reference = get_node_tree_fingerprint(node.node_tree, fingerprint_cache)
+        elif node.type == 'TEX_IMAGE' and node.image is not None:
+            reference = node.image.name_full
+        node_entries.append((node.name, node.bl_idname, node.mute, reference, get_node_settings(node)))
+
+    link_entries = [
+        (link.from_node.name, link.from_socket.identifier, link.to_node.name, link.to_socket.identifier, link.is_muted)
+        for link in node_tree.links
+    ]
+
+    structure = repr((node_tree.bl_idname, sorted(node_entries), sorted(link_entries)))
+    fingerprint = hashlib.sha1(structure.encode('utf-8')).hexdigest()
+    fingerprint_cache[node_tree] = fingerprint
+    return fingerprint
+
+
+def get_image_reference(image: bpy.types.Image) -> list:
+    """Returns an image's name and library path, which can be stored and looked up with :func:`find_image`."""
+    return [image.name, image.library.filepath if image.library is not None else None]
+
+
+def find_image(reference) -> bpy.types.Image | None:
+    """Looks up an image by a reference from :func:`get_image_reference`.
+
+    :return: image, or ``None`` if there is no such image or the reference is malformed.
+    """
+    try:
+        name, library_path = reference
+        return bpy.data.images.get((name, library_path))
+    except (TypeError, ValueError, KeyError):
+        return None
+
+
+def get_node_tree_stats(node_tree: bpy.types.NodeTree, fingerprint: str, node_group_cache: NodeGroupCache,
+                        disk_cache: FingerprintCache = None) -> tuple[int, set[bpy.types.Image]]:
+    """Counts the nodes and finds the images used by a node tree, reusing stats stored under its fingerprint.
+
+    :param node_tree: node tree to analyze
+    :param fingerprint: fingerprint of the node tree, see :func:`get_node_tree_fingerprint`.
+    :param node_group_cache: nodes used per node group, shared between node trees.
+    :param disk_cache: persistent cache of node tree stats from previous sessions.
+    :return: tuple of the number of used nodes and the used images.
+    """
+    disk_key = 'nodes:' + fingerprint if disk_cache is not None and fingerprint else None
+    if disk_key is not None:
+        stored = disk_cache.get(disk_key)
+        if stored is not None:
+            try:
+                node_count, image_references = int(stored[0]), stored[1]
+                images = {find_image(reference) for reference in image_references}
+            except (TypeError, ValueError, IndexError):
+                images = {None}
+            if None not in images:
+                return node_count, images
+            disk_cache.discard(disk_key)
+
+    with instrumentation.stage('traverse nodes') as stage:
+        nodes, images = get_node_tree_used(node_tree, node_group_cache)
+        stage.items = len(nodes)
+    if disk_key is not None:
+        disk_cache.put(disk_key, [len(nodes), [get_image_reference(image) for image in images]])
+    return len(nodes), images
+
+
+def read_image_file_headers(image: bpy.types.Image, disk_cache: FingerprintCache = None) -> list[ImageHeader] | None:
+    """Reads the file headers of an image not loaded yet, one per UDIM tile for tiled images.
+
+    :param image: Blender image
+    :param disk_cache: persistent cache of file headers from previous sessions.
+    :return: headers of the image files, or ``None`` if the image is already loaded, packed, not stored in files,
+        or any of its files could not be read.
+    """
+    if image.has_data or image.packed_file is not None or image.source not in {'FILE', 'TILED'}:
+        return None
+    filepath = os.path.normpath(bpy.path.abspath(image.filepath, library=image.library))
+    if image.source == 'TILED':
+        filepaths = [filepath.replace('<UDIM>', str(tile.number)) for tile in image.tiles]
+    else:
+        filepaths = [filepath]
+
+    headers = [probe_image(path, disk_cache) for path in filepaths]
+    if not headers or any(header is None for header in headers):
+        return None
+    return headers
+
+
+def get_image_stats(image: bpy.types.Image, image_stats: dict[bpy.types.Image, tuple[int, float]],
+                    disk_cache: FingerprintCache = None) -> tuple[int, float]:
+    """Gets the largest dimension and estimated memory of an image, summing all UDIM tiles of tiled images.
+
+    Images not loaded yet are measured from their file headers, so their pixels are not loaded.
+
+    :param image: Blender image
+    :param image_stats: stats of images already measured, filled as images are found.
+    :param disk_cache: persistent cache of file headers from previous sessions.
+    :return: tuple of the largest width or height, and the estimated memory in bytes.
+    """
+    if image not in image_stats:
+        use_half_precision = getattr(image, 'use_half_precision', False)
+        with instrumentation.stage('read image headers'):
+            headers = read_image_file_headers(image, disk_cache)
+        if headers is not None:
+            tile_formats = [(header.width, header.height, header.channels, header.is_float) for header in headers]
+        else:
+            if image.source == 'TILED' and len(image.tiles) > 0:
+                tile_sizes = [tuple(getattr(tile, 'size', image.size)) for tile in image.tiles]
+            else:
+                tile_sizes = [tuple(image.size)]
+            tile_formats = [(width, height, image.channels, image.is_float) for width, height in tile_sizes]
+
+        image_stats[image] = (
+            max(max(width, height) for width, height, _channels, _is_float in tile_formats),
+            sum(estimate_texture_bytes(*tile_format, use_half_precision) for tile_format in tile_formats),
+        )
+    return image_stats[image]
+
+
+def fill_material_cache_item(material_cache: NodeCache, material: bpy.types.Material,
+                             node_group_cache: NodeGroupCache, fingerprint_cache: dict[bpy.types.NodeTree, str] = None,
+                             shared_stats: dict[str, tuple] = None,
+                             image_stats: dict[bpy.types.Image, tuple[int, float]] = None,
+                             disk_cache: FingerprintCache = None) -> bool:
+    """Writes the node stats of a material into its cache entry.
+
+    :param material_cache: cache entry to fill
+    :param material: material using nodes
+    :param node_group_cache: nodes used per node group, shared between node trees.
+    :param fingerprint_cache: node tree fingerprints, shared between node trees.
+    :param shared_stats: stats of materials already analyzed, by fingerprint.
+    :param image_stats: size and memory of images, shared between materials so each image is only measured once.
+    :param disk_cache: persistent cache of node tree stats and image headers from previous sessions.
+    :return: whether the stats were reused from ``shared_stats`` instead of analyzed.
+    """
+    with instrumentation.stage('fingerprint'):
+        fingerprint = get_node_tree_fingerprint(material.node_tree,
+                                                {} if fingerprint_cache is None else fingerprint_cache)
+    material_cache.name = material.name
+    material_cache.fingerprint = fingerprint
+    if shared_stats is not None and fingerprint in shared_stats:
+        (material_cache.nodes_used, material_cache.max_texture_size,
+         material_cache.texture_memory) = shared_stats[fingerprint]
+        return True
+
+    node_count, image_cache = get_node_tree_stats(material.node_tree, fingerprint, node_group_cache, disk_cache)
+    if image_stats is None:
+        image_stats = dict()
+    texture_stats = [get_image_stats(image, image_stats, disk_cache) for image in image_cache]
+
+    material_cache.nodes_used = node_count
+    material_cache.max_texture_size = max([size for size, _memory in texture_stats], default=0)
+    material_cache.texture_memory = sum([memory for _size, memory in texture_stats])
+    if shared_stats is not None:
+        shared_stats[fingerprint] = (material_cache.nodes_used, material_cache.max_texture_size,
+                                     material_cache.texture_memory)
+    return False
+
+
+def fill_geometry_cache_item(geometry_cache: NodeCache, geometry_node_tree: bpy.types.NodeTree,
+                             node_group_cache: NodeGroupCache, fingerprint_cache: dict[bpy.types.NodeTree, str] = None,
+                             disk_cache: FingerprintCache = None):
+    """Writes the node stats of a geometry node tree into its cache entry.
+
+    :param geometry_cache: cache entry to fill
+    :param geometry_node_tree: geometry node tree
+    :param node_group_cache: nodes used per node group, shared between node trees.
+    :param fingerprint_cache: node tree fingerprints, shared between node trees.
+    :param disk_cache: persistent cache of node tree stats from previous sessions.
+    """
+    with instrumentation.stage('fingerprint'):
+        fingerprint = get_node_tree_fingerprint(geometry_node_tree,
+                                                {} if fingerprint_cache is None else fingerprint_cache)
+    node_count, _image_cache = get_node_tree_stats(geometry_node_tree, fingerprint, node_group_cache, disk_cache)
+    geometry_cache.name = geometry_node_tree.name
+    geometry_cache.nodes_used = node_count
+    geometry_cache.fingerprint = fingerprint
+
+
+def set_duplicate_counts(node_caches: bpy.types.bpy_prop_collection):
+    """Counts, for each cache entry, how many other entries share its node tree fingerprint.
+
+    :param node_caches: material or geometry node cache collection
+    """
+    fingerprint_counts = Counter(node_cache.fingerprint for node_cache in node_caches if node_cache.fingerprint)
+    for node_cache in node_caches:
+        node_cache.duplicate_count = max(fingerprint_counts[node_cache.fingerprint] - 1, 0)
+
+
+def get_scene_materials(scene: bpy.types.Scene) -> set[bpy.types.Material]:
+    """Returns all node-based materials used by objects in the scene.
+
+    :param scene: Blender scene
+    """
+    return {
+        material_slot.material
+        for object in scene.objects
+        for material_slot in object.material_slots
+        if material_slot.material and material_slot.material.use_nodes
+    }
+
+
+def get_geometry_node_trees() -> Iterator[bpy.types.NodeTree]:
+    """Returns all geometry node trees in the file."""
+    return (node_tree for node_tree in bpy.data.node_groups if node_tree.bl_idname == 'GeometryNodeTree')
+
+
+def refresh_node_caches(context: bpy.types.Context, disk_cache: FingerprintCache = None) -> RefreshSteps:
+    """Clears and refills the material and geometry node caches.
+
+    Node trees that fail to update are recorded as failures of the ``'Nodes'`` pass, see :mod:`instrumentation`.
+
+    :param context: Blender context
+    :param disk_cache: persistent cache of node tree stats and image headers from previous sessions.
+    :return: refresh generator.
+    """
+    instrumentation.begin_pass('Nodes')
+    window_manager = context.window_manager
+    window_manager.sa_material_cache.clear()
+    window_manager.sa_geometry_cache.clear()
+
+    materials = get_scene_materials(context.scene)
+    geometry_node_trees = list(get_geometry_node_trees())
+    total = len(materials) + len(geometry_node_trees)
+
+    node_group_cache = dict()
+    fingerprint_cache = dict()
+    shared_stats = dict()
+    image_stats = dict()
+    for idx, material in enumerate(materials):
+        new_material_cache: NodeCache = window_manager.sa_material_cache.add()
+        try:
+            fill_material_cache_item(new_material_cache, material, node_group_cache, fingerprint_cache, shared_stats,
+                                     image_stats, disk_cache)
+        except Exception as e:
+            instrumentation.record_failure(material.name, e)
+            window_manager.sa_material_cache.remove(len(window_manager.sa_material_cache) - 1)
+        yield idx + 1, total
+    with instrumentation.stage('duplicate counts', len(window_manager.sa_material_cache)):
+        set_duplicate_counts(window_manager.sa_material_cache)
+    window_manager.sa_texture_memory_total = sum([memory for _size, memory in image_stats.values()])
+
+    for idx, geometry_node_tree in enumerate(geometry_node_trees, start=len(materials)):
+        new_data: NodeCache = window_manager.sa_geometry_cache.add()
+        try:
+            fill_geometry_cache_item(new_data, geometry_node_tree, node_group_cache, fingerprint_cache, disk_cache)
+        except Exception as e:
+            instrumentation.record_failure(geometry_node_tree.name, e)
+            window_manager.sa_geometry_cache.remove(len(window_manager.sa_geometry_cache) - 1)
+        yield idx + 1, total
+    with instrumentation.stage('duplicate counts', len(window_manager.sa_geometry_cache)):
+        set_duplicate_counts(window_manager.sa_geometry_cache)
+
+
 class SA_OT_RefreshNodes(bpy.types.Operator):
     """Refreshes all node caches."""
     bl_idname = 'scene_analyzer.refresh_nodes'
@@ -71,51 +427,8 @@ class SA_OT_RefreshNodes(bpy.types.Operator):
     bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
-        window_manager = context.window_manager
-        window_manager.sa_material_cache.clear()
-
-        materials = {
-            material_slot.material
-            for object in context.scene.objects
-            for material_slot in object.material_slots
-            if material_slot.material and material_slot.material.use_nodes
-        }
-
-        failed_node_trees = []
-        node_group_cache = dict()
-        for material in materials:
-            node_tree = material.node_tree
-            total_nodes = set()
-            image_cache = set()
-            for output in get_output_nodes(node_tree):
-                total_nodes.update(get_nodes_used(output, node_group_cache, image_cache))
-
-            texture_size = max(
-                [
-                    max(image.size)
-                    for image in image_cache
-                ],
-                default=0
-            )
-            new_material_cache: NodeCache = window_manager.sa_material_cache.add()
-            new_material_cache.name = material.name
-            new_material_cache.nodes_used = len(total_nodes)
-            new_material_cache.max_texture_size = texture_size
-
-        window_manager.sa_geometry_cache.clear()
-        geo_node_trees = (node_tree for node_tree in bpy.data.node_groups if node_tree.bl_idname == 'GeometryNodeTree')
-        for geometry_node_tree in geo_node_trees:
-            total_nodes = set()
-            for output in get_output_nodes(geometry_node_tree):
-                total_nodes.update(get_nodes_used(output, node_group_cache, set()))
-            new_data: NodeCache = window_manager.sa_geometry_cache.add()
-            new_data.name = geometry_node_tree.name
-            new_data.nodes_used = len(total_nodes)
-
-        if failed_node_trees:
-            self.report({'WARNING'}, 'Some node trees failed to update (see console)')
-            print(''.join([
-                '\n\t{} ({})'.format(tree_name, e)
-                for tree_name, e in failed_node_trees
-            ]))
+        disk_cache = open_disk_cache(context)
+        run_steps(refresh_node_caches(context, disk_cache))
+        close_disk_cache(self, disk_cache)
+        report_failures(self, 'Nodes')
         return {'FINISHED'}
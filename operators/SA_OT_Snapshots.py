@@ -0,0 +1,169 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import heapq
+import os
+
+import bpy
+from bpy_extras.io_utils import ImportHelper
+
+from ..model import snapshots
+from ..model.rows import get_scene_totals, iter_tables
+from ..snapshot import diff_packed, iter_snapshot_tables, load_snapshot, pack_tables, rank_changes
+
+MAX_DIFF_ROWS = 500
+"""Largest changes, additions and removals listed by the diff tables, the counts above them include all rows."""
+
+
+def pack_current_tables(window_manager: bpy.types.WindowManager) -> dict:
+    """Packs the tables as they are now, see :func:`snapshot.pack_tables`."""
+    return pack_tables(iter_tables(window_manager), get_scene_totals(window_manager), bpy.data.filepath)
+
+
+def get_packed_snapshot(window_manager: bpy.types.WindowManager, name: str) -> dict | None:
+    """Returns a stored snapshot by name, or the current tables packed for :data:`snapshots.CURRENT_TABLES`."""
+    if name == snapshots.CURRENT_TABLES:
+        return pack_current_tables(window_manager)
+    return snapshots.get_snapshot(name)
+
+
+def update_diff_caches(window_manager: bpy.types.WindowManager, _ctx=None):
+    """Refills the diff tables from the last diff, ranked and filtered by the window manager's diff settings."""
+    diff_cache = window_manager.sa_snapshot_diff_cache
+    change_cache = window_manager.sa_snapshot_change_cache
+    diff_cache.clear()
+    change_cache.clear()
+    diff = snapshots.get_diff()
+    if diff is None:
+        return
+
+    table_filter = window_manager.sa_snapshot_diff_table
+    changes, added, removed = diff
+    if table_filter != 'ALL':
+        changes = [change for change in changes if change[0] == table_filter]
+
+    for table_name, name, field, base_value, value in rank_changes(changes, window_manager.sa_snapshot_diff_rank,
+                                                                   MAX_DIFF_ROWS):
+        new_data = diff_cache.add()
+        new_data.name = name
+        new_data.table = table_name
+        new_data.field = field
+        new_data.base_value = base_value
+        new_data.value = value
+
+    for is_added, rows in ((True, added), (False, removed)):
+        if table_filter != 'ALL':
+            rows = [row for row in rows if row[0] == table_filter]
+        for table_name, name, field, value in heapq.nlargest(MAX_DIFF_ROWS, rows, key=lambda row: abs(row[3])):
+            new_data = change_cache.add()
+            new_data.name = name
+            new_data.table = table_name
+            new_data.is_added = is_added
+            new_data.field = field
+            new_data.value = value
+
+
+class SA_OT_TakeSnapshot(bpy.types.Operator):
+    """Stores the current tables as a named snapshot, to compare them with later analyses."""
+    bl_idname = 'scene_analyzer.take_snapshot'
+    bl_label = 'Take snapshot'
+    bl_description = ('Store the current mesh, collection, material and geometry node stats as a named snapshot, '
+                      'to compare them after making changes')
+    bl_options = {'REGISTER'}
+
+    name: bpy.props.StringProperty(name='Name', description='Snapshot name, replacing any snapshot of the same name',
+                                   default='')
+
+    def invoke(self, context, event):
+        self.name = 'Snapshot {}'.format(len(snapshots.get_snapshot_names()) + 1)
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        name = self.name or 'Snapshot {}'.format(len(snapshots.get_snapshot_names()) + 1)
+        snapshots.add_snapshot(name, pack_current_tables(context.window_manager))
+        context.window_manager.sa_snapshot_base = name
+        self.report({'INFO'}, 'Stored snapshot "{}"'.format(name))
+        return {'FINISHED'}
+
+
+class SA_OT_LoadSnapshot(bpy.types.Operator, ImportHelper):
+    """Loads a snapshot written by the budget gate, e.g. of the last published version."""
+    bl_idname = 'scene_analyzer.load_snapshot'
+    bl_label = 'Load snapshot'
+    bl_description = 'Load a snapshot written by the budget gate script, to compare it with other snapshots'
+    bl_options = {'REGISTER'}
+
+    filename_ext = '.json'
+    filter_glob: bpy.props.StringProperty(default='*.json', options={'HIDDEN'})
+
+    def execute(self, context):
+        try:
+            snapshot = load_snapshot(self.filepath)
+        except (OSError, ValueError) as e:
+            self.report({'ERROR'}, 'Could not load snapshot: {}'.format(e))
+            return {'CANCELLED'}
+
+        name = os.path.splitext(os.path.basename(self.filepath))[0]
+        snapshots.add_snapshot(name, pack_tables(iter_snapshot_tables(snapshot), snapshot['totals'],
+                                                 snapshot['source']))
+        context.window_manager.sa_snapshot_base = name
+        self.report({'INFO'}, 'Loaded snapshot "{}"'.format(name))
+        return {'FINISHED'}
+
+
+class SA_OT_RemoveSnapshot(bpy.types.Operator):
+    """Removes the snapshot compared from."""
+    bl_idname = 'scene_analyzer.remove_snapshot'
+    bl_label = 'Remove snapshot'
+    bl_description = 'Remove the snapshot compared from'
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        return snapshots.get_snapshot(context.window_manager.sa_snapshot_base) is not None
+
+    def execute(self, context):
+        wm = context.window_manager
+        snapshots.remove_snapshot(wm.sa_snapshot_base)
+        for prop_name in ('sa_snapshot_base', 'sa_snapshot_compare'):
+            if snapshots.get_snapshot(getattr(wm, prop_name)) is None:
+                setattr(wm, prop_name, snapshots.CURRENT_TABLES)
+        return {'FINISHED'}
+
+
+class SA_OT_CompareSnapshots(bpy.types.Operator):
+    """Diffs two snapshots, listing changed values and added and removed rows."""
+    bl_idname = 'scene_analyzer.compare_snapshots'
+    bl_label = 'Compare'
+    bl_description = ('List the objects, collections, materials and node trees that changed between two snapshots, '
+                      'ranked by their change')
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        wm = context.window_manager
+        base = get_packed_snapshot(wm, wm.sa_snapshot_base)
+        current = get_packed_snapshot(wm, wm.sa_snapshot_compare)
+        if base is None or current is None:
+            self.report({'WARNING'}, 'Take a snapshot to compare with first')
+            return {'CANCELLED'}
+
+        diff = diff_packed(base, current)
+        totals = [(field, base['totals'][field], value) for field, value in current['totals'].items()
+                  if field in base['totals']]
+        snapshots.set_diff(diff, totals)
+        update_diff_caches(wm)
+        changes, added, removed = diff
+        self.report({'INFO'}, '{} changed values, {} rows added, {} removed'.format(len(changes), len(added),
+                                                                                     len(removed)))
+        return {'FINISHED'}
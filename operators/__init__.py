@@ -1,17 +1,54 @@
+import bpy
+
 from .. import register_all
 from .. import unregister_all
 
 from .SA_OT_RefreshAll import SA_OT_RefreshAll
-from .SA_OT_RefreshMeshes import SA_OT_RefreshMeshes
+from .SA_OT_RefreshAllModal import SA_OT_RefreshAllModal
+from .SA_OT_RefreshMeshes import SA_OT_RefreshMeshes, clear_mesh_stats
 from .SA_OT_RefreshCollections import SA_OT_RefreshCollections
+from .SA_OT_RefreshInstances import SA_OT_RefreshInstances
 from .SA_OT_RefreshNodes import SA_OT_RefreshNodes
+from .SA_OT_AnalyzeCamera import SA_OT_AnalyzeCamera
+from .SA_OT_AnalyzeTimeline import SA_OT_AnalyzeTimeline, SA_OT_ExportTimeline
+from .SA_OT_CopyRefreshReport import SA_OT_CopyRefreshReport
+from .SA_OT_ExportStats import SA_OT_ExportStats
+from .SA_OT_ProfileEvaluation import SA_OT_ProfileEvaluation
+from .SA_OT_ProfileModifiers import SA_OT_ProfileModifiers
+from .SA_OT_Snapshots import (SA_OT_CompareSnapshots, SA_OT_LoadSnapshot, SA_OT_RemoveSnapshot,
+                              SA_OT_TakeSnapshot)
+from .step_util import toggle_instrumentation
+from ..model.snapshots import get_snapshot_items
 
-_register_order = (SA_OT_RefreshMeshes, SA_OT_RefreshCollections, SA_OT_RefreshNodes, SA_OT_RefreshAll)
+_register_order = (SA_OT_RefreshMeshes, SA_OT_RefreshCollections, SA_OT_RefreshInstances, SA_OT_RefreshNodes,
+                   SA_OT_RefreshAll, SA_OT_RefreshAllModal, SA_OT_ProfileModifiers,
+                   SA_OT_ProfileEvaluation, SA_OT_AnalyzeTimeline, SA_OT_ExportTimeline,
+                   SA_OT_AnalyzeCamera, SA_OT_ExportStats, SA_OT_CopyRefreshReport,
+                   SA_OT_TakeSnapshot, SA_OT_LoadSnapshot, SA_OT_RemoveSnapshot, SA_OT_CompareSnapshots)
+_register_props = (('sa_is_refreshing', bpy.props.BoolProperty(default=False, options={'SKIP_SAVE'})),
+                   ('sa_refresh_progress', bpy.props.FloatProperty(name='Progress', default=0.0, min=0.0, max=1.0,
+                                                                   subtype='FACTOR', options={'SKIP_SAVE'})),
+                   ('sa_refresh_status', bpy.props.StringProperty(default='', options={'SKIP_SAVE'})),
+                   ('sa_instrumentation', bpy.props.BoolProperty(name='Time Stages',
+                                                                 description='Record the time spent in each stage '
+                                                                             'of the refresh passes',
+                                                                 default=False, options={'SKIP_SAVE'},
+                                                                 update=toggle_instrumentation)),
+                   ('sa_snapshot_base', bpy.props.EnumProperty(name='From',
+                                                               description='Snapshot to compare from',
+                                                               items=get_snapshot_items, options={'SKIP_SAVE'})),
+                   ('sa_snapshot_compare', bpy.props.EnumProperty(name='To',
+                                                                  description='Snapshot to compare with it',
+                                                                  items=get_snapshot_items, options={'SKIP_SAVE'})))
 
 
 def register():
-    register_all(_register_order)
+    register_all(_register_order, _register_props)
+    if clear_mesh_stats not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(clear_mesh_stats)
 
 
 def unregister():
+    if clear_mesh_stats in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(clear_mesh_stats)
     unregister_all(_register_order[::-1])
@@ -0,0 +1,90 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import hashlib
+import os
+
+import bpy
+
+from ..fingerprint_cache import FingerprintCache
+from ..model import instrumentation
+
+SIDECAR_SUFFIX = '.sa_cache.json'
+"""Appended to the path of a .blend file to name its sidecar cache file."""
+
+
+def get_user_cache_dir() -> str:
+    """Returns the directory of cache files in Blender's user resources."""
+    try:
+        return bpy.utils.extension_path_user(__package__.rpartition('.')[0], path='cache', create=True)
+    except (AttributeError, ValueError):  # before Blender 4.2, or installed as a legacy add-on
+        return os.path.join(bpy.utils.user_resource('CONFIG'), 'scene_complexity', 'cache')
+
+
+def get_disk_cache_path(context: bpy.types.Context) -> str | None:
+    """Returns the path of the persistent cache file, depending on the chosen cache location.
+
+    Sidecar caches are stored next to the .blend file, so they follow the file when it is moved or shared.
+    User caches are shared by all files, as their keys only depend on the data they describe.
+
+    :param context: Blender context
+    :return: file path, or ``None`` if caching is disabled or the .blend file is not saved for a sidecar cache.
+    """
+    location = context.window_manager.sa_disk_cache_location
+    if location == 'SIDECAR':
+        return bpy.data.filepath + SIDECAR_SUFFIX if bpy.data.filepath else None
+    if location == 'USER':
+        return os.path.join(get_user_cache_dir(), 'fingerprints.json')
+    return None
+
+
+def open_disk_cache(context: bpy.types.Context) -> FingerprintCache | None:
+    """Loads the persistent cache, if enabled.
+
+    :param context: Blender context
+    :return: loaded cache, or ``None`` if caching is disabled.
+    """
+    path = get_disk_cache_path(context)
+    if path is None:
+        return None
+    return FingerprintCache(path, context.window_manager.sa_disk_cache_max_entries).load()
+
+
+def close_disk_cache(operator: bpy.types.Operator, disk_cache: FingerprintCache | None):
+    """Saves the persistent cache, reporting corrupt or unwritable cache files.
+
+    Problems are reported to the operator and recorded as failures of the ``'Analysis cache'`` pass,
+    so they are listed in the refresh report.
+
+    :param operator: operator to report to
+    :param disk_cache: cache opened by :func:`open_disk_cache`, or ``None``.
+    """
+    if disk_cache is None:
+        return
+    instrumentation.begin_pass('Analysis cache')
+    if disk_cache.load_error is not None:
+        instrumentation.record_failure(disk_cache.path, 'unreadable, reset ({})'.format(disk_cache.load_error))
+        operator.report({'WARNING'}, 'Analysis cache {} was unreadable and has been reset'.format(disk_cache.path))
+    if not disk_cache.save():
+        instrumentation.record_failure(disk_cache.path, 'could not be written')
+        operator.report({'WARNING'}, 'Could not write analysis cache to {}'.format(disk_cache.path))
+
+
+def hash_bytes(*buffers) -> str:
+    """Returns a short hexadecimal digest of several buffers, such as NumPy arrays read with ``foreach_get``."""
+    hasher = hashlib.blake2b(digest_size=16)
+    for buffer in buffers:
+        hasher.update(memoryview(buffer).cast('B'))
+    return hasher.hexdigest()
@@ -0,0 +1,38 @@
+from typing import Generator
+
+from ..model import instrumentation
+from ..model.generation import bump_cache_generation
+
+RefreshSteps = Generator[tuple[int, int], None, object]
+"""Generator refreshing a cache one row at a time, yielding ``(rows_done, total_rows)`` after each row.
+Its return value is specific to each cache."""
+
+
+def run_steps(steps: RefreshSteps):
+    """Runs all steps of a refresh generator, then marks data derived from the caches as stale.
+
+    :param steps: refresh generator
+    :return: return value of the generator.
+    """
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            bump_cache_generation()
+            return stop.value
+
+
+def toggle_instrumentation(window_manager, _context):
+    """Update callback of the instrumentation setting."""
+    instrumentation.set_enabled(window_manager.sa_instrumentation)
+
+
+def report_failures(operator, *refresh_passes: str):
+    """Reports items of refresh passes that failed to update, which are listed in the panel's refresh report.
+
+    :param operator: operator to report to
+    :param refresh_passes: names of the passes run by the operator
+    """
+    failures = [failure for refresh_pass in refresh_passes for failure in instrumentation.get_failures(refresh_pass)]
+    if failures:
+        operator.report({'WARNING'}, '{} items failed to update (see Refresh Report)'.format(len(failures)))
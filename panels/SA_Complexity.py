@@ -15,8 +15,10 @@
 
 import bpy
 
-from ..model.CacheGroups import MeshObjectCache, CollectionCache, NodeCache
-from .formatting_util import format_num
+from ..model.CacheGroups import (MeshObjectCache, ModifierCache, CollectionCache, InstancerCache, NodeCache,
+                                 TimelineFrameCache, SnapshotDiffCache, SnapshotChangeCache)
+from .filter_cache import get_cached_filter, get_filter_key, get_scene_stamp, set_cached_filter
+from .formatting_util import format_bytes, format_change, format_num, format_time, format_value
 
 
 class SA_UL_MeshComplexity(bpy.types.UIList):
@@ -33,12 +35,23 @@ class SA_UL_MeshComplexity(bpy.types.UIList):
         default=False
     )
     """Toggle to only show selected object."""
+    is_in_camera: bpy.props.BoolProperty(
+        name="In Camera Only",
+        description="Only show objects in the scene camera's view, once analyzed",
+        default=False
+    )
+    """Toggle to only show objects covering pixels of the camera view."""
 
     def draw_item(self, context, layout, data, mesh_obj_cache: MeshObjectCache, icon, active_data, active_propname,
                   index):
         layout.label(text=mesh_obj_cache.name)
         layout.label(text=format_num(mesh_obj_cache.tris), icon='MESH_DATA')
         layout.label(text=format_num(mesh_obj_cache.verts), icon='VERTEXSEL')
+        layout.label(text=format_time(mesh_obj_cache.eval_time_median), icon='TIME')
+        layout.label(text=format_time(mesh_obj_cache.eval_time_p95), icon='SORTTIME')
+        layout.label(text=format_num(int(mesh_obj_cache.screen_area)), icon='CAMERA_DATA')
+        layout.label(text=str(round(mesh_obj_cache.tris_per_pixel, 2)), icon='VIEW_ZOOM')
+        layout.label(text=format_bytes(mesh_obj_cache.memory_bytes), icon='MEMORY')
 
         layout.label(text=format_num(mesh_obj_cache.modifier_count), icon='MODIFIER')
 
@@ -50,36 +63,100 @@ class SA_UL_MeshComplexity(bpy.types.UIList):
         row.prop(self, 'filter_name', text='')
         row.prop(self, 'is_visible', text='', icon='HIDE_OFF')
         row.prop(self, 'is_selected', text='', icon='RESTRICT_SELECT_OFF')
+        row.prop(self, 'is_in_camera', text='', icon='CAMERA_DATA')
 
     def filter_items(self, context, data, propname):
         all_mesh_objects = getattr(data, propname)
-        obj_data = [bpy.data.objects[mesh_obj.name] for mesh_obj in all_mesh_objects]
-        helper_funcs = bpy.types.UI_UL_list
+        sort_value = context.window_manager.mesh_cache_sort_value
+        uses_scene_state = self.is_visible or self.is_selected
+        key = get_filter_key(self, all_mesh_objects, sort_value, self.is_visible, self.is_selected, self.is_in_camera,
+                             get_scene_stamp() if uses_scene_state else 0)
+        cached = get_cached_filter(self, propname, key)
+        if cached is not None:
+            return cached
 
-        # Default return values.
-        flt_flags = []
+        helper_funcs = bpy.types.UI_UL_list
 
         # Filtering by name
         if self.filter_name:
             flt_flags = helper_funcs.filter_items_by_name(self.filter_name, self.bitflag_filter_item,
                                                           all_mesh_objects, 'name')
+        else:
+            flt_flags = [self.bitflag_filter_item] * len(all_mesh_objects)
 
-        if not flt_flags:
-            if self.is_visible or self.is_selected:
-                flt_flags = [0 if (self.is_visible and not obj_data[idx].visible_get()) or (
-                            self.is_selected and not obj_data[idx].select_get()) else self.bitflag_filter_item for
-                             idx, coll in enumerate(all_mesh_objects)]
-            else:
-                flt_flags = [self.bitflag_filter_item] * len(all_mesh_objects)
+        if self.is_in_camera:
+            flt_flags = [0 if mesh_obj.screen_area == 0 else flt_flags[idx]
+                         for idx, mesh_obj in enumerate(all_mesh_objects)]
+
+        if uses_scene_state:
+            for idx, mesh_obj in enumerate(all_mesh_objects):
+                obj = bpy.data.objects.get(mesh_obj.name)
+                if obj is None or (self.is_visible and not obj.visible_get()) or (
+                        self.is_selected and not obj.select_get()):
+                    flt_flags[idx] = 0
 
-        sort_value = context.window_manager.mesh_cache_sort_value
         _sort = [(idx, getattr(it, sort_value, '')) for idx, it in enumerate(all_mesh_objects)]
         if sort_value == 'name':
             flt_neworder = helper_funcs.sort_items_helper(_sort, lambda e: e[1].lower())
         else:
             flt_neworder = helper_funcs.sort_items_helper(_sort, lambda e: e[1], True)
 
-        return flt_flags, flt_neworder
+        return set_cached_filter(self, propname, key, (flt_flags, flt_neworder))
+
+
+class SA_UL_ModifierComplexity(bpy.types.UIList):
+    """UI list to display all modifiers on mesh objects by their evaluation time and added geometry."""
+    is_measured: bpy.props.BoolProperty(
+        name='Measured Only',
+        description='Only show modifiers whose added geometry was measured',
+        default=False
+    )
+    """Toggle to only show modifiers of objects evaluated one modifier at a time."""
+
+    def draw_item(self, context, layout, data, modifier_cache: ModifierCache, icon, active_data, active_propname,
+                  index):
+        layout.label(text=modifier_cache.name)
+        layout.label(text=format_time(modifier_cache.execution_time), icon='TIME')
+        if modifier_cache.is_measured:
+            layout.label(text=format_num(modifier_cache.tris_added), icon='MESH_DATA')
+            layout.label(text=format_num(modifier_cache.verts_added), icon='VERTEXSEL')
+        else:
+            layout.label(text='-', icon='MESH_DATA')
+            layout.label(text='-', icon='VERTEXSEL')
+
+    def draw_filter(self, context, layout):
+        row = layout.row()
+        row.prop(self, 'filter_name', text='')
+        row.prop(self, 'is_measured', text='', icon='MODIFIER')
+
+    def filter_items(self, context, data, propname):
+        all_modifiers = getattr(data, propname)
+        sort_value = context.window_manager.modifier_cache_sort_value
+        key = get_filter_key(self, all_modifiers, sort_value, self.is_measured)
+        cached = get_cached_filter(self, propname, key)
+        if cached is not None:
+            return cached
+
+        helper_funcs = bpy.types.UI_UL_list
+
+        # Filtering by name
+        if self.filter_name:
+            flt_flags = helper_funcs.filter_items_by_name(self.filter_name, self.bitflag_filter_item,
+                                                          all_modifiers, 'name')
+        else:
+            flt_flags = [self.bitflag_filter_item] * len(all_modifiers)
+
+        if self.is_measured:
+            flt_flags = [0 if not modifier_cache.is_measured else flt_flags[idx]
+                         for idx, modifier_cache in enumerate(all_modifiers)]
+
+        _sort = [(idx, getattr(it, sort_value, '')) for idx, it in enumerate(all_modifiers)]
+        if sort_value == 'name':
+            flt_neworder = helper_funcs.sort_items_helper(_sort, lambda e: e[1].lower())
+        else:
+            flt_neworder = helper_funcs.sort_items_helper(_sort, lambda e: e[1], True)
+
+        return set_cached_filter(self, propname, key, (flt_flags, flt_neworder))
 
 
 class SA_UL_CollectionComplexity(bpy.types.UIList):
@@ -101,6 +178,9 @@ class SA_UL_CollectionComplexity(bpy.types.UIList):
         layout.label(text=coll_cache.name)
         layout.label(text=format_num(coll_cache.total_tris), icon='MESH_DATA')
         layout.label(text=format_num(coll_cache.total_verts), icon='VERTEXSEL')
+        layout.label(text=format_num(coll_cache.recursive_tris), icon='OUTLINER_COLLECTION')
+        layout.label(text=format_num(coll_cache.recursive_verts), icon='VERTEXSEL')
+        layout.label(text=format_num(int(coll_cache.instanced_tris)), icon='OUTLINER_OB_GROUP_INSTANCE')
 
         layout.label(text=format_num(coll_cache.instance_count), icon='OUTLINER_OB_GROUP_INSTANCE')
 
@@ -112,6 +192,12 @@ class SA_UL_CollectionComplexity(bpy.types.UIList):
 
     def filter_items(self, context, data, propname):
         all_collections = getattr(data, propname)
+        sort_value = context.window_manager.collection_cache_sort_value
+        key = get_filter_key(self, all_collections, sort_value, self.is_visible, self.is_instanced)
+        cached = get_cached_filter(self, propname, key)
+        if cached is not None:
+            return cached
+
         helper_funcs = bpy.types.UI_UL_list
 
         # Default return values.
@@ -131,18 +217,61 @@ class SA_UL_CollectionComplexity(bpy.types.UIList):
             for idx, coll in enumerate(all_collections)
         ]
 
-        sort_value = context.window_manager.collection_cache_sort_value
         _sort = [(idx, getattr(it, sort_value, '')) for idx, it in enumerate(all_collections)]
         if sort_value == 'name':
             flt_neworder = helper_funcs.sort_items_helper(_sort, lambda e: e[1].lower())
         else:
             flt_neworder = helper_funcs.sort_items_helper(_sort, lambda e: e[1], True)
 
-        return flt_flags, flt_neworder
+        return set_cached_filter(self, propname, key, (flt_flags, flt_neworder))
+
+
+class SA_UL_InstancerComplexity(bpy.types.UIList):
+    """UI list to display all objects instancing meshes in a scene and the geometry they draw."""
+
+    def draw_item(self, context, layout, data, instancer_cache: InstancerCache, icon, active_data, active_propname,
+                  index):
+        layout.label(text=instancer_cache.name)
+        layout.label(text=format_num(instancer_cache.instance_count), icon='OUTLINER_OB_GROUP_INSTANCE')
+        layout.label(text=format_num(int(instancer_cache.drawn_tris)), icon='MESH_DATA')
+        layout.label(text=format_num(int(instancer_cache.drawn_verts)), icon='VERTEXSEL')
+        layout.label(text=format_num(instancer_cache.unique_tris), icon='MESH_DATA')
+        layout.label(text=format_num(instancer_cache.unique_mesh_count), icon='OUTLINER_DATA_MESH')
+
+    def filter_items(self, context, data, propname):
+        all_instancers = getattr(data, propname)
+        sort_value = context.window_manager.instancer_cache_sort_value
+        key = get_filter_key(self, all_instancers, sort_value)
+        cached = get_cached_filter(self, propname, key)
+        if cached is not None:
+            return cached
+
+        helper_funcs = bpy.types.UI_UL_list
+
+        # Filtering by name
+        if self.filter_name:
+            flt_flags = helper_funcs.filter_items_by_name(self.filter_name, self.bitflag_filter_item,
+                                                          all_instancers, 'name')
+        else:
+            flt_flags = [self.bitflag_filter_item] * len(all_instancers)
+
+        _sort = [(idx, getattr(it, sort_value, '')) for idx, it in enumerate(all_instancers)]
+        if sort_value == 'name':
+            flt_neworder = helper_funcs.sort_items_helper(_sort, lambda e: e[1].lower())
+        else:
+            flt_neworder = helper_funcs.sort_items_helper(_sort, lambda e: e[1], True)
+
+        return set_cached_filter(self, propname, key, (flt_flags, flt_neworder))
 
 
 class SA_UL_MaterialNodeComplexity(bpy.types.UIList):
     """UI list to display all material nodes in a Blender file and their complexity."""
+    is_duplicate: bpy.props.BoolProperty(
+        name='Duplicates Only',
+        description='Only show materials whose node tree is identical to another material',
+        default=False
+    )
+    """Toggle to only show materials sharing their node tree structure with another material."""
 
     def draw_item(self, context, layout, data, node_cache: NodeCache, icon, active_data, active_propname,
                   index):
@@ -153,9 +282,22 @@ class SA_UL_MaterialNodeComplexity(bpy.types.UIList):
                  ("px" if node_cache.max_texture_size < 1000 else ""),
             icon='TEXTURE_DATA'
         )
+        layout.label(text=format_bytes(node_cache.texture_memory), icon='IMAGE_DATA')
+        layout.label(text=format_num(node_cache.duplicate_count), icon='DUPLICATE')
+
+    def draw_filter(self, context, layout):
+        row = layout.row()
+        row.prop(self, 'filter_name', text='')
+        row.prop(self, 'is_duplicate', text='', icon='DUPLICATE')
 
     def filter_items(self, context, data, propname):
         all_nodes = getattr(data, propname)
+        sort_value = context.window_manager.material_cache_sort_value
+        key = get_filter_key(self, all_nodes, sort_value, self.is_duplicate)
+        cached = get_cached_filter(self, propname, key)
+        if cached is not None:
+            return cached
+
         helper_funcs = bpy.types.UI_UL_list
 
         # Default return values.
@@ -169,15 +311,22 @@ class SA_UL_MaterialNodeComplexity(bpy.types.UIList):
         if not flt_flags:
             flt_flags = [self.bitflag_filter_item] * len(all_nodes)
 
+        if self.is_duplicate:
+            flt_flags = [0 if node_cache.duplicate_count == 0 else flt_flags[idx]
+                         for idx, node_cache in enumerate(all_nodes)]
+
         if len(all_nodes) > 0:
-            sort_value = context.window_manager.material_cache_sort_value
-            _sort = [(idx, getattr(it, sort_value, '')) for idx, it in enumerate(all_nodes)]
+            if sort_value == 'duplicate_count':
+                # keep materials sharing a node tree next to each other
+                _sort = [(idx, (it.duplicate_count, it.fingerprint)) for idx, it in enumerate(all_nodes)]
+            else:
+                _sort = [(idx, getattr(it, sort_value, '')) for idx, it in enumerate(all_nodes)]
             if sort_value == 'name':
                 flt_neworder = helper_funcs.sort_items_helper(_sort, lambda e: e[1].lower())
             else:
                 flt_neworder = helper_funcs.sort_items_helper(_sort, lambda e: e[1], True)
 
-        return flt_flags, flt_neworder
+        return set_cached_filter(self, propname, key, (flt_flags, flt_neworder))
 
 
 class SA_UL_GeometryNodeComplexity(bpy.types.UIList):
@@ -190,6 +339,12 @@ class SA_UL_GeometryNodeComplexity(bpy.types.UIList):
 
     def filter_items(self, context, data, propname):
         all_nodes = getattr(data, propname)
+        sort_value = context.window_manager.geometry_cache_sort_value
+        key = get_filter_key(self, all_nodes, sort_value)
+        cached = get_cached_filter(self, propname, key)
+        if cached is not None:
+            return cached
+
         helper_funcs = bpy.types.UI_UL_list
 
         # Default return values.
@@ -204,11 +359,74 @@ class SA_UL_GeometryNodeComplexity(bpy.types.UIList):
             flt_flags = [self.bitflag_filter_item] * len(all_nodes)
 
         if len(all_nodes) > 0:
-            sort_value = context.window_manager.geometry_cache_sort_value
             _sort = [(idx, getattr(it, sort_value, '')) for idx, it in enumerate(all_nodes)]
             if sort_value == 'name':
                 flt_neworder = helper_funcs.sort_items_helper(_sort, lambda e: e[1].lower())
             else:
                 flt_neworder = helper_funcs.sort_items_helper(_sort, lambda e: e[1], True)
 
-        return flt_flags, flt_neworder
+        return set_cached_filter(self, propname, key, (flt_flags, flt_neworder))
+
+
+class SA_UL_TimelineComplexity(bpy.types.UIList):
+    """UI list to display sampled frames and the scene's complexity at each of them."""
+
+    def draw_item(self, context, layout, data, frame_cache: TimelineFrameCache, icon, active_data, active_propname,
+                  index):
+        is_peak = frame_cache.frame == context.window_manager.sa_timeline_peak_frame
+        layout.label(text=frame_cache.name, icon='KEYFRAME_HLT' if is_peak else 'KEYFRAME')
+        layout.label(text=format_num(int(frame_cache.tris)), icon='MESH_DATA')
+        layout.label(text=format_num(int(frame_cache.verts)), icon='VERTEXSEL')
+        layout.label(text=format_num(frame_cache.instance_count), icon='OUTLINER_OB_GROUP_INSTANCE')
+        layout.label(text=format_time(frame_cache.eval_time), icon='TIME')
+
+    def filter_items(self, context, data, propname):
+        all_frames = getattr(data, propname)
+        sort_value = context.window_manager.timeline_cache_sort_value
+        key = get_filter_key(self, all_frames, sort_value)
+        cached = get_cached_filter(self, propname, key)
+        if cached is not None:
+            return cached
+
+        helper_funcs = bpy.types.UI_UL_list
+
+        # Filtering by name
+        if self.filter_name:
+            flt_flags = helper_funcs.filter_items_by_name(self.filter_name, self.bitflag_filter_item,
+                                                          all_frames, 'name')
+        else:
+            flt_flags = [self.bitflag_filter_item] * len(all_frames)
+
+        _sort = [(idx, getattr(it, sort_value, '')) for idx, it in enumerate(all_frames)]
+        flt_neworder = helper_funcs.sort_items_helper(_sort, lambda e: e[1], sort_value != 'frame')
+
+        return set_cached_filter(self, propname, key, (flt_flags, flt_neworder))
+
+
+TABLE_ICONS = {'meshes': 'OBJECT_DATA', 'collections': 'OUTLINER_COLLECTION', 'materials': 'MATERIAL',
+               'geometry_nodes': 'GEOMETRY_NODES'}
+"""Icon of each diffed table."""
+
+
+class SA_UL_SnapshotDiff(bpy.types.UIList):
+    """UI list to display values that changed between two snapshots, ranked by their change."""
+
+    def draw_item(self, context, layout, data, diff_cache: SnapshotDiffCache, icon, active_data, active_propname,
+                  index):
+        layout.label(text=diff_cache.name, icon=TABLE_ICONS.get(diff_cache.table, 'QUESTION'))
+        layout.label(text=diff_cache.field)
+        layout.label(text='{} → {}'.format(format_value(diff_cache.field, diff_cache.base_value),
+                                           format_value(diff_cache.field, diff_cache.value)))
+        layout.label(text=format_change(diff_cache.field, diff_cache.base_value, diff_cache.value),
+                     icon='TRIA_UP' if diff_cache.value > diff_cache.base_value else 'TRIA_DOWN')
+
+
+class SA_UL_SnapshotChanges(bpy.types.UIList):
+    """UI list to display rows added or removed between two snapshots."""
+
+    def draw_item(self, context, layout, data, change_cache: SnapshotChangeCache, icon, active_data,
+                  active_propname, index):
+        layout.label(text=change_cache.name, icon=TABLE_ICONS.get(change_cache.table, 'QUESTION'))
+        layout.label(text='Added' if change_cache.is_added else 'Removed',
+                     icon='ADD' if change_cache.is_added else 'REMOVE')
+        layout.label(text='{}: {}'.format(change_cache.field, format_value(change_cache.field, change_cache.value)))
@@ -15,7 +15,21 @@
 
 import bpy
 
+from ..model import instrumentation, snapshots
+from ..operators.SA_OT_AnalyzeCamera import SA_OT_AnalyzeCamera
+from ..operators.SA_OT_AnalyzeTimeline import SA_OT_AnalyzeTimeline, SA_OT_ExportTimeline
+from ..operators.SA_OT_CopyRefreshReport import SA_OT_CopyRefreshReport
+from ..operators.SA_OT_ExportStats import SA_OT_ExportStats
+from ..operators.SA_OT_ProfileEvaluation import SA_OT_ProfileEvaluation
+from ..operators.SA_OT_ProfileModifiers import SA_OT_ProfileModifiers
 from ..operators.SA_OT_RefreshAll import SA_OT_RefreshAll
+from ..operators.SA_OT_RefreshAllModal import SA_OT_RefreshAllModal
+from ..operators.SA_OT_Snapshots import (SA_OT_CompareSnapshots, SA_OT_LoadSnapshot, SA_OT_RemoveSnapshot,
+                                         SA_OT_TakeSnapshot)
+from .formatting_util import format_bytes, format_change, format_num, format_time, format_value
+
+MAX_SHOWN_FAILURES = 20
+"""Failures listed by the refresh report panel, the full list can be copied from it."""
 
 
 class SA_PT_ComplexityTable(bpy.types.Panel):
@@ -29,25 +43,157 @@ class SA_PT_ComplexityTable(bpy.types.Panel):
     def draw(self, context):
         layout = self.layout
         wm = context.window_manager
-        layout.operator(SA_OT_RefreshAll.bl_idname, icon='FILE_REFRESH')
+        row = layout.row()
+        row.enabled = not wm.sa_is_refreshing
+        row.operator(SA_OT_RefreshAll.bl_idname, icon='FILE_REFRESH')
+        row.operator(SA_OT_RefreshAllModal.bl_idname, icon='TIME')
+        row.operator(SA_OT_ExportStats.bl_idname, icon='EXPORT', text='')
+        if wm.sa_is_refreshing:
+            layout.prop(wm, 'sa_refresh_progress', text='Refreshing {} (Esc to cancel)'.format(wm.sa_refresh_status),
+                        slider=True)
 
         layout.prop(wm, 'sa_apply_modifiers')
+        row = layout.row()
+        row.prop(wm, 'sa_live_update')
+        row.prop(wm, 'sa_live_update_delay')
+        row = layout.row()
+        row.prop(wm, 'sa_disk_cache_location')
+        row.prop(wm, 'sa_disk_cache_max_entries')
 
-        layout.label(text='Mesh Objects')
+        row = layout.row()
+        row.label(text='Mesh Objects (unique mesh memory: {})'.format(format_bytes(wm.sa_mesh_memory_total)))
+        row.operator(SA_OT_ProfileEvaluation.bl_idname, icon='TIME')
+        row.operator(SA_OT_AnalyzeCamera.bl_idname, icon='CAMERA_DATA')
         layout.prop(wm, 'mesh_cache_sort_value', expand=True)
-        layout.template_list('SA_UL_MeshComplexity', '', wm, 'sa_mesh_cache', wm, 'sa_mesh_active', columns=6)
+        row = layout.row(align=True)
+        row.prop(wm, 'sa_mesh_window_filter', text='', icon='VIEWZOOM')
+        row.prop(wm, 'sa_mesh_window_start')
+        row.prop(wm, 'sa_mesh_window_size')
+        layout.template_list('SA_UL_MeshComplexity', '', wm, 'sa_mesh_cache', wm, 'sa_mesh_active', columns=11)
+        layout.label(text='Showing {} of {} mesh objects'.format(len(wm.sa_mesh_cache), wm.sa_mesh_window_total))
+
+        row = layout.row()
+        row.label(text='Modifiers')
+        row.operator(SA_OT_ProfileModifiers.bl_idname, icon='MODIFIER')
+        layout.prop(wm, 'modifier_cache_sort_value', expand=True)
+        layout.template_list('SA_UL_ModifierComplexity', '', wm, 'sa_modifier_cache', wm, 'sa_modifier_active',
+                             columns=4)
 
         layout.label(text='Collections')
         layout.prop(wm, 'collection_cache_sort_value', expand=True)
         layout.template_list('SA_UL_CollectionComplexity', '', wm, 'sa_collection_cache', wm,
-                             'sa_collection_active', columns=4)
+                             'sa_collection_active', columns=7)
 
-        layout.label(text='Material Nodes')
+        layout.label(text='Instancers (drawn triangles: {}, unique: {})'.format(
+            format_num(int(wm.sa_instanced_tris_total)), format_num(int(wm.sa_instanced_unique_tris_total))))
+        layout.prop(wm, 'instancer_cache_sort_value', expand=True)
+        layout.template_list('SA_UL_InstancerComplexity', '', wm, 'sa_instancer_cache', wm,
+                             'sa_instancer_active', columns=6)
+
+        layout.label(text='Material Nodes (unique textures: {})'.format(format_bytes(wm.sa_texture_memory_total)))
         layout.prop(wm, 'material_cache_sort_value', expand=True)
         layout.template_list('SA_UL_MaterialNodeComplexity', '', wm, 'sa_material_cache',
-                             wm, 'sa_material_active', columns=2)
+                             wm, 'sa_material_active', columns=4)
 
         layout.label(text='Geometry Nodes')
         layout.prop(wm, 'geometry_cache_sort_value', expand=True)
         layout.template_list('SA_UL_GeometryNodeComplexity', '', wm, 'sa_geometry_cache',
                              wm, 'sa_geometry_active', columns=2, rows=3)
+
+        row = layout.row()
+        row.label(text='Timeline (peak frame: {})'.format(wm.sa_timeline_peak_frame) if wm.sa_timeline_cache
+                  else 'Timeline')
+        row.operator(SA_OT_AnalyzeTimeline.bl_idname, icon='TIME')
+        row.operator(SA_OT_ExportTimeline.bl_idname, icon='EXPORT', text='')
+        layout.prop(wm, 'timeline_cache_sort_value', expand=True)
+        layout.template_list('SA_UL_TimelineComplexity', '', wm, 'sa_timeline_cache', wm, 'sa_timeline_active',
+                             columns=5, rows=3)
+
+
+class SA_PT_RefreshReport(bpy.types.Panel):
+    """Sub-panel showing the time spent in each refresh stage, and items that failed to update."""
+    bl_label = 'Refresh Report'
+    bl_parent_id = 'SA_PT_ComplexityTable'
+    bl_space_type = 'PROPERTIES'
+    bl_region_type = 'WINDOW'
+    bl_context = 'scene'
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw_header(self, context):
+        self.layout.prop(context.window_manager, 'sa_instrumentation', text='')
+
+    def draw(self, context):
+        layout = self.layout
+        row = layout.row()
+        row.prop(context.window_manager, 'sa_instrumentation')
+        row.operator(SA_OT_CopyRefreshReport.bl_idname, icon='COPYDOWN', text='')
+
+        stages = instrumentation.get_stages()
+        if stages:
+            column = layout.column(align=True)
+            row = column.row()
+            for text in ('Stage', 'Time', 'Calls', 'Items', 'Per Item'):
+                row.label(text=text)
+            for stats in stages:
+                row = column.row()
+                row.label(text='{}: {}'.format(stats.refresh_pass, stats.name))
+                row.label(text=format_time(stats.seconds))
+                row.label(text=format_num(stats.calls))
+                row.label(text=format_num(stats.items))
+                row.label(text=format_time(stats.seconds / stats.items) if stats.items else '')
+        elif context.window_manager.sa_instrumentation:
+            layout.label(text='Refresh to time each stage')
+
+        failures = instrumentation.get_failures()
+        if failures:
+            column = layout.column(align=True)
+            column.label(text='{} items failed to update'.format(len(failures)), icon='ERROR')
+            for refresh_pass, item_name, error in failures[:MAX_SHOWN_FAILURES]:
+                column.label(text='{}: {} ({})'.format(refresh_pass, item_name, error))
+            if len(failures) > MAX_SHOWN_FAILURES:
+                column.label(text='and {} more'.format(len(failures) - MAX_SHOWN_FAILURES))
+
+
+class SA_PT_SnapshotDiff(bpy.types.Panel):
+    """Sub-panel comparing named snapshots of the tables, to find what got heavier between two analyses."""
+    bl_label = 'Snapshots'
+    bl_parent_id = 'SA_PT_ComplexityTable'
+    bl_space_type = 'PROPERTIES'
+    bl_region_type = 'WINDOW'
+    bl_context = 'scene'
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        layout = self.layout
+        wm = context.window_manager
+        row = layout.row()
+        row.operator(SA_OT_TakeSnapshot.bl_idname, icon='IMAGE_REFERENCE')
+        row.operator(SA_OT_LoadSnapshot.bl_idname, icon='FILE_FOLDER', text='')
+        row.operator(SA_OT_RemoveSnapshot.bl_idname, icon='TRASH', text='')
+        row = layout.row()
+        row.prop(wm, 'sa_snapshot_base')
+        row.prop(wm, 'sa_snapshot_compare')
+        row.operator(SA_OT_CompareSnapshots.bl_idname, icon='ARROW_LEFTRIGHT')
+
+        diff = snapshots.get_diff()
+        if diff is None:
+            return
+
+        column = layout.column(align=True)
+        for field, base_value, value in snapshots.get_diff_totals():
+            if value != base_value:
+                column.label(text='{}: {} → {}, {}'.format(field, format_value(field, base_value),
+                                                          format_value(field, value),
+                                                          format_change(field, base_value, value)))
+
+        changes, added, removed = diff
+        layout.prop(wm, 'sa_snapshot_diff_table', expand=True)
+        layout.prop(wm, 'sa_snapshot_diff_rank', expand=True)
+        layout.label(text='Changed values (showing {} of {})'.format(len(wm.sa_snapshot_diff_cache),
+                                                                     format_num(len(changes))))
+        layout.template_list('SA_UL_SnapshotDiff', '', wm, 'sa_snapshot_diff_cache', wm, 'sa_snapshot_diff_active',
+                             columns=4)
+        layout.label(text='Added and removed ({} added, {} removed)'.format(format_num(len(added)),
+                                                                          format_num(len(removed))))
+        layout.template_list('SA_UL_SnapshotChanges', '', wm, 'sa_snapshot_change_cache', wm,
+                             'sa_snapshot_change_active', columns=3, rows=3)
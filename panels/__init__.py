@@ -18,49 +18,118 @@ import bpy
 from .. import register_all
 from .. import unregister_all
 
-from .SA_Complexity_Tables import SA_PT_ComplexityTable
+from ..operators.SA_OT_RefreshMeshes import update_mesh_window
+from ..operators.SA_OT_Snapshots import update_diff_caches
+from . import filter_cache
+from .SA_Complexity_Tables import SA_PT_ComplexityTable, SA_PT_RefreshReport, SA_PT_SnapshotDiff
 from .SA_Complexity import SA_UL_MeshComplexity
+from .SA_Complexity import SA_UL_ModifierComplexity
 from .SA_Complexity import SA_UL_MaterialNodeComplexity
 from .SA_Complexity import SA_UL_GeometryNodeComplexity
 from .SA_Complexity import SA_UL_CollectionComplexity
+from .SA_Complexity import SA_UL_InstancerComplexity
+from .SA_Complexity import SA_UL_TimelineComplexity
+from .SA_Complexity import SA_UL_SnapshotDiff
+from .SA_Complexity import SA_UL_SnapshotChanges
 
 _register_order = (
-    SA_UL_MeshComplexity, SA_UL_MaterialNodeComplexity, SA_UL_GeometryNodeComplexity, SA_UL_CollectionComplexity,
-    SA_PT_ComplexityTable)
+    SA_UL_MeshComplexity, SA_UL_ModifierComplexity, SA_UL_MaterialNodeComplexity, SA_UL_GeometryNodeComplexity,
+    SA_UL_CollectionComplexity, SA_UL_InstancerComplexity, SA_UL_TimelineComplexity, SA_UL_SnapshotDiff,
+    SA_UL_SnapshotChanges, SA_PT_ComplexityTable, SA_PT_RefreshReport, SA_PT_SnapshotDiff)
 _register_props = (('sa_mesh_active', bpy.props.IntProperty(default=0, options={'SKIP_SAVE'})),
+                   ('sa_modifier_active', bpy.props.IntProperty(default=0, options={'SKIP_SAVE'})),
                    ('sa_collection_active', bpy.props.IntProperty(default=0, options={'SKIP_SAVE'})),
+                   ('sa_instancer_active', bpy.props.IntProperty(default=0, options={'SKIP_SAVE'})),
                    ('sa_material_active', bpy.props.IntProperty(default=0, options={'SKIP_SAVE'})),
                    ('sa_geometry_active', bpy.props.IntProperty(default=0, options={'SKIP_SAVE'})),
+                   ('sa_timeline_active', bpy.props.IntProperty(default=0, options={'SKIP_SAVE'})),
+                   ('sa_snapshot_diff_active', bpy.props.IntProperty(default=0, options={'SKIP_SAVE'})),
+                   ('sa_snapshot_change_active', bpy.props.IntProperty(default=0, options={'SKIP_SAVE'})),
 
                    ('mesh_cache_sort_value', bpy.props.EnumProperty(items=[
                        ('name', 'Name', 'Mesh object name'),
                        ('tris', 'Triangles', 'Calculated triangle count'),
                        ('verts', 'Vertices', 'Vertex count'),
+                       ('eval_time_median', 'Eval Time', 'Median time to re-evaluate the object, once profiled'),
+                       ('eval_time_p95', 'Eval P95', '95th percentile time to re-evaluate the object, once profiled'),
+                       ('screen_area', 'Screen Area', 'Pixels covered in the scene camera view, once analyzed'),
+                       ('tris_per_pixel', 'Tris/Pixel', 'Triangles per covered pixel in the scene camera view'),
+                       ('memory_bytes', 'Memory', 'Estimated memory of the mesh data, from its attributes, UV maps '
+                                                  'and shape keys'),
                        ('modifier_count', 'Modifiers', 'Total number of modifiers on object'),
                        ('material_count', 'Material', 'Total number of material slots used on object'),
                        ('material_node_count', 'Nodes', 'Total number of shader nodes used on object'),
+                   ], update=update_mesh_window)),
+                   ('sa_mesh_window_start', bpy.props.IntProperty(
+                       name='First Row', description='First mesh object shown in the table, in sort order',
+                       default=0, min=0, options={'SKIP_SAVE'}, update=update_mesh_window)),
+                   ('sa_mesh_window_size', bpy.props.IntProperty(
+                       name='Rows', description='Number of mesh objects shown in the table at once',
+                       default=200, min=10, soft_max=2000, options={'SKIP_SAVE'}, update=update_mesh_window)),
+                   ('sa_mesh_window_filter', bpy.props.StringProperty(
+                       name='Filter', description='Only show mesh objects whose name contains this text',
+                       default='', options={'SKIP_SAVE', 'TEXTEDIT_UPDATE'}, update=update_mesh_window)),
+                   ('sa_mesh_window_total', bpy.props.IntProperty(default=0, options={'SKIP_SAVE'})),
+                   ('modifier_cache_sort_value', bpy.props.EnumProperty(items=[
+                       ('name', 'Name', 'Object and modifier name'),
+                       ('execution_time', 'Time', 'Time the modifier took in its last evaluation'),
+                       ('tris_added', 'Triangles', 'Triangles added by the modifier'),
+                       ('verts_added', 'Vertices', 'Vertices added by the modifier'),
                    ])),
                    ('collection_cache_sort_value', bpy.props.EnumProperty(items=[
                        ('name', 'Name', 'Collection name'),
                        ('total_tris', 'Triangles', 'Calculated triangle count'),
                        ('total_verts', 'Vertices', 'Vertex count'),
+                       ('recursive_tris', 'Recursive Triangles', 'Triangle count including child collections'),
+                       ('recursive_verts', 'Recursive Vertices', 'Vertex count including child collections'),
+                       ('instanced_tris', 'Instanced Triangles', 'Triangles drawn by all instances of this collection'),
                        ('instance_count', 'Instances', 'Number of instances of this collection'),
                    ])),
+                   ('instancer_cache_sort_value', bpy.props.EnumProperty(items=[
+                       ('name', 'Name', 'Instancer object name'),
+                       ('instance_count', 'Instances', 'Number of mesh instances drawn by this object'),
+                       ('drawn_tris', 'Drawn Triangles', 'Triangles drawn for all instances'),
+                       ('drawn_verts', 'Drawn Vertices', 'Vertices drawn for all instances'),
+                       ('unique_tris', 'Unique Triangles', 'Triangles of the instanced meshes, each counted once'),
+                   ])),
                    ('material_cache_sort_value', bpy.props.EnumProperty(items=[
                        ('name', 'Name', 'Node tree name'),
                        ('nodes_used', 'Nodes', 'Total number of nodes used'),
                        ('max_texture_size', 'Texture Size', 'Maximum width or height of textures used within material'),
+                       ('texture_memory', 'Texture Memory', 'Estimated memory of all textures used within material'),
+                       ('duplicate_count', 'Duplicates', 'Number of other materials with an identical node tree'),
+                   ])),
+                   ('timeline_cache_sort_value', bpy.props.EnumProperty(items=[
+                       ('frame', 'Frame', 'Frame number'),
+                       ('tris', 'Triangles', 'Triangles of mesh objects and their instances'),
+                       ('verts', 'Vertices', 'Vertices of mesh objects and their instances'),
+                       ('instance_count', 'Instances', 'Number of mesh instances'),
+                       ('eval_time', 'Time', 'Time to evaluate the scene at this frame'),
                    ])),
                    ('geometry_cache_sort_value', bpy.props.EnumProperty(items=[
                        ('name', 'Name', 'Node tree name'),
                        ('nodes_used', 'Nodes', 'Total number of nodes used'),
                    ])),
+                   ('sa_snapshot_diff_rank', bpy.props.EnumProperty(name='Rank By', items=[
+                       ('ABSOLUTE', 'Absolute Change', 'Largest change in value first'),
+                       ('RELATIVE', 'Relative Change', 'Largest change relative to the value compared from first, '
+                                                       'values that were zero first'),
+                   ], options={'SKIP_SAVE'}, update=update_diff_caches)),
+                   ('sa_snapshot_diff_table', bpy.props.EnumProperty(name='Table', items=[
+                       ('ALL', 'All', 'Rows of all tables'),
+                       ('meshes', 'Objects', 'Mesh objects'),
+                       ('collections', 'Collections', 'Collections'),
+                       ('materials', 'Materials', 'Material node trees'),
+                       ('geometry_nodes', 'Geometry Nodes', 'Geometry node trees'),
+                   ], options={'SKIP_SAVE'}, update=update_diff_caches)),
                    )
 
 
 def register():
     register_all(_register_order, _register_props)
+    filter_cache.register()
 
 
 def unregister():
+    filter_cache.unregister()
     unregister_all(_register_order[::-1])
@@ -0,0 +1,83 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import bpy
+from bpy.app.handlers import persistent
+
+from ..model.generation import get_cache_generation
+
+_filter_results = {}
+"""Filter flags and order of each UI list, by list, along with the key they were computed for."""
+_scene_stamp = 0
+"""Increased whenever objects may have been selected, hidden or revealed."""
+
+
+def get_scene_stamp() -> int:
+    """Returns a stamp that changes whenever object selection or visibility may have changed."""
+    return _scene_stamp
+
+
+@persistent
+def on_depsgraph_update(scene: bpy.types.Scene, depsgraph: bpy.types.Depsgraph):
+    """Updates the scene stamp when objects, collections or the scene changed, which includes selection and
+    visibility changes."""
+    global _scene_stamp
+    if depsgraph.id_type_updated('OBJECT') or depsgraph.id_type_updated('SCENE') or \
+            depsgraph.id_type_updated('COLLECTION'):
+        _scene_stamp += 1
+
+
+def get_filter_key(ui_list: bpy.types.UIList, items: bpy.types.bpy_prop_collection, *values) -> tuple:
+    """Builds the key of a UI list's filter results from the cache generation, its name filter and given values.
+
+    :param ui_list: UI list being filtered
+    :param items: collection shown by the list
+    :param values: other settings the results depend on, such as the sort value and filter toggles.
+    """
+    return (get_cache_generation(), len(items), ui_list.filter_name) + values
+
+
+def get_cached_filter(ui_list: bpy.types.UIList, propname: str, key: tuple) -> tuple[list, list] | None:
+    """Returns the filter flags and order previously computed for a UI list, if computed for the same key.
+
+    :param ui_list: UI list being filtered
+    :param propname: name of the collection property shown by the list
+    :param key: key from :func:`get_filter_key`
+    """
+    cached = _filter_results.get((ui_list.bl_idname, ui_list.list_id, propname))
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    return None
+
+
+def set_cached_filter(ui_list: bpy.types.UIList, propname: str, key: tuple,
+                      result: tuple[list, list]) -> tuple[list, list]:
+    """Stores the filter flags and order computed for a UI list.
+
+    :return: the given result, to be returned by ``filter_items``.
+    """
+    _filter_results[(ui_list.bl_idname, ui_list.list_id, propname)] = (key, result)
+    return result
+
+
+def register():
+    if on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+
+
+def unregister():
+    if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    _filter_results.clear()
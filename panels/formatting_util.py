@@ -11,3 +11,65 @@ def format_num(num: int, decimal_places=1) -> str:
     elif num < 1000000:
         return str(round(num / 1000.0, decimal_places)) + "k"
     return str(round(num / 1000000.0, decimal_places)) + "M"
+
+
+def format_bytes(num_bytes: float) -> str:
+    """Formats byte counts with binary units.
+
+    ``format_bytes(512)`` returns "512 B". ``format_bytes(3 * 1024 ** 2)`` returns "3.0 MB".
+
+    :param num_bytes: number of bytes to be converted.
+    """
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024 or unit == 'GB':
+            break
+        num_bytes /= 1024.0
+    if unit == 'B':
+        return '{} B'.format(int(num_bytes))
+    return '{} {}'.format(round(num_bytes, 1), unit)
+
+
+def format_time(seconds: float) -> str:
+    """Formats durations with the largest fitting unit.
+
+    ``format_time(0.0042)`` returns "4.2 ms". ``format_time(2.5)`` returns "2.5 s".
+
+    :param seconds: duration to be converted.
+    """
+    if seconds < 0.001:
+        return '{} µs'.format(round(seconds * 1e6, 1))
+    if seconds < 1.0:
+        return '{} ms'.format(round(seconds * 1e3, 1))
+    return '{} s'.format(round(seconds, 1))
+
+
+BYTE_FIELDS = {'memory_bytes', 'texture_memory', 'mesh_memory'}
+"""Fields and scene totals measured in bytes."""
+
+
+def format_value(field: str, value: float) -> str:
+    """Formats a stat value with :func:`format_bytes` or :func:`format_num`, depending on its field.
+
+    :param field: field or scene total name, such as "tris" or "texture_memory".
+    :param value: value to be converted, may be negative.
+    """
+    sign = '-' if value < 0 else ''
+    if field in BYTE_FIELDS:
+        return sign + format_bytes(abs(value))
+    return sign + format_num(int(abs(value)))
+
+
+def format_change(field: str, base_value: float, value: float) -> str:
+    """Formats the change between two values of a field, with its sign and percentage.
+
+    ``format_change('tris', 2000, 2600)`` returns "+600 (+30%)".
+
+    :param field: field or scene total name
+    :param base_value: value before the change
+    :param value: value after the change
+    """
+    delta = value - base_value
+    text = ('+' if delta >= 0 else '') + format_value(field, delta)
+    if base_value:
+        text += ' ({:+.0f}%)'.format(delta / abs(base_value) * 100)
+    return text
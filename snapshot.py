@@ -0,0 +1,330 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Snapshots of all stats tables, checked against budgets and compared with a baseline snapshot.
+
+A snapshot stores each table's rows by name, along with scene-wide totals, so rows can be looked up in constant time.
+Budget checks and baseline comparisons make a single pass over each table, so they stay linear in the number of rows.
+Snapshots can also be packed into a compact form for diffs, keeping a few fields of some tables
+as sorted names and arrays of values, so two snapshots are diffed by a merge join of their names.
+Does not depend on ``bpy``, so it can also be used by the command line scripts.
+
+Budget files are JSON objects. ``"scene"`` holds limits of scene totals, and every other key names a table
+(``"objects"`` being an alias of ``"meshes"``) and maps name patterns, as used by ``fnmatch``, to limits of the
+fields of matching rows::
+
+    {
+        "scene": {"tris": 5000000, "texture_memory": 2e9},
+        "collections": {"Characters": {"recursive_tris": 1000000}},
+        "objects": {"*_LOD0": {"tris": 100000}, "*": {"memory_bytes": 5e7}},
+        "materials": {"*": {"nodes_used": 300, "texture_memory": 5.12e8}}
+    }
+"""
+
+import heapq
+import json
+import math
+import re
+from array import array
+from fnmatch import translate
+from operator import itemgetter
+from typing import Iterable
+
+SNAPSHOT_VERSION = 1
+
+TABLE_ALIASES = {'objects': 'meshes'}
+"""Alternative table names accepted in budget files."""
+
+COMPARED_FIELDS = {
+    'meshes': ('tris', 'verts', 'memory_bytes', 'material_node_count'),
+    'collections': ('recursive_tris', 'recursive_verts', 'instanced_tris'),
+    'materials': ('nodes_used', 'texture_memory'),
+    'geometry_nodes': ('nodes_used',),
+    'instancers': ('drawn_tris', 'unique_tris'),
+}
+"""Fields compared with the baseline, by table. Measured times and camera dependent fields are left out,
+as they vary between runs and machines."""
+
+
+DIFF_FIELDS = {
+    'meshes': ('tris', 'verts', 'memory_bytes', 'material_node_count'),
+    'collections': ('recursive_tris', 'recursive_verts', 'instanced_tris'),
+    'materials': ('nodes_used', 'max_texture_size', 'texture_memory'),
+    'geometry_nodes': ('nodes_used',),
+}
+"""Fields kept by packed snapshots, by table. The first field of each table ranks added and removed rows."""
+
+
+def build_snapshot(tables: Iterable[tuple[str, list[str], Iterable[tuple]]], totals: dict, source: str = '') -> dict:
+    """Builds a snapshot from tables of rows.
+
+    :param tables: tables as ``(table_name, fields, rows)``, with ``'name'`` as the first field.
+    :param totals: scene totals by name
+    :param source: file the stats were taken from
+    :return: JSON serializable snapshot
+    """
+    snapshot_tables = {}
+    for table_name, fields, rows in tables:
+        snapshot_tables[table_name] = {
+            'fields': fields[1:],
+            'rows': {row[0]: list(row[1:]) for row in rows},
+        }
+    return {'version': SNAPSHOT_VERSION, 'source': source, 'totals': dict(totals), 'tables': snapshot_tables}
+
+
+def save_snapshot(path: str, snapshot: dict):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+
+
+def load_snapshot(path: str) -> dict:
+    """Reads a snapshot written by :func:`save_snapshot`.
+
+    :raises ValueError: if the file is not a snapshot of a supported version.
+    """
+    with open(path, encoding='utf-8') as f:
+        snapshot = json.load(f)
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        raise ValueError('{} is not a snapshot of version {}'.format(path, SNAPSHOT_VERSION))
+    return snapshot
+
+
+def _violation(kind: str, table: str, name: str, field: str, value, limit) -> dict:
+    return {'kind': kind, 'table': table, 'name': name, 'field': field, 'value': value, 'limit': limit}
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_limits(where: str, limits) -> dict:
+    """Returns the limits of a budget, after checking they're a JSON object of numbers.
+
+    :param where: table and name pattern of the budget, for error messages.
+    :raises ValueError: if the limits aren't a JSON object of numbers.
+    """
+    if not isinstance(limits, dict):
+        raise ValueError('Budget of {} must be an object of field limits, not {}'.format(where, json.dumps(limits)))
+    for field, limit in limits.items():
+        if not _is_number(limit):
+            raise ValueError('Limit of {} in {} must be a number, not {}'.format(field, where, json.dumps(limit)))
+    return limits
+
+
+def check_budgets(snapshot: dict, budgets: dict) -> list[dict]:
+    """Checks scene totals and table rows against their limits.
+
+    Each row is matched against all patterns of its table in one pass, so a row matching several patterns
+    must satisfy all of their limits.
+
+    :param snapshot: snapshot to check
+    :param budgets: budget file contents, see this module's documentation.
+    :return: one violation per exceeded limit, as ``{kind, table, name, field, value, limit}``.
+    :raises ValueError: if the budgets aren't shaped as described in this module's documentation,
+        have non-numeric limits, or name an unknown table, an unknown field or a non-numeric field.
+    """
+    if not isinstance(budgets, dict):
+        raise ValueError('Budgets must be an object of tables, not {}'.format(json.dumps(budgets)))
+    violations = []
+    totals = snapshot['totals']
+    for field, limit in _check_limits('scene', budgets.get('scene', {})).items():
+        if field not in totals:
+            raise ValueError('Unknown scene total "{}", expected one of {}'.format(field, ', '.join(totals)))
+        if not _is_number(totals[field]):
+            raise ValueError('Scene total "{}" is not a number and cannot be budgeted'.format(field))
+        if totals[field] > limit:
+            violations.append(_violation('budget', 'scene', '', field, totals[field], limit))
+
+    for table_key, rules in budgets.items():
+        if table_key == 'scene':
+            continue
+        table_name = TABLE_ALIASES.get(table_key, table_key)
+        table = snapshot['tables'].get(table_name)
+        if table is None:
+            raise ValueError('Unknown table "{}" in budgets'.format(table_key))
+
+        if not isinstance(rules, dict):
+            raise ValueError('Budgets of {} must be an object of name patterns, not {}'.format(
+                table_key, json.dumps(rules)))
+
+        field_indices = {field: idx for idx, field in enumerate(table['fields'])}
+        # a column's type is the same in all rows, so its first value tells whether it can be budgeted
+        first_row = next(iter(table['rows'].values()), None)
+        compiled_rules = []
+        for pattern, limits in rules.items():
+            limits = _check_limits('{} "{}"'.format(table_key, pattern), limits)
+            unknown_fields = [field for field in limits if field not in field_indices]
+            if unknown_fields:
+                raise ValueError('Unknown {} fields in budgets: {}'.format(table_name, ', '.join(unknown_fields)))
+            text_fields = [field for field in limits
+                           if first_row is not None and not _is_number(first_row[field_indices[field]])]
+            if text_fields:
+                raise ValueError('{} fields in budgets are not numbers: {}'.format(table_name, ', '.join(text_fields)))
+            compiled_rules.append((re.compile(translate(pattern)).match,
+                                   [(field, field_indices[field], limit) for field, limit in limits.items()]))
+
+        for name, values in table['rows'].items():
+            for match, limits in compiled_rules:
+                if match(name) is None:
+                    continue
+                for field, idx, limit in limits:
+                    if values[idx] > limit:
+                        violations.append(_violation('budget', table_name, name, field, values[idx], limit))
+    return violations
+
+
+def compare_snapshots(current: dict, baseline: dict, tolerance: float = 0.0,
+                      compared_fields: dict[str, tuple[str, ...]] = None) -> list[dict]:
+    """Finds scene totals and rows that grew by more than a tolerance since a baseline snapshot.
+
+    Rows are matched by name with a dictionary lookup per row. Rows missing from either snapshot are not compared,
+    as added and removed rows already change the scene totals.
+
+    :param current: current snapshot
+    :param baseline: snapshot to compare with
+    :param tolerance: allowed growth, as a fraction of the baseline value.
+    :param compared_fields: fields compared for each table, defaults to :data:`COMPARED_FIELDS`.
+    :return: one regression per grown value, as ``{kind, table, name, field, value, limit}``,
+        where the limit is the highest value allowed by the tolerance.
+    """
+    compared_fields = COMPARED_FIELDS if compared_fields is None else compared_fields
+    regressions = []
+
+    def allowed(baseline_value):
+        return baseline_value + abs(baseline_value) * tolerance
+
+    for field, value in current['totals'].items():
+        baseline_value = baseline['totals'].get(field)
+        if _is_number(baseline_value) and _is_number(value) and value > allowed(baseline_value):
+            regressions.append(_violation('regression', 'scene', '', field, value, allowed(baseline_value)))
+
+    for table_name, fields in compared_fields.items():
+        table = current['tables'].get(table_name)
+        baseline_table = baseline['tables'].get(table_name)
+        if table is None or baseline_table is None:
+            continue
+        indices = [(field, table['fields'].index(field), baseline_table['fields'].index(field))
+                   for field in fields if field in table['fields'] and field in baseline_table['fields']]
+        baseline_rows = baseline_table['rows']
+        for name, values in table['rows'].items():
+            baseline_values = baseline_rows.get(name)
+            if baseline_values is None:
+                continue
+            for field, idx, baseline_idx in indices:
+                limit = allowed(baseline_values[baseline_idx])
+                if values[idx] > limit:
+                    regressions.append(_violation('regression', table_name, name, field, values[idx], limit))
+    return regressions
+
+
+def iter_snapshot_tables(snapshot: dict) -> Iterable[tuple[str, list[str], Iterable[tuple]]]:
+    """Iterates over the tables of a snapshot as ``(table_name, fields, rows)``, as taken by :func:`build_snapshot`."""
+    for table_name, table in snapshot['tables'].items():
+        yield table_name, ['name'] + table['fields'], ((name, *values) for name, values in table['rows'].items())
+
+
+def pack_tables(tables: Iterable[tuple[str, list[str], Iterable[tuple]]], totals: dict, source: str = '',
+                kept_fields: dict[str, tuple[str, ...]] = None) -> dict:
+    """Packs a few fields of some tables into sorted names and arrays of values, to diff them.
+
+    Rows of tables that are not kept are not read.
+
+    :param tables: tables as ``(table_name, fields, rows)``, with ``'name'`` as the first field.
+    :param totals: scene totals by name
+    :param source: file the stats were taken from
+    :param kept_fields: fields to keep, by table, defaults to :data:`DIFF_FIELDS`.
+    :return: packed snapshot, whose tables hold ``names`` in sorted order and one array of ``columns`` per field.
+    """
+    kept_fields = DIFF_FIELDS if kept_fields is None else kept_fields
+    packed_tables = {}
+    for table_name, fields, rows in tables:
+        if table_name not in kept_fields:
+            continue
+        fields_kept = [field for field in kept_fields[table_name] if field in fields]
+        getter = itemgetter(0, *[fields.index(field) for field in fields_kept])
+        packed_rows = sorted(getter(row) for row in rows)
+        columns = [array('d', [row[idx] for row in packed_rows]) for idx in range(1, len(fields_kept) + 1)]
+        packed_tables[table_name] = {'fields': fields_kept, 'names': [row[0] for row in packed_rows],
+                                     'columns': columns}
+    return {'source': source, 'totals': dict(totals), 'tables': packed_tables}
+
+
+def diff_packed(base: dict, current: dict) -> tuple[list[tuple], list[tuple], list[tuple]]:
+    """Diffs two packed snapshots with a merge join of each table's sorted names.
+
+    :param base: packed snapshot to compare with
+    :param current: packed snapshot to compare
+    :return: changed values as ``(table_name, name, field, base_value, value)``, then added and removed rows
+        as ``(table_name, name, field, value)`` with the value of the table's first field.
+    """
+    changes, added, removed = [], [], []
+    for table_name, table in current['tables'].items():
+        base_table = base['tables'].get(table_name)
+        if base_table is None:
+            continue
+        common_fields = [(field, table['fields'].index(field), base_table['fields'].index(field))
+                         for field in table['fields'] if field in base_table['fields']]
+        names, base_names = table['names'], base_table['names']
+        columns, base_columns = table['columns'], base_table['columns']
+        first_field = table['fields'][0] if table['fields'] else ''
+        base_first_field = base_table['fields'][0] if base_table['fields'] else ''
+
+        idx, base_idx = 0, 0
+        while idx < len(names) and base_idx < len(base_names):
+            name, base_name = names[idx], base_names[base_idx]
+            if name == base_name:
+                for field, column_idx, base_column_idx in common_fields:
+                    value, base_value = columns[column_idx][idx], base_columns[base_column_idx][base_idx]
+                    if value != base_value:
+                        changes.append((table_name, name, field, base_value, value))
+                idx += 1
+                base_idx += 1
+            elif name < base_name:
+                added.append((table_name, name, first_field, columns[0][idx] if columns else 0.0))
+                idx += 1
+            else:
+                removed.append((table_name, base_name, base_first_field,
+                                base_columns[0][base_idx] if base_columns else 0.0))
+                base_idx += 1
+        added.extend((table_name, names[i], first_field, columns[0][i] if columns else 0.0)
+                     for i in range(idx, len(names)))
+        removed.extend((table_name, base_names[i], base_first_field, base_columns[0][i] if base_columns else 0.0)
+                       for i in range(base_idx, len(base_names)))
+    return changes, added, removed
+
+
+def get_relative_change(base_value: float, value: float) -> float:
+    """Returns the change from a base value as a fraction of it, infinite if the base value is zero."""
+    if base_value == 0:
+        return math.copysign(math.inf, value)
+    return (value - base_value) / abs(base_value)
+
+
+def rank_changes(changes: Iterable[tuple], ranking: str = 'ABSOLUTE', limit: int = None) -> list[tuple]:
+    """Sorts changed values from the largest change, in either direction.
+
+    :param changes: changed values as ``(table_name, name, field, base_value, value)``
+    :param ranking: ``'ABSOLUTE'`` to rank by the change in value, ``'RELATIVE'`` by the change relative to the
+        base value, which ranks values that were zero first.
+    :param limit: number of changes to keep, all of them if not given.
+    """
+    if ranking == 'RELATIVE':
+        def key(change):
+            return abs(get_relative_change(change[3], change[4]))
+    else:
+        def key(change):
+            return abs(change[4] - change[3])
+    if limit is None:
+        return sorted(changes, key=key, reverse=True)
+    return heapq.nlargest(limit, changes, key=key)
@@ -0,0 +1,248 @@
+# Copyright (C) 2024 Spencer Magnusson
+# semagnum@gmail.com
+# Created by Spencer Magnusson
+#     This program is free software: you can redistribute it and/or modify
+#     it under the terms of the GNU General Public License as published by
+#     the Free Software Foundation, either version 3 of the License, or
+#     (at your option) any later version.
+#     This program is distributed in the hope that it will be useful,
+#     but WITHOUT ANY WARRANTY; without even the implied warranty of
+#     MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#     GNU General Public License for more details.
+#     You should have received a copy of the GNU General Public License
+#     along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Streams tables of rows to JSON Lines, CSV and a compact columnar binary format.
+
+Tables are given as ``(table_name, fields, rows)``, where rows is any iterator of tuples in field order,
+so rows are written as they are read and never collected in memory all at once.
+Does not depend on ``bpy``, so it can also be used by the command line scripts.
+
+The columnar format stores each table as chunks of up to :data:`CHUNK_ROWS` rows, each chunk holding
+one packed array per field. All integers are little-endian::
+
+    file   := b'SCXT' version:u16 table*
+    table  := name:str field_count:u16 (name:str type:u8)* chunk* end:u32(0)
+    chunk  := row_count:u32 column*
+    column := values  (int64 'q', float64 'd' or bool 'B' arrays)
+            | byte_length:u32 utf-8 strings separated by b'\\0'
+    str    := length:u16 utf-8 bytes
+"""
+
+import csv
+import json
+import os
+import struct
+import sys
+from array import array
+from itertools import chain, islice
+from typing import BinaryIO, Iterable, Iterator
+
+Table = tuple[str, list[str], Iterable[tuple]]
+"""Table as ``(table_name, fields, rows)``."""
+
+MAGIC = b'SCXT'
+VERSION = 2
+CHUNK_ROWS = 16384
+"""Rows per chunk of the columnar format, bounding the memory used to write or read a table."""
+
+TYPE_CODES = {bool: ord('B'), int: ord('q'), float: ord('d'), str: ord('s')}
+"""Columnar type code of each Python value type.
+
+Numbers are stored with 64 bits, as some columns of the stats store (e.g. ``memory_bytes``) are 64-bit floats,
+and summed triangle counts can exceed the 32-bit integer range. Version 1 files, with 32-bit ``'i'`` and ``'f'``
+columns, are still readable.
+"""
+
+PackingError = (OverflowError, TypeError, ValueError)
+"""Errors raised when a value does not fit the type of its column, e.g. a string in a number column."""
+
+
+def write_jsonl(f, tables: Iterable[Table]) -> int:
+    """Writes each row as a JSON object on its own line, with its table name under ``"table"``.
+
+    :param f: text file object
+    :param tables: tables to write
+    :return: number of rows written
+    """
+    row_count = 0
+    for table_name, fields, rows in tables:
+        for row in rows:
+            record = {'table': table_name}
+            record.update(zip(fields, row))
+            f.write(json.dumps(record))
+            f.write('\n')
+            row_count += 1
+    return row_count
+
+
+def write_csv(f, fields: list[str], rows: Iterable[tuple]) -> int:
+    """Writes a single table as CSV, with a header row of its field names.
+
+    :param f: text file object, opened with ``newline=''``
+    :param fields: field names
+    :param rows: rows in field order
+    :return: number of rows written
+    """
+    writer = csv.writer(f)
+    writer.writerow(fields)
+    row_count = 0
+    for row in rows:
+        writer.writerow(row)
+        row_count += 1
+    return row_count
+
+
+def write_csv_files(base_path: str, tables: Iterable[Table]) -> int:
+    """Writes each table to its own CSV file, named after the base path and the table.
+
+    ``write_csv_files('stats.csv', ...)`` writes "stats_meshes.csv", "stats_materials.csv", etc.
+
+    :param base_path: path of the exported file, with or without extension
+    :param tables: tables to write
+    :return: number of rows written
+    """
+    root = os.path.splitext(base_path)[0]
+    row_count = 0
+    for table_name, fields, rows in tables:
+        with open('{}_{}.csv'.format(root, table_name), 'w', newline='', encoding='utf-8') as f:
+            row_count += write_csv(f, fields, rows)
+    return row_count
+
+
+def _write_str(f: BinaryIO, value: str):
+    data = value.encode('utf-8')
+    f.write(struct.pack('<H', len(data)))
+    f.write(data)
+
+
+def _read_str(f: BinaryIO) -> str:
+    length, = struct.unpack('<H', f.read(2))
+    return f.read(length).decode('utf-8')
+
+
+def _pack_column(values: list, type_code: int) -> bytes:
+    if type_code == TYPE_CODES[str]:
+        data = b'\0'.join([str(v).encode('utf-8') for v in values])
+        return struct.pack('<I', len(data)) + data
+    packed = array(chr(type_code), values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack_column(f: BinaryIO, type_code: int, row_count: int) -> list:
+    if type_code == TYPE_CODES[str]:
+        length, = struct.unpack('<I', f.read(4))
+        return [s.decode('utf-8') for s in f.read(length).split(b'\0')] if row_count else []
+    values = array(chr(type_code))
+    values.frombytes(f.read(values.itemsize * row_count))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    if type_code == TYPE_CODES[bool]:
+        return [bool(v) for v in values]
+    return values.tolist()
+
+
+def write_columnar(f: BinaryIO, tables: Iterable[Table]) -> int:
+    """Writes tables in the compact columnar format described in this module's documentation.
+
+    Field types are taken from each table's first row.
+
+    :param f: binary file object
+    :param tables: tables to write
+    :return: number of rows written
+    """
+    f.write(MAGIC)
+    f.write(struct.pack('<H', VERSION))
+    row_count = 0
+    for table_name, fields, rows in tables:
+        rows = iter(rows)
+        first_row = next(rows, None)
+        type_codes = [TYPE_CODES.get(type(v), TYPE_CODES[str]) for v in first_row] if first_row is not None \
+            else [TYPE_CODES[str]] * len(fields)
+
+        _write_str(f, table_name)
+        f.write(struct.pack('<H', len(fields)))
+        for field, type_code in zip(fields, type_codes):
+            _write_str(f, field)
+            f.write(struct.pack('<B', type_code))
+
+        rows = chain([first_row], rows) if first_row is not None else rows
+        while True:
+            chunk = list(islice(rows, CHUNK_ROWS))
+            if not chunk:
+                break
+            f.write(struct.pack('<I', len(chunk)))
+            for column, type_code in zip(zip(*chunk), type_codes):
+                f.write(_pack_column(list(column), type_code))
+            row_count += len(chunk)
+        f.write(struct.pack('<I', 0))
+    return row_count
+
+
+def read_columnar(f: BinaryIO) -> Iterator[tuple[str, list[str], Iterator[tuple]]]:
+    """Reads tables written by :func:`write_columnar`, one chunk of rows at a time.
+
+    Each table's rows must be consumed before moving on to the next table.
+
+    :param f: binary file object
+    :return: generator of ``(table_name, fields, rows)``
+    """
+    if f.read(4) != MAGIC:
+        raise ValueError('Not a scene complexity columnar file')
+    version, = struct.unpack('<H', f.read(2))
+    if version > VERSION:
+        raise ValueError('Unsupported columnar file version {}'.format(version))
+
+    while True:
+        length_data = f.read(2)
+        if len(length_data) < 2:
+            return
+        f.seek(-2, os.SEEK_CUR)
+        table_name = _read_str(f)
+        field_count, = struct.unpack('<H', f.read(2))
+        fields, type_codes = [], []
+        for _ in range(field_count):
+            fields.append(_read_str(f))
+            type_codes.append(struct.unpack('<B', f.read(1))[0])
+
+        def iter_rows():
+            while True:
+                row_count, = struct.unpack('<I', f.read(4))
+                if row_count == 0:
+                    return
+                columns = [_unpack_column(f, type_code, row_count) for type_code in type_codes]
+                yield from zip(*columns)
+
+        rows = iter_rows()
+        yield table_name, fields, rows
+        for _ in rows:  # skip rows not consumed by the caller
+            pass
+
+
+EXPORT_FORMATS = {
+    'JSONL': '.jsonl',
+    'CSV': '.csv',
+    'COLUMNAR': '.scxt',
+}
+"""File extension of each export format."""
+
+
+def export_tables(path: str, export_format: str, tables: Iterable[Table]) -> int:
+    """Exports tables to a file, or a file per table for CSV.
+
+    :param path: file path
+    :param export_format: one of :data:`EXPORT_FORMATS`
+    :param tables: tables to write
+    :return: number of rows written
+    """
+    if export_format == 'JSONL':
+        with open(path, 'w', encoding='utf-8') as f:
+            return write_jsonl(f, tables)
+    if export_format == 'CSV':
+        return write_csv_files(path, tables)
+    if export_format == 'COLUMNAR':
+        with open(path, 'wb') as f:
+            return write_columnar(f, tables)
+    raise ValueError('Unknown export format {}'.format(export_format))
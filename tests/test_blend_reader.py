@@ -0,0 +1,251 @@
+"""Tests of the .blend file reader, on small files written with a minimal SDNA."""
+
+import gzip
+import os
+import struct
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cli'))
+from blend_reader import BlendFileError, read_stats  # noqa: E402
+
+TYPE_SIZES = {'char': 1, 'short': 2, 'int': 4, 'void': 0}
+"""Sizes of the basic SDNA types, structs are added by :class:`FixtureWriter`."""
+
+STRUCTS = (
+    ('ID', ('char name[64]',)),
+    ('ListBase', ('void *first', 'void *last')),
+    ('ModifierData', ('ModifierData *next', 'ModifierData *prev', 'int type', 'int flag')),
+    ('bNode', ('bNode *next', 'bNode *prev', 'char idname[64]', 'int flag', 'int pad', 'ID *id')),
+    ('bNodeLink', ('bNodeLink *next', 'bNodeLink *prev', 'bNode *fromnode', 'bNode *tonode')),
+    ('bNodeTree', ('ID id', 'char idname[64]', 'ListBase nodes', 'ListBase links')),
+    ('Material', ('ID id', 'bNodeTree *nodetree', 'short use_nodes', 'short pad[3]')),
+    ('Mesh', ('ID id', 'Material **mat', 'int verts_num', 'int faces_num', 'int corners_num', 'short totcol',
+              'short pad')),
+    ('Object', ('ID id', 'ListBase modifiers', 'void *data', 'Material **mat', 'char *matbits', 'short type',
+                'short totcol', 'int pad')),
+)
+"""Structs of the fixture files, with only the fields read by the reader."""
+
+NODE_MUTED = 1 << 9
+
+
+class FixtureWriter:
+    """Writes a .blend file from blocks of the :data:`STRUCTS` layouts.
+
+    :param header: file header, which also selects the block header layout.
+    :param large_bhead: whether block headers use 64-bit sizes, as since Blender 5.0.
+    """
+
+    def __init__(self, header: bytes, large_bhead: bool):
+        self.header = header
+        self.large_bhead = large_bhead
+        self.types = list(TYPE_SIZES)
+        self.type_sizes = dict(TYPE_SIZES)
+        self.names = []
+        self.layouts = {}
+        for type_name, fields in STRUCTS:
+            self._add_struct(type_name, fields)
+        self.blocks = []
+        self._next_ptr = 0x1000
+
+    def _add_struct(self, type_name: str, fields: tuple[str, ...]):
+        layout = {}
+        offset = 0
+        for field in fields:
+            field_type, field_name = field.split(' ')
+            if field_type not in self.type_sizes:
+                self.types.append(field_type)
+                self.type_sizes[field_type] = 0  # only used through pointers until defined
+            self.names.append(field_name)
+            identifier = field_name.lstrip('*').split('[')[0]
+            count = int(field_name.split('[')[1][:-1]) if '[' in field_name else 1
+            size = 8 if field_name.startswith('*') else self.type_sizes[field_type]
+            layout[identifier] = (field_type, field_name, offset, size * count)
+            offset += size * count
+        if type_name not in self.type_sizes:
+            self.types.append(type_name)
+        self.type_sizes[type_name] = offset
+        self.layouts[type_name] = layout
+
+    def new_ptr(self) -> int:
+        self._next_ptr += 0x100
+        return self._next_ptr
+
+    def add(self, code: bytes, type_name: str, ptr: int = None, **values) -> int:
+        """Adds a block holding one struct, with the given field values and all other fields zeroed.
+
+        :return: old address of the block.
+        """
+        data = bytearray(self.type_sizes[type_name])
+        for name, value in values.items():
+            field_type, field_name, offset, size = self.layouts[type_name][name]
+            if isinstance(value, (bytes, str)):
+                raw = value.encode() if isinstance(value, str) else value
+                data[offset:offset + len(raw)] = raw
+            elif field_name.startswith('*'):
+                struct.pack_into('<Q', data, offset, value)
+            elif field_type in self.layouts:  # ListBase
+                struct.pack_into('<QQ', data, offset, *value)
+            else:
+                struct.pack_into('<' + {1: 'b', 2: 'h', 4: 'i'}[TYPE_SIZES[field_type]], data, offset, value)
+        return self.add_raw(code, bytes(data), self.types.index(type_name), ptr)
+
+    def add_raw(self, code: bytes, data: bytes, sdna_index: int = 0, ptr: int = None) -> int:
+        ptr = self.new_ptr() if ptr is None else ptr
+        self.blocks.append((code, data, ptr, sdna_index))
+        return ptr
+
+    def _get_sdna(self) -> bytes:
+        def pad(data: bytes) -> bytes:
+            return data + b'\0' * (-len(data) % 4)
+
+        struct_indices = [self.types.index(type_name) for type_name, _fields in STRUCTS]
+        sdna = b'SDNA'
+        sdna += pad(b'NAME' + struct.pack('<i', len(self.names)) + b''.join(n.encode() + b'\0' for n in self.names))
+        sdna += pad(b'TYPE' + struct.pack('<i', len(self.types)) + b''.join(t.encode() + b'\0' for t in self.types))
+        sdna += pad(b'TLEN' + struct.pack('<{}h'.format(len(self.types)), *(self.type_sizes[t] for t in self.types)))
+        sdna += b'STRC' + struct.pack('<i', len(STRUCTS))
+        name_index = 0
+        for (_type_name, fields), type_index in zip(STRUCTS, struct_indices):
+            sdna += struct.pack('<hh', type_index, len(fields))
+            for field in fields:
+                sdna += struct.pack('<hh', self.types.index(field.split(' ')[0]), name_index)
+                name_index += 1
+        return sdna
+
+    def _get_bhead(self, code: bytes, size: int, ptr: int, sdna_index: int, count: int) -> bytes:
+        if self.large_bhead:
+            return struct.pack('<4siQqq', code.ljust(4, b'\0'), sdna_index, ptr, size, count)
+        return struct.pack('<4siQii', code.ljust(4, b'\0'), size, ptr, sdna_index, count)
+
+    def to_bytes(self) -> bytes:
+        data = self.header
+        for code, block_data, ptr, sdna_index in self.blocks:
+            data += self._get_bhead(code, len(block_data), ptr, sdna_index, 1) + block_data
+        sdna = self._get_sdna()
+        data += self._get_bhead(b'DNA1', len(sdna), 0, 0, 1) + sdna
+        return data + self._get_bhead(b'ENDB', 0, 0, 0, 0)
+
+
+def write_scene(writer: FixtureWriter) -> bytes:
+    """Writes a scene of a cube with two modifiers and a material, and a geometry node tree.
+
+    The material's shader is linked to its output through a reroute, and a coordinate node is linked to the shader
+    through a muted node, so only the shader and coordinate nodes are used.
+    """
+    tree = writer.new_ptr()
+    output, reroute, shader, muted, coordinates, unlinked = (writer.new_ptr() for _ in range(6))
+    link_1, link_2, link_3, link_4 = (writer.new_ptr() for _ in range(4))
+    writer.add(b'NT', 'bNodeTree', tree, id='NTShader Nodetree', idname='ShaderNodeTree',
+               nodes=(output, unlinked), links=(link_1, link_4))
+    writer.add(b'DATA', 'bNode', output, next=reroute, idname='ShaderNodeOutputMaterial')
+    writer.add(b'DATA', 'bNode', reroute, next=shader, prev=output, idname='NodeReroute')
+    writer.add(b'DATA', 'bNode', shader, next=muted, prev=reroute, idname='ShaderNodeBsdfPrincipled')
+    writer.add(b'DATA', 'bNode', muted, next=coordinates, prev=shader, idname='ShaderNodeMath', flag=NODE_MUTED)
+    writer.add(b'DATA', 'bNode', coordinates, next=unlinked, prev=muted, idname='ShaderNodeTexCoord')
+    writer.add(b'DATA', 'bNode', unlinked, prev=coordinates, idname='ShaderNodeMath')
+    writer.add(b'DATA', 'bNodeLink', link_1, next=link_2, fromnode=reroute, tonode=output)
+    writer.add(b'DATA', 'bNodeLink', link_2, next=link_3, prev=link_1, fromnode=shader, tonode=reroute)
+    writer.add(b'DATA', 'bNodeLink', link_3, next=link_4, prev=link_2, fromnode=muted, tonode=shader)
+    writer.add(b'DATA', 'bNodeLink', link_4, prev=link_3, fromnode=coordinates, tonode=muted)
+    material = writer.add(b'MA', 'Material', id='MAMaterial', nodetree=tree, use_nodes=1)
+
+    geometry_tree = writer.new_ptr()
+    group_output, cube = writer.new_ptr(), writer.new_ptr()
+    geometry_link = writer.new_ptr()
+    writer.add(b'NT', 'bNodeTree', geometry_tree, id='NTGeometry Nodes', idname='GeometryNodeTree',
+               nodes=(group_output, cube), links=(geometry_link, geometry_link))
+    writer.add(b'DATA', 'bNode', group_output, next=cube, idname='NodeGroupOutput')
+    writer.add(b'DATA', 'bNode', cube, prev=group_output, idname='GeometryNodeMeshCube')
+    writer.add(b'DATA', 'bNodeLink', geometry_link, fromnode=cube, tonode=group_output)
+
+    mesh_materials = writer.add_raw(b'DATA', struct.pack('<Q', material))
+    mesh = writer.add(b'ME', 'Mesh', id='MECube', mat=mesh_materials, verts_num=8, faces_num=6, corners_num=24,
+                      totcol=1)
+    modifier_1, modifier_2 = writer.new_ptr(), writer.new_ptr()
+    writer.add(b'DATA', 'ModifierData', modifier_1, next=modifier_2)
+    writer.add(b'DATA', 'ModifierData', modifier_2, prev=modifier_1)
+    matbits = writer.add_raw(b'DATA', b'\0')
+    writer.add(b'OB', 'Object', id='OBCube', modifiers=(modifier_1, modifier_2), data=mesh, matbits=matbits,
+               type=1, totcol=1)
+    return writer.to_bytes()
+
+
+def write_legacy_scene() -> bytes:
+    return write_scene(FixtureWriter(b'BLENDER-v402', large_bhead=False))
+
+
+def write_large_bhead_scene() -> bytes:
+    return write_scene(FixtureWriter(b'BLENDER17-01v0500', large_bhead=True))
+
+
+def compress_zstd(data: bytes) -> bytes:
+    try:
+        from compression import zstd
+        return zstd.compress(data)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise unittest.SkipTest('zstd compression requires Python 3.14 or the zstandard module')
+    return zstandard.ZstdCompressor().compress(data)
+
+
+class BlendReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, data: bytes) -> dict:
+        path = os.path.join(self.directory.name, 'scene.blend')
+        with open(path, 'wb') as f:
+            f.write(data)
+        return read_stats(path)
+
+    def check_scene(self, stats: dict, version: int):
+        self.assertEqual(stats['version'], version)
+        self.assertEqual(stats['meshes'], [{'name': 'Cube', 'tris': 12, 'verts': 8, 'material_count': 1,
+                                            'material_node_count': 2, 'modifier_count': 2}])
+        self.assertEqual(stats['materials'], [{'name': 'Material', 'nodes_used': 2, 'max_texture_size': 0,
+                                               'texture_memory': 0}])
+        self.assertEqual(stats['geometry_nodes'], [{'name': 'Geometry Nodes', 'nodes_used': 1}])
+
+    def test_legacy_header(self):
+        self.check_scene(self.read(write_legacy_scene()), 402)
+
+    def test_large_bhead_header(self):
+        self.check_scene(self.read(write_large_bhead_scene()), 500)
+
+    def test_gzip(self):
+        self.check_scene(self.read(gzip.compress(write_legacy_scene())), 402)
+
+    def test_zstd(self):
+        self.check_scene(self.read(compress_zstd(write_large_bhead_scene())), 500)
+
+    def test_not_a_blend_file(self):
+        with self.assertRaises(BlendFileError):
+            self.read(b'PK\x03\x04 not a blend file')
+
+    def test_truncated_sdna(self):
+        with self.assertRaises(BlendFileError):
+            self.read(write_legacy_scene()[:-64])
+
+    def test_truncated_gzip(self):
+        with self.assertRaises(BlendFileError):
+            self.read(gzip.compress(write_legacy_scene())[:-64])
+
+    def test_corrupt_name(self):
+        data = write_legacy_scene()
+        name_offset = data.index(b'NAME') + 8
+        with self.assertRaises(BlendFileError):
+            self.read(data[:name_offset] + b'\xff' + data[name_offset + 1:])
+
+
+if __name__ == '__main__':
+    unittest.main()